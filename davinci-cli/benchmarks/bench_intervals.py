@@ -0,0 +1,57 @@
+"""Compare answering frame and range queries with interval trees and by scanning the items.
+
+Builds a synthetic timeline of tracks of back to back items, like an edit,
+and runs the same queries both ways. Run from the davinci-cli directory:
+
+    python -m benchmarks.bench_intervals [items] [tracks] [queries]
+"""
+import random
+import sys
+import time
+
+from src.intervals import TimelineIndex
+
+def make_items(count: int, tracks: int):
+    random.seed(0)
+    items = []
+    for track in range(1, tracks + 1):
+        frame = 86400
+        for _ in range(count // tracks):
+            frame += random.randint(0, 48)
+            length = random.randint(12, 480)
+            items.append({"track_type": "video", "track": track, "start": frame, "end": frame + length})
+            frame += length
+    return items
+
+def scan_at(items, frame):
+    return [item for item in items if item["start"] <= frame < item["end"]]
+
+def scan_overlapping(items, start, end):
+    return [item for item in items if item["start"] < end and item["end"] > start]
+
+def measure(name, function):
+    start = time.perf_counter()
+    result = function()
+    print(f"{name}: {(time.perf_counter() - start) * 1000:.1f}ms")
+    return result
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    tracks = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    queries = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+    items = make_items(count, tracks)
+    last = max(item["end"] for item in items)
+    frames = [random.randint(86400, last) for _ in range(queries)]
+    ranges = [(frame, frame + random.randint(1, 2400)) for frame in frames]
+    print(f"{len(items)} items on {tracks} tracks, {queries} frame and {queries} range queries")
+
+    index = measure("build index", lambda: TimelineIndex(items))
+    tree_hits = measure("tree --at", lambda: [index.at(frame) for frame in frames])
+    scan_hits = measure("scan --at", lambda: [scan_at(items, frame) for frame in frames])
+    assert [sorted(map(id, hits)) for hits in tree_hits] == [sorted(map(id, hits)) for hits in scan_hits]
+    tree_hits = measure("tree --range", lambda: [index.overlapping(start, end) for start, end in ranges])
+    scan_hits = measure("scan --range", lambda: [scan_overlapping(items, start, end) for start, end in ranges])
+    assert [sorted(map(id, hits)) for hits in tree_hits] == [sorted(map(id, hits)) for hits in scan_hits]
+
+if __name__ == "__main__":
+    main()
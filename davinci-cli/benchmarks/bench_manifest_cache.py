@@ -0,0 +1,30 @@
+"""Compare manifest with and without a manifest cache.
+
+Run from the davinci-cli directory:
+
+    python -m benchmarks.bench_manifest_cache [size_in_mb] [maxsize]
+"""
+import sys
+import time
+
+import src.macro as macro
+from benchmarks.comp import make_comp
+
+def main():
+    size = int(float(sys.argv[1]) * 1_000_000) if len(sys.argv) > 1 else 10_000_000
+    obj = macro.parse(make_comp(size))
+    start = time.perf_counter()
+    expected = macro.manifest(obj)
+    plain_time = time.perf_counter() - start
+    cache = macro.ManifestCache(maxsize=int(sys.argv[2]) if len(sys.argv) > 2 else 4096)
+    start = time.perf_counter()
+    result = macro.manifest(obj, cache=cache)
+    cold_time = time.perf_counter() - start
+    start = time.perf_counter()
+    macro.manifest(obj, cache=cache)
+    warm_time = time.perf_counter() - start
+    assert result == expected
+    print(f"manifest {plain_time:.3f}s, cached cold {cold_time:.3f}s, warm {warm_time:.3f}s, {cache.info()}")
+
+if __name__ == "__main__":
+    main()
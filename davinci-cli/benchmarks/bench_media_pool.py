@@ -0,0 +1,85 @@
+"""Compare listing a media pool from scratch with a repeat listing from the per-folder cache.
+
+Every call on a clip costs a fixed latency, standing in for the round trip
+into Resolve, and one folder changes between listings. Run from the
+davinci-cli directory:
+
+    python -m benchmarks.bench_media_pool [clips] [folders] [latency_us]
+"""
+import sys
+import tempfile
+import time
+
+import src.davinci as davinci
+from src.media_pool import MediaPoolListing
+
+class Clip:
+    calls = 0
+    latency = 0.0
+
+    def __init__(self, number):
+        self.number = number
+
+    def _call(self, value):
+        Clip.calls += 1
+        deadline = time.perf_counter() + Clip.latency
+        while time.perf_counter() < deadline:
+            pass
+        return value
+
+    def GetUniqueId(self):
+        return self._call(f"clip-{self.number}")
+
+    def GetName(self):
+        return self._call(f"C{self.number:05d}.mov")
+
+    def GetClipProperty(self, name=None):
+        return self._call({"File Path": f"/media/C{self.number:05d}.mov", "FPS": "25", "Resolution": "3840x2160"})
+
+class Folder:
+    def __init__(self, name, clips, subfolders=()):
+        self.name = name
+        self.clips = clips
+        self.subfolders = list(subfolders)
+
+    def GetName(self):
+        return self.name
+
+    def GetClipList(self):
+        return list(self.clips)
+
+    def GetSubFolderList(self):
+        return list(self.subfolders)
+
+def list_clips(listing, root):
+    count = 0
+    for path, folder in davinci.iter_media_pool_folders(root):
+        count += len(listing.list_folder(path, folder))
+    return count
+
+def measure(name, directory, root):
+    Clip.calls = 0
+    start = time.perf_counter()
+    listing = MediaPoolListing("Bench", directory)
+    count = list_clips(listing, root)
+    listing.save()
+    elapsed = time.perf_counter() - start
+    print(f"{name}: {elapsed * 1000:.1f}ms, {count} clips, {Clip.calls} clip calls, {listing.read} folders read")
+
+def main():
+    clips = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    folders = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    Clip.latency = (float(sys.argv[3]) if len(sys.argv) > 3 else 20.0) / 1e6
+    per_folder = clips // folders
+    root = Folder("Master", [], [
+        Folder(f"Reel {i}", [Clip(i * per_folder + j) for j in range(per_folder)]) for i in range(folders)
+    ])
+    print(f"{clips} clips in {folders} folders, {Clip.latency * 1e6:.0f}us per call")
+    with tempfile.TemporaryDirectory() as directory:
+        measure("first listing", directory, root)
+        measure("unchanged", directory, root)
+        root.subfolders[0].clips.append(Clip(clips))
+        measure("one folder changed", directory, root)
+
+if __name__ == "__main__":
+    main()
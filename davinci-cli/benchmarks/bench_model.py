@@ -0,0 +1,38 @@
+"""Compare the memory used by the dict and LuaTable data models.
+
+Run from the davinci-cli directory:
+
+    python -m benchmarks.bench_model [size_in_mb]
+"""
+import sys
+import time
+import tracemalloc
+
+import src.macro as macro
+from benchmarks.comp import make_comp
+
+def measure(text: str, model: str):
+    start = time.perf_counter()
+    result = macro.parse(text, model=model)
+    elapsed = time.perf_counter() - start
+    del result
+    # Tracing allocations slows parsing down, so memory is measured separately
+    tracemalloc.start()
+    result = macro.parse(text, model=model)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, elapsed
+
+def main():
+    size = int(float(sys.argv[1]) * 1_000_000) if len(sys.argv) > 1 else 10_000_000
+    text = make_comp(size)
+    print(f"{'model':>8} {'memory MB':>10} {'parse s':>8}")
+    sizes = {}
+    for model in ("dict", "table"):
+        result, sizes[model], elapsed = measure(text, model)
+        print(f"{model:>8} {sizes[model] / 1_000_000:10.2f} {elapsed:8.3f}")
+        del result
+    print(f"table model uses {1 - sizes['table'] / sizes['dict']:.0%} less memory")
+
+if __name__ == "__main__":
+    main()
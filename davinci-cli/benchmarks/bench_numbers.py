@@ -0,0 +1,41 @@
+"""Compare list and typed array storage for numeric tables.
+
+Run from the davinci-cli directory:
+
+    python -m benchmarks.bench_numbers [size_in_mb]
+"""
+import sys
+import time
+import tracemalloc
+
+import src.macro as macro
+from benchmarks.comp import make_numeric_comp
+
+def main():
+    size = int(float(sys.argv[1]) * 1_000_000) if len(sys.argv) > 1 else 10_000_000
+    text = make_numeric_comp(size)
+    storages = ["list", "array"]
+    try:
+        import numpy
+        storages.append("numpy")
+    except ImportError:
+        pass
+    print(f"{'numbers':>8} {'memory MB':>10} {'parse s':>8} {'manifest s':>10}")
+    for numbers in storages:
+        start = time.perf_counter()
+        result = macro.parse(text, numbers=numbers)
+        parse_time = time.perf_counter() - start
+        del result
+        # Tracing allocations slows parsing down, so memory is measured separately
+        tracemalloc.start()
+        result = macro.parse(text, numbers=numbers)
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        start = time.perf_counter()
+        macro.manifest(result)
+        manifest_time = time.perf_counter() - start
+        print(f"{numbers:>8} {memory / 1_000_000:10.2f} {parse_time:8.3f} {manifest_time:10.3f}")
+        del result
+
+if __name__ == "__main__":
+    main()
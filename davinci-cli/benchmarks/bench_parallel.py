@@ -0,0 +1,38 @@
+"""Find the composition size from which parsing in worker processes pays off.
+
+Run from the davinci-cli directory:
+
+    python -m benchmarks.bench_parallel [workers]
+"""
+import os
+import sys
+import time
+
+import src.macro as macro
+from benchmarks.comp import make_comp
+
+SIZES = [100_000, 300_000, 1_000_000, 3_000_000, 10_000_000, 30_000_000]
+
+def measure(text: str, workers) -> float:
+    start = time.perf_counter()
+    macro.parse(text, workers=workers)
+    return time.perf_counter() - start
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else max(os.cpu_count() or 1, 2)
+    print(f"{'size':>12} {'serial':>8} {f'{workers} workers':>10} {'speedup':>8}")
+    crossover = None
+    for size in SIZES:
+        text = make_comp(size)
+        serial = measure(text, None)
+        parallel = measure(text, workers)
+        print(f"{len(text):>12} {serial:8.3f} {parallel:10.3f} {serial / parallel:8.2f}")
+        if crossover is None and parallel < serial:
+            crossover = len(text)
+    if crossover is None:
+        print(f"{workers} workers did not pay off up to {SIZES[-1]} bytes")
+    else:
+        print(f"{workers} workers pay off from about {crossover} bytes")
+
+if __name__ == "__main__":
+    main()
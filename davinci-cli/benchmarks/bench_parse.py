@@ -0,0 +1,33 @@
+"""Measure how macro.parse scales with the size of the settings string.
+
+Run from the davinci-cli directory:
+
+    python -m benchmarks.bench_parse [max_size_in_mb]
+"""
+import sys
+import time
+
+import src.macro as macro
+from benchmarks.comp import make_comp
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000, 50_000_000]
+LEGACY_MAX_SIZE = 1_000_000
+
+def measure(func, text: str) -> float:
+    start = time.perf_counter()
+    func(text)
+    return time.perf_counter() - start
+
+def main():
+    max_size = float(sys.argv[1]) * 1_000_000 if len(sys.argv) > 1 else SIZES[-1]
+    print(f"{'size':>12} {'parse':>10} {'MB/s':>8} {'legacy':>10}")
+    for size in SIZES:
+        if size > max_size:
+            break
+        text = make_comp(size)
+        elapsed = measure(macro.parse, text)
+        legacy = f"{measure(macro._legacy_parse, text):10.3f}" if size <= LEGACY_MAX_SIZE else f"{'-':>10}"
+        print(f"{len(text):>12} {elapsed:10.3f} {len(text) / elapsed / 1_000_000:8.2f} {legacy}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Compare the container header reader with running ffprobe on generated files.
+
+Run from the davinci-cli directory:
+
+    python -m benchmarks.bench_probe [files] [size_in_mb]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import src.probe as probe
+from benchmarks.media import make_mkv, make_mp4
+from src.containers import read_info
+
+def make_files(directory: str, count: int, size: int):
+    """Write a mix of MP4, MOV with the movie header at the end and Matroska files."""
+    paths = []
+    for i in range(count):
+        kind = i % 3
+        path = os.path.join(directory, f"clip{i}.{('mp4', 'mov', 'mkv')[kind]}")
+        if kind == 2:
+            make_mkv(path, payload_size=size)
+        else:
+            make_mp4(path, payload_size=size, moov_at_end=kind == 1)
+        paths.append(path)
+    return paths
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    size = int(float(sys.argv[2]) * 1_000_000) if len(sys.argv) > 2 else 50_000_000
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_files(directory, count, size)
+        start = time.perf_counter()
+        infos = [read_info(path) for path in paths]
+        header_time = time.perf_counter() - start
+        assert all(infos)
+        print(f"header reader: {header_time * 1000 / count:.3f}ms per file, {count} files of {size / 1e6:.0f} MB")
+
+        ffprobe = probe.ffprobe_path()
+        if not shutil.which(ffprobe):
+            print(f"ffprobe: {ffprobe} not found, set DAVINCI_CLI_FFPROBE to compare")
+            return
+        start = time.perf_counter()
+        for path in paths:
+            probe.run_ffprobe(path)
+        ffprobe_time = time.perf_counter() - start
+        print(f"ffprobe: {ffprobe_time * 1000 / count:.3f}ms per file")
+
+if __name__ == "__main__":
+    main()
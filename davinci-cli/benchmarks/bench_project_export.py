@@ -0,0 +1,76 @@
+"""Compare exporting the subtitles of many timelines one after another with the worker pool.
+
+Reading a track sleeps for a fixed latency, standing in for Resolve, which
+leaves the interpreter free for the workers in the meantime. Run from the
+davinci-cli directory:
+
+    python -m benchmarks.bench_project_export [timelines] [cues] [latency_ms]
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import src.subtitles as subtitles
+from benchmarks.bench_subtitles import make_timeline
+
+class SlowTimeline:
+    latency = 0.0
+
+    def __init__(self, name, timeline):
+        self.name = name
+        self.timeline = timeline
+
+    def GetName(self):
+        return self.name
+
+    def GetSetting(self, name):
+        return "23.976"
+
+    def GetStartFrame(self):
+        return 0
+
+    def GetTrackCount(self, track_type):
+        return len(self.timeline.tracks)
+
+    def GetItemListInTrack(self, track_type, index):
+        time.sleep(SlowTimeline.latency)
+        return self.timeline.GetItemListInTrack(track_type, index)
+
+FORMATS = ["srt", "ttml", "vtt"]
+
+def outputs(directory, name):
+    return [(format_type, os.path.join(directory, f"{name}.{subtitles.EXTENSIONS[format_type]}")) for format_type in FORMATS]
+
+def sequential(timelines, directory):
+    for timeline in timelines:
+        fetched = subtitles.fetch_timeline_subtitles(timeline)
+        subtitles.write_files(fetched, outputs(directory, fetched.name))
+
+def pooled(timelines, directory, jobs=4):
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = []
+        for timeline in timelines:
+            fetched = subtitles.fetch_timeline_subtitles(timeline)
+            futures.append(executor.submit(subtitles.write_files, fetched, outputs(directory, fetched.name)))
+        for future in futures:
+            future.result()
+
+def measure(name, function, timelines):
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        function(timelines, directory)
+        print(f"{name}: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    cues = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    SlowTimeline.latency = (float(sys.argv[3]) if len(sys.argv) > 3 else 20.0) / 1000
+    timelines = [SlowTimeline(f"Episode {i}", make_timeline(cues, 2)) for i in range(count)]
+    print(f"{count} timelines with {cues} cues, {SlowTimeline.latency * 1000:.0f}ms per track, formats {', '.join(FORMATS)}")
+    measure("one after another", sequential, timelines)
+    measure("worker pool", pooled, timelines)
+
+if __name__ == "__main__":
+    main()
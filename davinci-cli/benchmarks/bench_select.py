@@ -0,0 +1,27 @@
+"""Compare selecting one tool with parsing the whole composition.
+
+Run from the davinci-cli directory:
+
+    python -m benchmarks.bench_select [size_in_mb]
+"""
+import sys
+import time
+
+import src.macro as macro
+from benchmarks.comp import make_comp
+
+def main():
+    size = int(float(sys.argv[1]) * 1_000_000) if len(sys.argv) > 1 else 10_000_000
+    text = make_comp(size)
+    tools = text.count("= Blur {")
+    path = f"Tools.Blur{tools // 2}.Inputs"
+    start = time.perf_counter()
+    macro.parse(text)
+    parse_time = time.perf_counter() - start
+    start = time.perf_counter()
+    macro.select(text, path)
+    select_time = time.perf_counter() - start
+    print(f"parse {parse_time:.3f}s, select {path} {select_time:.3f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Measure how long the davinci entry point takes to import, with python -X importtime.
+
+Run from the davinci-cli directory:
+
+    python -m benchmarks.bench_startup [runs]
+
+Exits with an error if importing src.cli takes longer than the budget.
+"""
+import os
+import subprocess
+import sys
+import time
+from typing import Dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time allowed for src.cli
+BUDGET_US = 100_000
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    # Installed commands run from bytecode, so let the first run write it
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    env["DAVINCI_CLI_NO_DAEMON"] = "1"
+    return env
+
+def import_times(module: str) -> Dict[str, int]:
+    """Import a module in a fresh interpreter and get the cumulative import time of every module in microseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=_env(), capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        try:
+            times[name.strip()] = int(cumulative)
+        except ValueError:
+            # The header line
+            continue
+    return times
+
+def startup_time(module: str, runs: int = 5) -> int:
+    """Get the fastest cumulative import time of a module over several runs in microseconds."""
+    import_times(module)
+    return min(import_times(module)[module] for _ in range(runs))
+
+def command_time(args, stdin: str = "", runs: int = 5) -> float:
+    """Get the fastest wall time of a davinci command run in its own process in seconds."""
+    best = None
+    for _ in range(runs + 1):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "src.cli", *args], cwd=ROOT, env=_env(), input=stdin,
+                       capture_output=True, text=True, check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    times = {module: startup_time(module, runs) for module in ("src.client", "src.cli")}
+    for module, cumulative in times.items():
+        print(f"import {module}: {cumulative / 1000:.1f}ms")
+    print(f"budget for src.cli: {BUDGET_US / 1000:.0f}ms")
+    times = import_times("src.cli")
+    print("slowest imports:")
+    for name, cumulative in sorted(times.items(), key=lambda item: -item[1])[1:11]:
+        print(f"  {name.strip()}: {cumulative / 1000:.1f}ms")
+    print(f"davinci comp convert: {command_time(['comp', 'convert'], '{}', runs) * 1000:.0f}ms")
+    if times["src.cli"] > BUDGET_US:
+        sys.exit(f"import src.cli takes {times['src.cli'] / 1000:.1f}ms, over the budget of {BUDGET_US / 1000:.0f}ms")
+
+if __name__ == "__main__":
+    main()
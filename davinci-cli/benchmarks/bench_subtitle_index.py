@@ -0,0 +1,63 @@
+"""Measure searching subtitles through the index against exporting every track.
+
+Run from the davinci-cli directory:
+
+    python -m benchmarks.bench_subtitle_index [timelines] [cues]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import src.subtitles as subtitles
+from benchmarks.bench_subtitles import Timeline, Item
+from src.subtitle_index import SubtitleIndex
+
+WORDS = "the a station morning closed where is train late platform ticket open river city night".split()
+
+class IndexedTimeline(Timeline):
+    def GetTrackCount(self, track_type):
+        return len(self.tracks)
+
+    def GetSetting(self, name):
+        return {"timelineFrameRate": "24"}.get(name, "")
+
+def make_timeline(cues: int) -> IndexedTimeline:
+    start = 86400
+    items = []
+    for _ in range(cues):
+        start += random.randint(24, 96)
+        items.append(Item(" ".join(random.choices(WORDS, k=6)), start, start + 48))
+    return IndexedTimeline({1: items})
+
+def measure(name, function):
+    Item.calls = 0
+    start = time.perf_counter()
+    result = function()
+    print(f"{name}: {(time.perf_counter() - start) * 1000:.1f}ms, {Item.calls} item calls")
+    return result
+
+def main():
+    timeline_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    cues = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    random.seed(0)
+    timelines = {f"Timeline {i}": make_timeline(cues) for i in range(timeline_count)}
+    print(f"{timeline_count} timelines with {cues} cues")
+
+    def scan():
+        return [subtitle for timeline in timelines.values() for subtitle in subtitles.iter_subtitles(timeline, [1])
+                if "platform ticket" in subtitle.text]
+
+    with tempfile.TemporaryDirectory() as directory, SubtitleIndex(os.path.join(directory, "index.sqlite3")) as index:
+        def refresh():
+            return sum(index.refresh("Bench", name, timeline) for name, timeline in timelines.items())
+
+        expected = measure("export and scan", scan)
+        measure("first refresh", refresh)
+        measure("refresh without changes", refresh)
+        hits = measure("search", lambda: index.search("platform ticket", "Bench"))
+        assert len(hits) == len(expected)
+
+if __name__ == "__main__":
+    main()
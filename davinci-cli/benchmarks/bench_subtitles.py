@@ -0,0 +1,89 @@
+"""Compare collecting multi-track subtitles the previous way with records and a merge.
+
+Every call on a fake item costs a fixed latency, standing in for the round
+trip into Resolve. Run from the davinci-cli directory:
+
+    python -m benchmarks.bench_subtitles [cues] [tracks] [latency_us]
+"""
+import random
+import sys
+import time
+
+import src.subtitles as subtitles
+
+class Item:
+    calls = 0
+    latency = 0.0
+
+    def __init__(self, text, start, end):
+        self._text = text
+        self._start = start
+        self._end = end
+
+    def _call(self, value):
+        Item.calls += 1
+        if Item.latency:
+            deadline = time.perf_counter() + Item.latency
+            while time.perf_counter() < deadline:
+                pass
+        return value
+
+    def GetName(self):
+        return self._call(self._text)
+
+    def GetStart(self):
+        return self._call(self._start)
+
+    def GetEnd(self):
+        return self._call(self._end)
+
+class Timeline:
+    def __init__(self, tracks):
+        self.tracks = tracks
+
+    def GetItemListInTrack(self, track_type, index):
+        return list(self.tracks[index])
+
+def make_timeline(cues: int, tracks: int) -> Timeline:
+    """Create a timeline with cues spread over tracks, each track in timeline order."""
+    random.seed(0)
+    result = {}
+    for track in range(1, tracks + 1):
+        start = 0
+        items = []
+        for i in range(cues // tracks):
+            start += random.randint(24, 96)
+            items.append(Item(f"Track {track} cue {i}", start, start + 48))
+        result[track] = items
+    return Timeline(result)
+
+def previous_export(timeline, tracks):
+    """The previous implementation: dicts, a sort per track calling GetStart, and a global sort."""
+    all_subtitles = []
+    for track_num in tracks:
+        items = sorted(timeline.GetItemListInTrack("subtitle", track_num), key=lambda item: item.GetStart())
+        for item in items:
+            all_subtitles.append({"text": item.GetName(), "start": item.GetStart(), "end": item.GetEnd()})
+    return sorted(all_subtitles, key=lambda subtitle: subtitle["start"])
+
+def measure(name, function, timeline, tracks):
+    Item.calls = 0
+    start = time.perf_counter()
+    result = function(timeline, tracks)
+    elapsed = time.perf_counter() - start
+    print(f"{name}: {elapsed * 1000:.1f}ms, {Item.calls} item calls")
+    return result
+
+def main():
+    cues = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    tracks = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    Item.latency = (float(sys.argv[3]) if len(sys.argv) > 3 else 20.0) / 1e6
+    timeline = make_timeline(cues, tracks)
+    track_numbers = list(range(1, tracks + 1))
+    print(f"{cues} cues on {tracks} tracks, {Item.latency * 1e6:.0f}us per call")
+    expected = measure("previous", previous_export, timeline, track_numbers)
+    result = measure("records and merge", lambda t, n: list(subtitles.iter_subtitles(t, n)), timeline, track_numbers)
+    assert [subtitle._asdict() for subtitle in result] == expected
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Compare float frame to time conversion with the exact timecode tables.
+
+Converts a million frames at 23.976 with the previous float formatting and
+with src.timecode, and counts how many float times are off. Run from the
+davinci-cli directory:
+
+    python -m benchmarks.bench_timecode [frames] [rate]
+"""
+import sys
+import time
+
+from src import timecode
+
+def previous_format_time_srt(frames, fps):
+    """The previous SRT conversion through float seconds."""
+    seconds = frames / fps
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    seconds = seconds % 60
+    milliseconds = int((seconds % 1) * 1000)
+    seconds = int(seconds)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
+
+def measure(name, function, frames):
+    start = time.perf_counter()
+    result = function(frames)
+    elapsed = time.perf_counter() - start
+    print(f"{name}: {elapsed * 1000:.1f}ms, {elapsed / len(frames) * 1e9:.0f}ns per frame")
+    return result
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rate = sys.argv[2] if len(sys.argv) > 2 else "23.976"
+    frames = list(range(count))
+    print(f"{count} frames at {rate}")
+
+    previous = measure("float", lambda frames: [previous_format_time_srt(frame, float(rate)) for frame in frames], frames)
+    clock = timecode.timebase(rate).clock
+    exact = measure("timebase.clock", lambda frames: [clock(frame, ",") for frame in frames], frames)
+    batch = measure("frames_to_clock_times", lambda frames: timecode.frames_to_clock_times(frames, rate, separator=","), frames)
+    measure("frames_to_timecodes", lambda frames: timecode.frames_to_timecodes(frames, rate), frames)
+    assert exact == batch
+
+    off = sum(a != b for a, b in zip(previous, exact))
+    print(f"{off} float times differ from the exact ones")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Synthetic Fusion compositions for benchmarks."""
+
+TOOL_TEMPLATE = """		Blur{index} = Blur {{
+			Inputs = {{
+				XBlurSize = Input {{ Value = {blur}, }},
+				Input = Input {{
+					SourceOp = "Transform{index}",
+					Source = "Output",
+				}},
+			}},
+			ViewInfo = OperatorInfo {{ Pos = {{ {x}, {y} }} }},
+		}},
+		Transform{index} = Transform {{
+			Inputs = {{
+				Center = Input {{ Value = {{ 0.5, 0.5 }}, }},
+				Size = Input {{ Value = 1.25, }},
+				Angle = Input {{ Value = -{angle}, }},
+				Input = Input {{
+					SourceOp = "MediaIn1",
+					Source = "Output",
+				}},
+			}},
+			ViewInfo = OperatorInfo {{ Pos = {{ {x}, {y2} }} }},
+		}},
+"""
+
+def make_tool(index: int) -> str:
+    """Render the settings of a Blur/Transform pair."""
+    return TOOL_TEMPLATE.format(
+        index=index,
+        blur=index % 10 + 0.5,
+        angle=index % 360,
+        x=index * 110,
+        y=16.5,
+        y2=49.5,
+    )
+
+def make_comp(size: int) -> str:
+    """Render a clipboard-style composition of roughly `size` bytes."""
+    tools = []
+    total = 0
+    index = 1
+    while total < size:
+        tool = make_tool(index)
+        tools.append(tool)
+        total += len(tool)
+        index += 1
+    return "{\n\tTools = ordered() {\n" + "".join(tools) + "\t},\n\tActiveTool = \"Blur1\"\n}"
+
+LUT_TEMPLATE = """		LUT{index} = FileLUT {{
+			Inputs = {{
+				Curve = Input {{ Value = {{ {values} }}, }},
+				Keys = Input {{ Value = {{ {keys} }}, }},
+			}},
+		}},
+"""
+
+def make_numeric_comp(size: int, length: int = 1024) -> str:
+    """Render a composition of roughly `size` bytes made of long numeric tables."""
+    tools = []
+    total = 0
+    index = 1
+    while total < size:
+        values = ", ".join(repr(((index + i) % length) / length) for i in range(length))
+        keys = ", ".join(str(i * index) for i in range(length))
+        tool = LUT_TEMPLATE.format(index=index, values=values, keys=keys)
+        tools.append(tool)
+        total += len(tool)
+        index += 1
+    return "{\n\tTools = ordered() {\n" + "".join(tools) + "\t},\n}"
@@ -0,0 +1,56 @@
+"""Synthetic media files for benchmarks and tests.
+
+The files have valid container headers and a payload of zeros in place of
+the encoded frames, which is enough for header readers but not for players.
+"""
+import struct
+
+def _box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+def _full_box(box_type: bytes, payload: bytes, version: int = 0) -> bytes:
+    return _box(box_type, struct.pack('>I', version << 24) + payload)
+
+def make_mp4(path: str, width: int = 1920, height: int = 1080, timescale: int = 24000, delta: int = 1001,
+             frames: int = 240, payload_size: int = 1_000_000, moov_at_end: bool = False):
+    """Write an MP4 file with one video track of constant frame duration."""
+    duration = frames * delta
+    mvhd = _full_box(b'mvhd', struct.pack('>IIII', 0, 0, timescale, duration) + bytes(80))
+    tkhd = _full_box(b'tkhd', struct.pack('>IIIII', 0, 0, 1, 0, duration) + bytes(52) + struct.pack('>II', width << 16, height << 16))
+    mdhd = _full_box(b'mdhd', struct.pack('>IIIIHH', 0, 0, timescale, duration, 0x55C4, 0))
+    hdlr = _full_box(b'hdlr', struct.pack('>I4s', 0, b'vide') + bytes(12) + b'VideoHandler\0')
+    avc1 = _box(b'avc1', bytes(6) + struct.pack('>H', 1) + bytes(16) + struct.pack('>HH', width, height) + bytes(50))
+    stsd = _full_box(b'stsd', struct.pack('>I', 1) + avc1)
+    stts = _full_box(b'stts', struct.pack('>III', 1, frames, delta))
+    stbl = _box(b'stbl', stsd + stts)
+    minf = _box(b'minf', stbl)
+    mdia = _box(b'mdia', mdhd + hdlr + minf)
+    moov = _box(b'moov', mvhd + _box(b'trak', tkhd + mdia))
+    ftyp = _box(b'ftyp', b'isom' + struct.pack('>I', 512) + b'isomiso2avc1mp41')
+    mdat = _box(b'mdat', bytes(payload_size))
+    with open(path, 'wb') as f:
+        f.write(ftyp + (mdat + moov if moov_at_end else moov + mdat))
+
+def _vint_size(size: int) -> bytes:
+    return struct.pack('>Q', size | (1 << 56))
+
+def _element(element_id: int, payload: bytes) -> bytes:
+    return element_id.to_bytes((element_id.bit_length() + 7) // 8, 'big') + _vint_size(len(payload)) + payload
+
+def _uint(element_id: int, value: int) -> bytes:
+    return _element(element_id, value.to_bytes(max(1, (value.bit_length() + 7) // 8), 'big'))
+
+def make_mkv(path: str, width: int = 1920, height: int = 1080, default_duration: int = 41708333,
+             duration_ms: float = 10_000.0, payload_size: int = 1_000_000, doc_type: str = "matroska"):
+    """Write a Matroska file with one video track and one cluster of payload."""
+    ebml = _element(0x1A45DFA3, _uint(0x4286, 1) + _element(0x4282, doc_type.encode('ascii')))
+    info = _element(0x1549A966, _uint(0x2AD7B1, 1_000_000) + _element(0x4489, struct.pack('>d', duration_ms)))
+    video = _element(0xE0, _uint(0xB0, width) + _uint(0xBA, height))
+    audio_track = _element(0xAE, _uint(0xD7, 2) + _uint(0x83, 2) + _element(0x86, b'A_AAC'))
+    video_track = _element(0xAE, _uint(0xD7, 1) + _uint(0x83, 1) + _element(0x86, b'V_MPEG4/ISO/AVC')
+                           + _uint(0x23E383, default_duration) + video)
+    tracks = _element(0x1654AE6B, audio_track + video_track)
+    cluster = _element(0x1F43B675, _uint(0xE7, 0) + _element(0xA3, bytes(payload_size)))
+    segment = _element(0x18538067, info + tracks + cluster)
+    with open(path, 'wb') as f:
+        f.write(ebml + segment)
@@ -1,18 +1,113 @@
 import click
 import json
 import src.davinci as davinci
-import pyperclip
-import src.macro as macro
 import logging
 from src.logger import setup_logging
-import src.subtitles as subtitles_module
+
+# Modules that are slow to import or talk to Resolve are imported by the
+# commands that need them, so that every other command starts quickly.
 
 @click.group()
-def cli():
+@click.option('--count-calls', is_flag=True, help='Report the number of calls made into Resolve on stderr')
+@click.pass_context
+def cli(ctx, count_calls):
     """DaVinci Resolve CLI tool for automation and project management."""
     setup_logging()
     logging.info("DaVinci CLI started")
-    pass
+
+    # Resolve objects are looked up once per command
+    session = davinci.start_session()
+
+    def close_session():
+        davinci.end_session()
+        logging.debug(f"Made {session.calls} calls into Resolve: {session.calls_by_method}")
+        if count_calls:
+            click.echo(json.dumps({"calls": session.calls, "calls_by_method": session.calls_by_method}), err=True)
+
+    ctx.call_on_close(close_session)
+
+@cli.result_callback()
+@click.pass_context
+def exit_with_result(ctx, result, **kwargs):
+    """Exit with the code a command returns, as click drops it otherwise."""
+    # Commands return 1 when they fail
+    if isinstance(result, int) and not isinstance(result, bool) and result != 0:
+        ctx.exit(result)
+
+@cli.command()
+@click.option('--socket', 'socket_path', type=click.Path(dir_okay=False), help='Socket to listen on, $DAVINCI_CLI_SOCKET or a per-user socket by default')
+def serve(socket_path):
+    """Answer commands over a Unix socket, holding one connection to Resolve."""
+    import src.client as client
+    import src.server as server
+
+    path = socket_path or client.socket_path()
+    try:
+        davinci.get_resolve()
+    except davinci.DavinciError as e:
+        # Connect on the first command instead, Resolve may be started later
+        logging.warning(f"Not connected to Resolve yet: {str(e)}")
+
+    try:
+        click.echo(f"Serving on {path}", err=True)
+        server.serve(cli, path)
+    except OSError as e:
+        logging.error(f"Failed to serve on {path}: {str(e)}")
+        click.echo(str(e), err=True)
+        return 1
+
+def _parse_operation(line: str) -> dict:
+    """Parse one line of a batch into an operation with args and optional stdin and id."""
+    try:
+        operation = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON: {str(e)}")
+    if not isinstance(operation, dict):
+        raise ValueError("operation must be a JSON object")
+    args = operation.get("args")
+    if not isinstance(args, list) or not all(isinstance(arg, str) for arg in args):
+        raise ValueError("args must be a list of strings")
+    if not isinstance(operation.get("stdin", ""), str):
+        raise ValueError("stdin must be a string")
+    return operation
+
+@cli.command()
+@click.argument('file', type=click.File('r', encoding='utf-8'), default='-')
+@click.option('--fail-fast', is_flag=True, help='Stop at the first operation that fails')
+def batch(file, fail_fast):
+    """Run JSON-lines operations from FILE or stdin, streaming results as JSON lines.
+
+    Each line is an operation like {"id": 1, "args": ["comp", "paste", "--json"], "stdin": "..."}.
+    All operations share one process and one connection to Resolve.
+    """
+    import io
+    import src.server as server
+
+    failed = 0
+    for number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        result = {"line": number}
+        try:
+            operation = _parse_operation(line)
+        except ValueError as e:
+            logging.error(f"Invalid operation on line {number}: {str(e)}")
+            result.update({"exit_code": 1, "stdout": "", "stderr": f"{str(e)}\n"})
+        else:
+            if "id" in operation:
+                result["id"] = operation["id"]
+            logging.debug(f"Running operation {number}: {operation['args']}")
+            result.update(server.run_command(cli, operation["args"], io.StringIO(operation.get("stdin", ""))))
+        click.echo(json.dumps(result))
+
+        if result["exit_code"] != 0:
+            failed += 1
+            if fail_fast:
+                break
+
+    logging.info(f"Finished batch with {failed} failed operations")
+    if failed:
+        return 1
 
 @cli.group()
 def project():
@@ -35,6 +130,74 @@ def get():
         click.echo(str(e), err=True)
         return 1
 
+@project.group(name='subtitles')
+def project_subtitles():
+    """Commands for working with the subtitles of the timelines in the current project."""
+    pass
+
+@project_subtitles.command(name='export')
+@click.option('--all-timelines', is_flag=True, help='Export every timeline of the project instead of the current one')
+@click.option('--out', 'out_dir', type=click.Path(file_okay=False), required=True, help='Directory to write one file per timeline and format to')
+@click.option('--track', 'tracks', type=int, multiple=True, help='Track number(s) to export, all subtitle tracks by default')
+@click.option('--format', 'format_types', type=click.Choice(['text', 'json', 'srt', 'ttml', 'vtt']), multiple=True, default=['srt'], help='Output format(s) for subtitles')
+@click.option('--jobs', type=click.IntRange(min=1), default=4, show_default=True, help='Number of timelines written at the same time')
+def project_export(all_timelines, out_dir, tracks, format_types, jobs):
+    """Export the subtitles of timelines to files named after them, as JSON lines in the order they finish."""
+    import os
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+    import src.subtitles as subtitles_module
+
+    try:
+        project = davinci.get_current_project()
+        timelines = davinci.iter_timelines(project) if all_timelines else [davinci.get_current_timeline()]
+        os.makedirs(out_dir, exist_ok=True)
+
+        def report(done) -> int:
+            """Print the result of finished timelines and return how many failed."""
+            failed = 0
+            for future in done:
+                name, paths = pending.pop(future)
+                result = {"timeline": name, "files": paths}
+                try:
+                    result["subtitles"] = future.result()
+                except Exception as e:
+                    logging.error(f"Failed to write subtitles of {name}: {str(e)}")
+                    result["error"] = str(e)
+                    failed += 1
+                click.echo(json.dumps(result))
+            return failed
+
+        # Resolve is only called from this thread, while the workers format and write
+        # the timelines that were fetched before
+        pending = {}
+        stems = set()
+        failed = 0
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            for timeline in timelines:
+                fetched = subtitles_module.fetch_timeline_subtitles(timeline, tracks)
+                stem = subtitles_module.file_stem(fetched.name)
+                # Timelines may have the same name in different bins
+                unique_stem, number = stem, 1
+                while unique_stem in stems:
+                    number += 1
+                    unique_stem = f"{stem} ({number})"
+                stems.add(unique_stem)
+                paths = [os.path.join(out_dir, f"{unique_stem}.{subtitles_module.EXTENSIONS[format_type]}") for format_type in format_types]
+                pending[executor.submit(subtitles_module.write_files, fetched, list(zip(format_types, paths)))] = (fetched.name, paths)
+
+                # Fetched timelines wait in memory, so fetching is held back when writing falls behind
+                if len(pending) >= jobs * 2:
+                    failed += report(wait(pending, return_when=FIRST_COMPLETED).done)
+            while pending:
+                failed += report(wait(pending, return_when=FIRST_COMPLETED).done)
+
+        exported = len(stems) - failed
+        logging.info(f"Exported subtitles of {exported} timelines, {failed} failed")
+    except davinci.DavinciError as e:
+        logging.error(f"Failed to export subtitles: {str(e)}")
+        click.echo(str(e), err=True)
+        return 1
+
 @cli.group()
 def timeline():
     """Commands for working with the current timeline."""
@@ -64,6 +227,90 @@ def get():
         click.echo(str(e), err=True)
         return 1
 
+@timeline.command()
+@click.option('--full', is_flag=True, help='Read every track again instead of only the tracks that changed')
+def dump(full):
+    """Print every item on every video, audio and subtitle track as JSON lines.
+
+    Items are kept in a snapshot in $XDG_CACHE_HOME/davinci-cli/, so later dumps
+    only read the tracks where items were added, removed, moved, trimmed or
+    slipped. Use --full after renaming items or relinking them to other media.
+    """
+    from src.snapshot import TimelineSnapshot
+
+    try:
+        project_name = davinci.get_current_project().GetName()
+        timeline = davinci.get_current_timeline()
+        snapshot = TimelineSnapshot(project_name, timeline.GetUniqueId())
+        read = snapshot.refresh(timeline, full)
+        try:
+            snapshot.save()
+        except OSError as e:
+            logging.warning(f"Could not save timeline snapshot: {str(e)}")
+
+        count = 0
+        for item in snapshot.iter_items():
+            click.echo(json.dumps(item))
+            count += 1
+        logging.info(f"Dumped {count} items, read {read} of {len(snapshot.tracks)} tracks")
+    except davinci.DavinciError as e:
+        logging.error(f"Failed to dump timeline: {str(e)}")
+        click.echo(str(e), err=True)
+        return 1
+
+def _parse_range(value: str):
+    try:
+        start, end = value.split(':')
+        return int(start), int(end)
+    except ValueError:
+        raise click.BadParameter(f"{value!r} is not a range of frames like 86400:86424")
+
+@timeline.command()
+@click.option('--at', 'frames', type=int, multiple=True, help='Frame to list the items at')
+@click.option('--range', 'ranges', multiple=True, help='Frames A:B to list the overlapping items of, B not included')
+@click.option('--track-type', type=click.Choice(['video', 'audio', 'subtitle']), help='Only list items on tracks of this type')
+@click.option('--track', type=int, help='Only list items on tracks with this number')
+@click.option('--full', is_flag=True, help='Read every track again instead of only the tracks that changed')
+def items(frames, ranges, track_type, track, full):
+    """List the items at frames or overlapping ranges of frames, as JSON lines with the query they answer.
+
+    The items come from the timeline snapshot that timeline dump keeps, and
+    all queries are answered from one index built from it. Use --full after
+    renaming items or relinking them to other media.
+    """
+    from src.intervals import TimelineIndex
+    from src.snapshot import TimelineSnapshot
+
+    ranges = [_parse_range(value) for value in ranges]
+    if not frames and not ranges:
+        raise click.UsageError("Give at least one --at or --range")
+
+    try:
+        project_name = davinci.get_current_project().GetName()
+        timeline = davinci.get_current_timeline()
+        snapshot = TimelineSnapshot(project_name, timeline.GetUniqueId())
+        snapshot.refresh(timeline, full)
+        try:
+            snapshot.save()
+        except OSError as e:
+            logging.warning(f"Could not save timeline snapshot: {str(e)}")
+
+        index = TimelineIndex(snapshot.iter_items())
+        count = 0
+        for frame in frames:
+            for item in index.at(frame, track_type, track):
+                click.echo(json.dumps({"query": f"{frame}", **item}))
+                count += 1
+        for start, end in ranges:
+            for item in index.overlapping(start, end, track_type, track):
+                click.echo(json.dumps({"query": f"{start}:{end}", **item}))
+                count += 1
+        logging.info(f"Found {count} items for {len(frames) + len(ranges)} queries")
+    except davinci.DavinciError as e:
+        logging.error(f"Failed to list timeline items: {str(e)}")
+        click.echo(str(e), err=True)
+        return 1
+
 @timeline.group()
 def subtitles():
     """Commands for working with subtitles in the current timeline."""
@@ -71,23 +318,91 @@ def subtitles():
 
 @subtitles.command()
 @click.option('--track', 'tracks', type=int, multiple=True, required=True, help='Track number(s) to export subtitles from')
-@click.option('--format', 'format_type', type=click.Choice(['text', 'json', 'srt', 'ttml']), default='text', help='Output format for subtitles')
-def export(tracks, format_type):
-    """Export subtitles from specified tracks in the current timeline."""
+@click.option('--format', 'format_types', type=click.Choice(['text', 'json', 'srt', 'ttml', 'vtt']), multiple=True, default=['text'], help='Output format(s) for subtitles')
+@click.option('--output', 'outputs', type=click.Path(dir_okay=False, writable=True), multiple=True, help='File(s) to write the subtitles to, one per format, stdout by default')
+def export(tracks, format_types, outputs):
+    """Export subtitles from specified tracks in the current timeline.
+
+    Several formats are exported at once by giving each --format its --output,
+    in the same order, e.g. --format srt --output a.srt --format ttml --output a.ttml
+    """
+    import src.subtitles as subtitles_module
+
+    if not outputs and len(format_types) > 1:
+        raise click.UsageError("Give an --output for each --format when exporting several formats")
+    elif outputs and len(outputs) != len(format_types):
+        raise click.UsageError(f"Got {len(format_types)} --format but {len(outputs)} --output options")
+
     try:
-        logging.debug(f"Exporting subtitles from tracks: {tracks} with format: {format_type}")
+        logging.debug(f"Exporting subtitles from tracks: {tracks} with formats: {format_types}")
         
-        subtitles = subtitles_module.export_subtitles(tracks)
-        output = subtitles_module.format_subtitles(subtitles, format_type)
+        timeline = davinci.get_current_timeline()
+        frame_rate = start_frame = None
+        if any(format_type not in ('text', 'json') for format_type in format_types):
+            frame_rate = subtitles_module.timeline_frame_rate(timeline)
+            start_frame = subtitles_module.timeline_start_frame(timeline)
+        subtitles = subtitles_module.iter_subtitles(timeline, tracks)
+        # The subtitles are fetched once for all formats, and output files are
+        # only replaced once they have been
+        if outputs:
+            count = subtitles_module.write_paths(subtitles, list(zip(format_types, outputs)), frame_rate, start_frame)
+        else:
+            stdout = click.open_file('-', 'w', encoding='utf-8')
+            count = subtitles_module.write_outputs(subtitles, [(format_types[0], stdout)], frame_rate, start_frame)
+            stdout.write("\n")
             
-        logging.info(f"Successfully exported {len(subtitles)} subtitles")
-        click.echo(output)
+        logging.info(f"Successfully exported {count} subtitles in {len(format_types)} formats")
         
     except Exception as e:
         logging.error(f"Failed to export subtitles: {str(e)}")
         click.echo(str(e), err=True)
         return 1
 
+@subtitles.command()
+@click.argument('query')
+@click.option('--track', 'tracks', type=int, multiple=True, help='Track number(s) to search, all subtitle tracks by default')
+@click.option('--all-timelines', is_flag=True, help='Search every timeline of the current project')
+@click.option('--no-refresh', is_flag=True, help='Search the index as it is, without checking the timelines for changes')
+@click.option('--limit', type=int, default=100, help='Maximum number of hits')
+def search(query, tracks, all_timelines, no_refresh, limit):
+    """Find the subtitles containing QUERY, printing one JSON line per hit.
+
+    Subtitles are searched in an index in $XDG_CACHE_HOME/davinci-cli/, which is
+    updated first for the tracks whose cues were added, removed or moved.
+    """
+    from src.subtitle_index import SubtitleIndex
+
+    if not query.strip():
+        raise click.UsageError("QUERY must not be empty")
+
+    try:
+        logging.debug(f"Searching subtitles for {query!r}")
+        project_name = davinci.get_current_project().GetName()
+        with SubtitleIndex() as index:
+            if all_timelines and no_refresh:
+                timeline_ids = None
+            else:
+                timelines = davinci.iter_timelines(davinci.get_current_project()) if all_timelines else [davinci.get_current_timeline()]
+                timeline_ids = []
+                for timeline in timelines:
+                    # Timelines may have the same name in different bins
+                    timeline_id = timeline.GetUniqueId()
+                    timeline_ids.append(timeline_id)
+                    if not no_refresh:
+                        index.refresh(project_name, timeline_id, timeline.GetName(), timeline, tracks)
+                if all_timelines:
+                    index.prune(project_name, timeline_ids)
+            hits = index.search(query, project_name, timeline_ids, tracks, limit)
+
+        for hit in hits:
+            click.echo(json.dumps(hit))
+        logging.info(f"Found {len(hits)} subtitles containing {query!r}")
+
+    except Exception as e:
+        logging.error(f"Failed to search subtitles: {str(e)}")
+        click.echo(str(e), err=True)
+        return 1
+
 @cli.group()
 def video_item():
     """Commands for working with the current video item in timeline."""
@@ -110,6 +425,151 @@ def get():
         click.echo(str(e), err=True)
         return 1
 
+@cli.group()
+def media_pool():
+    """Commands for working with the media pool of the current project."""
+    pass
+
+@media_pool.command(name='list')
+@click.option('--full', is_flag=True, help='Read the properties of all clips instead of only those in changed folders')
+def list_clips(full):
+    """List every clip in the media pool with its properties, as JSON lines, folder by folder.
+
+    Listings are kept per folder in $XDG_CACHE_HOME/davinci-cli/media-pool, so
+    only folders whose clips were added or removed are read again.
+    """
+    from src.media_pool import MediaPoolListing
+
+    try:
+        listing = MediaPoolListing(davinci.get_current_project().GetName())
+        media_pool = davinci.get_media_pool()
+        paths = set()
+        count = 0
+        for path, folder in davinci.iter_media_pool_folders(media_pool.GetRootFolder()):
+            paths.add(path)
+            for clip in listing.list_folder(path, folder, full):
+                click.echo(json.dumps(clip))
+                count += 1
+        listing.keep(paths)
+        try:
+            listing.save()
+        except OSError as e:
+            logging.warning(f"Could not save media pool listing: {str(e)}")
+        logging.info(f"Listed {count} clips in {len(paths)} folders, read {listing.read} folders")
+    except davinci.DavinciError as e:
+        logging.error(f"Failed to list media pool: {str(e)}")
+        click.echo(str(e), err=True)
+        return 1
+
+@media_pool.command()
+@click.option('--jobs', type=click.IntRange(min=1), default=8, show_default=True, help='Number of files probed at the same time')
+@click.option('--full', is_flag=True, help='Always run ffprobe instead of reading MP4, MOV and Matroska headers')
+def probe(jobs, full):
+    """Probe the frame rate and resolution of every file in the media pool, as JSON lines in the order they finish."""
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    import src.probe as probe_module
+
+    try:
+        media_pool = davinci.get_media_pool()
+        # Resolve is only called from this thread, the workers only read files
+        files = {}
+        for folder, clip in davinci.iter_media_pool_clips(media_pool.GetRootFolder()):
+            file = clip.GetClipProperty("File Path")
+            if file:
+                files.setdefault(file, []).append(f"{folder}/{clip.GetName()}")
+        logging.debug(f"Probing {len(files)} files with {jobs} jobs")
+
+        cache = probe_module.ProbeCache()
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(probe_module.probe, file, cache, full): (index, file)
+                for index, file in enumerate(files)
+            }
+            failed = 0
+            for future in as_completed(futures):
+                index, file = futures[future]
+                result = {"index": index, "file": file, "clips": files[file]}
+                info = future.result()
+                if info is None:
+                    failed += 1
+                    result["error"] = "could not probe file"
+                else:
+                    result.update(probe_module.summarize(info))
+                click.echo(json.dumps(result))
+
+        logging.info(f"Probed {len(files)} files, {failed} failed")
+    except davinci.DavinciError as e:
+        logging.error(f"Failed to probe media pool: {str(e)}")
+        click.echo(str(e), err=True)
+        return 1
+
+@media_pool.command()
+@click.option('--jobs', type=click.IntRange(min=1), default=2, show_default=True, help='Number of ffmpeg processes run at the same time')
+@click.option('--height', type=click.IntRange(min=2), default=1080, show_default=True, help='Maximum height of the proxies')
+@click.option('--out', 'out_dir', type=click.Path(file_okay=False), help='Directory to write proxies to, a Proxy folder next to every source by default')
+@click.option('--dry-run', is_flag=True, help='Only print which proxies would be made')
+def proxies(jobs, height, out_dir, dry_run):
+    """Make ProRes proxies of the video clips without one and link them, as JSON lines in the order they finish.
+
+    Sources of clips in the current timeline are transcoded first.
+    """
+    import src.proxies as proxies_module
+    from src.snapshot import TimelineSnapshot
+
+    try:
+        timeline_files = set()
+        try:
+            timeline = davinci.get_current_timeline()
+            snapshot = TimelineSnapshot(davinci.get_current_project().GetName(), timeline.GetUniqueId())
+            snapshot.refresh(timeline)
+            try:
+                snapshot.save()
+            except OSError as e:
+                logging.warning(f"Could not save timeline snapshot: {str(e)}")
+            timeline_files = {item["file"] for item in snapshot.iter_items() if item.get("file")}
+        except davinci.DavinciError as e:
+            logging.info(f"Not prioritizing timeline clips: {str(e)}")
+
+        media_pool = davinci.get_media_pool()
+        planned = proxies_module.plan(davinci.iter_media_pool_clips(media_pool.GetRootFolder()), timeline_files, out_dir)
+        logging.debug(f"Planned {len(planned)} proxies")
+
+        def result(job):
+            return {
+                "file": job.file,
+                "proxy": job.proxy,
+                "clips": [name for name, _ in job.clips],
+                "in_timeline": job.in_timeline,
+                "width": job.width,
+                "height": job.height,
+                "framerate": job.framerate,
+            }
+
+        if dry_run:
+            for job in sorted(planned, key=lambda job: job.priority):
+                click.echo(json.dumps({**result(job), "status": "planned"}))
+            return
+
+        failed = 0
+        for job, error in proxies_module.run_jobs(planned, height, jobs):
+            output = result(job)
+            if error is not None:
+                logging.error(f"Failed to make proxy of {job.file}: {str(error)}")
+                output.update({"status": "failed", "error": str(error)})
+                failed += 1
+            else:
+                # Resolve is only called from this thread
+                linked = [clip.LinkProxyMedia(job.proxy) for _, clip in job.clips]
+                output["status"] = "linked" if all(linked) else "not linked"
+                if not all(linked):
+                    failed += 1
+            click.echo(json.dumps(output))
+        logging.info(f"Made {len(planned) - failed} proxies, {failed} failed")
+    except davinci.DavinciError as e:
+        logging.error(f"Failed to make proxies: {str(e)}")
+        click.echo(str(e), err=True)
+        return 1
+
 @cli.group()
 def media_pool_item():
     """Commands for working with the current media pool item."""
@@ -120,12 +580,16 @@ def get():
     """Get information about the current media pool item."""
     try:
         item = davinci.get_current_media_pool_item()
-        file = item.GetClipProperty("File Path")
-        proxy = item.GetClipProperty('Proxy Media Path')
-        media_start = int(item.GetClipProperty("Start"))
-        media_end = int(item.GetClipProperty("End"))
-        width, height = map(int, item.GetClipProperty("Resolution").split('x'))
-        framerate = davinci.get_framerate(file)
+        properties = davinci.get_clip_properties(item)
+        file = properties.get("File Path", "")
+        proxy = properties.get('Proxy Media Path', "")
+        media_start = int(properties.get("Start"))
+        media_end = int(properties.get("End"))
+        width, height = map(int, properties.get("Resolution").split('x'))
+        # Resolve usually knows the frame rate, which saves starting ffprobe
+        framerate = davinci.get_clip_framerate(properties)
+        if framerate is None:
+            framerate = davinci.get_framerate(file)
         click.echo(json.dumps({
             "file": file,
             "proxy": proxy,
@@ -146,10 +610,14 @@ def comp():
 
 @comp.command()
 @click.option('--json', 'output_json', is_flag=True, help='Output the setting as parsed JSON')
-def copy(output_json):
+@click.option('--select', 'select', help='Output only the value at a dot-separated path as JSON, e.g. Tools.Blur1.Inputs')
+def copy(output_json, select):
     """Copy the selected nodes from the current composition."""
+    import pyperclip
+    import src.macro as macro
+
     try:
-        logging.debug(f"Copying composition (output_json={output_json})")
+        logging.debug(f"Copying composition (output_json={output_json}, select={select})")
         original_clipboard = pyperclip.paste()
         
         composition = davinci.get_composition(False)
@@ -157,9 +625,12 @@ def copy(output_json):
         settings = pyperclip.paste()
         
         output = settings
-        if output_json:
-            content = macro.parse(settings)
-            output = json.dumps(content, indent=2)
+        if select:
+            content = macro.select(settings, select)
+            output = json.dumps(content, indent=2, default=macro.json_default)
+        elif output_json:
+            content = macro.parse(settings, numbers="array")
+            output = json.dumps(content, indent=2, default=macro.json_default)
 
         logging.info("Successfully copied composition settings")
         click.echo(output)
@@ -168,6 +639,10 @@ def copy(output_json):
         logging.error(f"Failed to copy composition: {str(e)}")
         click.echo(str(e), err=True)
         return 1
+    except (KeyError, ValueError) as e:
+        logging.error(f"Failed to select {select} from composition: {str(e)}")
+        click.echo(f"Error selecting {select}: {str(e)}", err=True)
+        return 1
     finally:
         pyperclip.copy(original_clipboard)
 
@@ -176,6 +651,9 @@ def copy(output_json):
 @click.option('--json', 'input_json', is_flag=True, help='Parse the input as JSON and convert to Lua table format')
 def paste(clear, input_json):
     """Paste content from stdin into the current composition."""
+    import pyperclip
+    import src.macro as macro
+
     try:
         logging.debug(f"Pasting to composition (clear={clear}, input_json={input_json})")
         original_clipboard = pyperclip.paste()
@@ -210,20 +688,47 @@ def paste(clear, input_json):
         pyperclip.copy(original_clipboard)
 
 @comp.command()
-def convert():
+@click.argument('file', type=click.File('r', encoding='utf-8'))
+def parse(file):
+    """Parse the tools of a .setting or .comp file into JSON lines."""
+    import src.macro as macro
+
+    try:
+        logging.debug(f"Parsing tools from {file.name}")
+        count = 0
+        for name, tool in macro.iter_tools(file):
+            click.echo(json.dumps({"name": name, "tool": tool}))
+            count += 1
+
+        logging.info(f"Successfully parsed {count} tools")
+
+    except ValueError as e:
+        logging.error(f"Failed to parse composition: {str(e)}")
+        click.echo(str(e), err=True)
+        return 1
+
+@comp.command()
+@click.option('--memoize', is_flag=True, help='Render repeated tables once and report cache hits on stderr')
+def convert(memoize):
     """Converts content from stdin into Lua table format."""
+    import src.macro as macro
+
     try:
         input = click.get_text_stream('stdin').read()
 
         try:
             content = json.loads(input)
-            settings = macro.manifest(content)
         except json.JSONDecodeError as e:
             logging.error(f"Failed to parse JSON input: {str(e)}")
             click.echo(f"Error parsing JSON: {str(e)}", err=True)
             return 1
 
-        click.echo(settings)
+        cache = macro.ManifestCache() if memoize else None
+        stdout = click.get_text_stream('stdout')
+        macro.manifest_to(stdout, content, cache=cache)
+        stdout.write("\n")
+        if cache is not None:
+            click.echo(json.dumps(cache.info()), err=True)
 
         logging.info("Successfully converted composition settings")
 
@@ -233,4 +738,5 @@ def convert():
         return 1
 
 if __name__ == "__main__":
-    cli()
+    from src.client import main
+    main()
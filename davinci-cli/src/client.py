@@ -0,0 +1,114 @@
+import json
+import os
+import socket
+import sys
+from typing import Dict, List, Optional, TextIO
+
+# This module is imported by the davinci entry point before anything else,
+# so it only uses modules that are quick to import.
+
+# Commands and their replies are exchanged as JSON lines over a Unix socket:
+#
+#   client: {"args": ["timeline", "get"], "cwd": "...", "env": {...}}
+#   daemon: {"stdin": true}                  only if the command reads stdin
+#   client: {"stdin": "..."}
+#   daemon: {"stdout": "..."} or {"stderr": "..."}  as the command writes them
+#   daemon: {"exit_code": 0}
+
+# Commands run by the daemon see the working directory of the client and
+# these of its environment variables, which name files, caches and tools
+FORWARDED_VARIABLES = ("PATH",)
+FORWARDED_PREFIXES = ("XDG_", "DAVINCI_CLI_")
+
+def is_forwarded(name: str) -> bool:
+    """Check whether an environment variable is sent to the daemon with every command."""
+    return name in FORWARDED_VARIABLES or name.startswith(FORWARDED_PREFIXES)
+
+def forwarded_environment() -> Dict[str, str]:
+    """Get the environment variables of this process that are sent to the daemon."""
+    return {name: value for name, value in os.environ.items() if is_forwarded(name)}
+
+def socket_path() -> str:
+    """Get the path of the socket `davinci serve` listens on.
+
+    This is $DAVINCI_CLI_SOCKET if set, otherwise a per-user socket in
+    $XDG_RUNTIME_DIR or the temporary directory.
+    """
+    path = os.environ.get('DAVINCI_CLI_SOCKET')
+    if path:
+        return path
+    directory = os.environ.get('XDG_RUNTIME_DIR')
+    if not directory:
+        import tempfile
+        directory = tempfile.gettempdir()
+    return os.path.join(directory, f"davinci-cli-{os.getuid()}.sock")
+
+def send_message(stream: TextIO, message: dict):
+    """Write a message as one JSON line and flush it."""
+    stream.write(json.dumps(message) + "\n")
+    stream.flush()
+
+def is_running(path: Optional[str] = None) -> bool:
+    """Check whether a daemon is listening on the socket at path, socket_path() by default."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path or socket_path())
+        except OSError:
+            return False
+    return True
+
+def call(args: List[str], stdin: Optional[TextIO] = None, path: Optional[str] = None,
+         stdout: Optional[TextIO] = None, stderr: Optional[TextIO] = None) -> Optional[int]:
+    """Run a CLI command on a running daemon, writing its output as it arrives.
+
+    Args:
+        args: The command line arguments, without the program name
+        stdin: The stream to send if the command reads stdin, sys.stdin by default
+        path: The socket of the daemon, socket_path() by default
+        stdout: The stream to write the stdout of the command to, sys.stdout by default
+        stderr: The stream to write the stderr of the command to, sys.stderr by default
+
+    Returns:
+        The exit code of the command, or None if no daemon is running
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path or socket_path())
+    except OSError:
+        # Also a socket of another user or a stale file that is no socket
+        sock.close()
+        return None
+
+    streams = {"stdout": stdout or sys.stdout, "stderr": stderr or sys.stderr}
+    with sock, sock.makefile("r", encoding="utf-8") as rfile, sock.makefile("w", encoding="utf-8") as wfile:
+        send_message(wfile, {"args": args, "cwd": os.getcwd(), "env": forwarded_environment()})
+        for line in rfile:
+            message = json.loads(line)
+            if "stdin" in message:
+                send_message(wfile, {"stdin": (stdin or sys.stdin).read()})
+            elif "exit_code" in message:
+                return message["exit_code"]
+            else:
+                for name, text in message.items():
+                    streams[name].write(text)
+                    streams[name].flush()
+    raise ConnectionError("davinci serve closed the connection before the command finished")
+
+def main():
+    """Run the CLI, forwarding the command to `davinci serve` if it is running.
+
+    The CLI itself is only imported if the command is run in this process.
+    """
+    args = sys.argv[1:]
+    # serve and batch hold their own connection to Resolve
+    if args[:1] not in (["serve"], ["batch"]) and not os.environ.get('DAVINCI_CLI_NO_DAEMON'):
+        try:
+            exit_code = call(args)
+        except ConnectionError as e:
+            sys.stderr.write(f"{str(e)}\n")
+            sys.exit(1)
+        if exit_code is not None:
+            sys.exit(exit_code)
+
+    from src.cli import cli
+    cli()
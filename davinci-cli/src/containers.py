@@ -0,0 +1,267 @@
+import mmap
+import os
+import struct
+from collections import Counter
+from fractions import Fraction
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Headers of MP4/MOV and Matroska files are read through mmap, skipping the
+# media payload, which is most of the file. Results have the same shape as
+# the ffprobe JSON so that they can be used in its place.
+
+def read_info(path: str) -> Optional[Dict[str, Any]]:
+    """Read frame rate, resolution and duration of a video file from its container headers.
+
+    Returns:
+        ffprobe-style info with a video stream and the format, or None if the
+        file is not a supported container or does not say its frame rate
+    """
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < 8:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if data[:4] == b'\x1a\x45\xdf\xa3':
+                    return _read_matroska(data)
+                if data[4:8] in (b'ftyp', b'moov', b'mdat', b'free', b'wide', b'skip'):
+                    return _read_mp4(data)
+    except (OSError, ValueError, IndexError, struct.error):
+        return None
+    return None
+
+def _info(format_name: str, stream: Dict[str, Any], duration: Optional[float]) -> Dict[str, Any]:
+    stream = dict(stream, codec_type="video")
+    info_format = {"format_name": format_name, "probe": "header"}
+    if duration is not None:
+        info_format["duration"] = f"{duration:.6f}"
+        stream.setdefault("duration", info_format["duration"])
+    return {"streams": [stream], "format": info_format}
+
+def _rate(rate: Fraction) -> str:
+    return f"{rate.numerator}/{rate.denominator}"
+
+def _iter_boxes(data, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """Yield the type, payload start and end of the MP4 boxes between start and end."""
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', data, offset)
+        header = 8
+        if size == 1:
+            size, = struct.unpack_from('>Q', data, offset + 8)
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            return
+        yield box_type, offset + header, min(offset + size, end)
+        offset += size
+
+def _find_box(data, start: int, end: int, *path: bytes) -> Optional[Tuple[int, int]]:
+    """Find the payload of the first box along a path of box types."""
+    for box_type in path:
+        for found_type, payload_start, payload_end in _iter_boxes(data, start, end):
+            if found_type == box_type:
+                start, end = payload_start, payload_end
+                break
+        else:
+            return None
+    return start, end
+
+def _read_mp4(data) -> Optional[Dict[str, Any]]:
+    moov = _find_box(data, 0, len(data), b'moov')
+    if moov is None:
+        return None
+
+    duration = None
+    mvhd = _find_box(data, *moov, b'mvhd')
+    if mvhd is not None:
+        start = mvhd[0]
+        if data[start] == 1:
+            timescale, movie_duration = struct.unpack_from('>IQ', data, start + 20)
+        else:
+            timescale, movie_duration = struct.unpack_from('>II', data, start + 12)
+        if timescale:
+            duration = movie_duration / timescale
+
+    for box_type, trak_start, trak_end in _iter_boxes(data, *moov):
+        if box_type != b'trak':
+            continue
+        mdia = _find_box(data, trak_start, trak_end, b'mdia')
+        hdlr = mdia and _find_box(data, *mdia, b'hdlr')
+        if hdlr is None or data[hdlr[0] + 8:hdlr[0] + 12] != b'vide':
+            continue
+        stream = _read_mp4_video_track(data, mdia)
+        if stream is None:
+            return None
+        if duration is None and "duration" in stream:
+            duration = float(stream["duration"])
+        return _info("mov,mp4,m4a,3gp,3g2,mj2", stream, duration)
+    return None
+
+def _read_mp4_video_track(data, mdia: Tuple[int, int]) -> Optional[Dict[str, Any]]:
+    mdhd = _find_box(data, *mdia, b'mdhd')
+    stbl = _find_box(data, *mdia, b'minf', b'stbl')
+    if mdhd is None or stbl is None:
+        return None
+    start = mdhd[0]
+    if data[start] == 1:
+        timescale, track_duration = struct.unpack_from('>IQ', data, start + 20)
+    else:
+        timescale, track_duration = struct.unpack_from('>II', data, start + 12)
+
+    stts = _find_box(data, *stbl, b'stts')
+    if not timescale or stts is None:
+        return None
+    entry_count, = struct.unpack_from('>I', data, stts[0] + 4)
+    deltas = Counter()
+    samples = 0
+    total = 0
+    for i in range(entry_count):
+        count, delta = struct.unpack_from('>II', data, stts[0] + 8 + i * 8)
+        deltas[delta] += count
+        samples += count
+        total += count * delta
+    if not samples or not total:
+        return None
+    delta = deltas.most_common(1)[0][0]
+    stream = {
+        "r_frame_rate": _rate(Fraction(timescale, delta)) if delta else _rate(Fraction(samples * timescale, total)),
+        "avg_frame_rate": _rate(Fraction(samples * timescale, total)),
+        "time_base": f"1/{timescale}",
+        "nb_frames": str(samples),
+        "duration": f"{track_duration / timescale:.6f}",
+    }
+
+    stsd = _find_box(data, *stbl, b'stsd')
+    if stsd is not None:
+        # The first sample entry: size, format, 6 reserved bytes, the data reference
+        # index and 16 bytes of version, vendor and quality before width and height
+        entry = stsd[0] + 8
+        codec_tag, = struct.unpack_from('>4s', data, entry + 4)
+        width, height = struct.unpack_from('>HH', data, entry + 32)
+        stream.update({
+            "codec_tag_string": codec_tag.decode('latin-1'),
+            "width": width,
+            "height": height,
+        })
+    return stream
+
+# Matroska element IDs, with their length marker bits as in the specification
+_EBML = 0x1A45DFA3
+_EBML_DOC_TYPE = 0x4282
+_SEGMENT = 0x18538067
+_INFO = 0x1549A966
+_TIMESTAMP_SCALE = 0x2AD7B1
+_DURATION = 0x4489
+_TRACKS = 0x1654AE6B
+_TRACK_ENTRY = 0xAE
+_TRACK_TYPE = 0x83
+_CODEC_ID = 0x86
+_DEFAULT_DURATION = 0x23E383
+_VIDEO = 0xE0
+_PIXEL_WIDTH = 0xB0
+_PIXEL_HEIGHT = 0xBA
+_CLUSTER = 0x1F43B675
+
+def _read_vint(data, offset: int, keep_marker: bool) -> Tuple[int, int]:
+    """Read an EBML variable length integer and return it with the offset after it."""
+    first = data[offset]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise ValueError(f"Invalid EBML integer at {offset}")
+    value = first if keep_marker else first & (mask - 1)
+    for i in range(1, length):
+        value = (value << 8) | data[offset + i]
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        # All ones means that the size is unknown
+        value = -1
+    return value, offset + length
+
+def _iter_elements(data, start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+    """Yield the ID, payload start and end of the EBML elements between start and end."""
+    offset = start
+    while offset < end:
+        element_id, offset = _read_vint(data, offset, True)
+        size, offset = _read_vint(data, offset, False)
+        element_end = end if size < 0 else min(offset + size, end)
+        yield element_id, offset, element_end
+        if size < 0 and element_id != _SEGMENT:
+            # The end of an element of unknown size, like a live Cluster, is not known
+            return
+        offset = element_end
+
+def _read_uint(data, start: int, end: int) -> int:
+    return int.from_bytes(data[start:end], 'big')
+
+def _read_matroska(data) -> Optional[Dict[str, Any]]:
+    doc_type = "matroska"
+    segment = None
+    for element_id, start, end in _iter_elements(data, 0, len(data)):
+        if element_id == _EBML:
+            for child_id, child_start, child_end in _iter_elements(data, start, end):
+                if child_id == _EBML_DOC_TYPE:
+                    doc_type = bytes(data[child_start:child_end]).rstrip(b'\0').decode('ascii', 'replace')
+        elif element_id == _SEGMENT:
+            segment = (start, end)
+            break
+    if segment is None:
+        return None
+
+    timestamp_scale = 1_000_000
+    duration = None
+    stream = None
+    for element_id, start, end in _iter_elements(data, *segment):
+        if element_id == _INFO:
+            for child_id, child_start, child_end in _iter_elements(data, start, end):
+                if child_id == _TIMESTAMP_SCALE:
+                    timestamp_scale = _read_uint(data, child_start, child_end)
+                elif child_id == _DURATION:
+                    duration = struct.unpack('>f' if child_end - child_start == 4 else '>d', data[child_start:child_end])[0]
+        elif element_id == _TRACKS:
+            stream = _read_matroska_video_track(data, start, end)
+            if stream is None:
+                return None
+        elif element_id == _CLUSTER and stream is not None:
+            # Info and Tracks come before the first Cluster in practice
+            break
+
+    if stream is None:
+        return None
+    seconds = duration * timestamp_scale / 1e9 if duration is not None else None
+    return _info("matroska,webm" if doc_type in ("matroska", "webm") else doc_type, stream, seconds)
+
+def _read_matroska_video_track(data, start: int, end: int) -> Optional[Dict[str, Any]]:
+    for element_id, entry_start, entry_end in _iter_elements(data, start, end):
+        if element_id != _TRACK_ENTRY:
+            continue
+        track_type = None
+        default_duration = None
+        stream = {}
+        for child_id, child_start, child_end in _iter_elements(data, entry_start, entry_end):
+            if child_id == _TRACK_TYPE:
+                track_type = _read_uint(data, child_start, child_end)
+            elif child_id == _DEFAULT_DURATION:
+                default_duration = _read_uint(data, child_start, child_end)
+            elif child_id == _CODEC_ID:
+                stream["codec_tag_string"] = bytes(data[child_start:child_end]).rstrip(b'\0').decode('ascii', 'replace')
+            elif child_id == _VIDEO:
+                for video_id, video_start, video_end in _iter_elements(data, child_start, child_end):
+                    if video_id == _PIXEL_WIDTH:
+                        stream["width"] = _read_uint(data, video_start, video_end)
+                    elif video_id == _PIXEL_HEIGHT:
+                        stream["height"] = _read_uint(data, video_start, video_end)
+        if track_type != 1:
+            continue
+        if not default_duration:
+            # Without a default duration the frame rate needs the timestamps of the frames
+            return None
+        # Default durations are whole nanoseconds, so NTSC rates come out slightly off
+        rate = Fraction(1_000_000_000, default_duration).limit_denominator(1001)
+        stream["r_frame_rate"] = _rate(rate)
+        stream["avg_frame_rate"] = _rate(rate)
+        return stream
+    return None
@@ -1,74 +1,210 @@
-import DaVinciResolveScript as dvr_script
-import subprocess
-import json
+from functools import cached_property
 
 class DavinciError(Exception):
     pass
 
 def get_framerate(video_path):
-    command = [
-        '/opt/homebrew/bin/ffprobe',
-        '-v', 'error',
-        '-select_streams', 'v:0',
-        '-show_entries', 'stream=r_frame_rate',
-        '-of', 'json',
-        video_path
-    ]
-
-    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    if result.returncode != 0:
-        print(f"Error: Could not retrieve video information for {video_path}")
-        print(f"Error details: {result.stderr}")
+    """Get the frame rate of a video file with ffprobe, cached on disk by path, size and mtime."""
+    import src.probe as probe
+
+    info = probe.probe(video_path)
+    if info is None:
         return None
+    return probe.framerate(info)
+
+def get_clip_framerate(properties):
+    """Get the frame rate from the clip properties of a media pool item, or None if Resolve does not know it.
 
+    Resolve rounds NTSC rates like 24000/1001 to 23.976, so those are mapped back to the exact rate.
+    """
     try:
-        info = json.loads(result.stdout)
-        framerate_str = info['streams'][0]['r_frame_rate']
-        num, denom = map(int, framerate_str.split('/'))
-        framerate = num / denom
-        return framerate
-    except (json.JSONDecodeError, KeyError, IndexError, ValueError) as e:
-        print(f"Error parsing framerate information: {e}")
-        print(f"ffprobe output: {result.stdout}")
+        fps = float(properties.get("FPS"))
+    except (TypeError, ValueError):
+        return None
+    if fps <= 0:
         return None
+    ntsc = round(fps * 1.001)
+    if abs(fps - round(fps)) > 0.001 and abs(ntsc / 1.001 - fps) < 0.001:
+        return ntsc * 1000 / 1001
+    return fps
 
+_resolve = None
 
-def get_current_project() -> object:
-    resolve = dvr_script.scriptapp("Resolve")
-    projectManager = resolve.GetProjectManager()
-    project = projectManager.GetCurrentProject()
-    
-    if project == None:
-        raise DavinciError("no project is currently open")
+def get_resolve() -> object:
+    """Get the Resolve scripting handle, connecting on first use and reusing it afterwards."""
+    global _resolve
+    if _resolve is None:
+        # Imported here so that commands which never talk to Resolve work without it
+        try:
+            import DaVinciResolveScript as dvr_script
+        except ImportError as e:
+            raise DavinciError(f"could not import DaVinciResolveScript: {str(e)}")
+        _resolve = dvr_script.scriptapp("Resolve")
+        if _resolve is None:
+            raise DavinciError("could not connect to DaVinci Resolve")
+    return _resolve
+
+def reset_resolve():
+    """Forget the Resolve scripting handle so that the next call connects again."""
+    global _resolve
+    _resolve = None
+
+class _Counted:
+    """A Resolve object whose method calls are counted by a ResolveSession."""
+
+    __slots__ = ("_target", "_session")
+
+    def __init__(self, target, session):
+        self._target = target
+        self._session = session
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+        session = self._session
+
+        def method(*args, **kwargs):
+            session.calls += 1
+            session.calls_by_method[name] = session.calls_by_method.get(name, 0) + 1
+            return session.wrap(attr(*args, **kwargs))
+        return method
+
+    def __repr__(self):
+        return f"_Counted({self._target!r})"
+
+class ResolveSession:
+    """The Resolve objects of one command, each looked up at most once.
+
+    Every call into Resolve is a round trip to another process, so the chain
+    from the project manager down to the current media pool item is only
+    walked as far as a command needs it, and only once. Objects handed out by
+    the session count the calls made on them, and on objects they return, in
+    calls and calls_by_method.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.calls_by_method = {}
+
+    def wrap(self, value):
+        """Wrap a value returned by Resolve so that calls on it are counted."""
+        if value is None or isinstance(value, (str, int, float, bool, _Counted)):
+            return value
+        if isinstance(value, list):
+            return [self.wrap(item) for item in value]
+        if isinstance(value, tuple):
+            return tuple(self.wrap(item) for item in value)
+        if isinstance(value, dict):
+            return {key: self.wrap(item) for key, item in value.items()}
+        return _Counted(value, self)
+
+    @cached_property
+    def resolve(self) -> object:
+        return self.wrap(get_resolve())
+
+    @cached_property
+    def project(self) -> object:
+        projectManager = self.resolve.GetProjectManager()
+        project = projectManager.GetCurrentProject()
         
-    return project
+        if project == None:
+            raise DavinciError("no project is currently open")
+            
+        return project
 
-def get_current_timeline() -> object:
-    project = get_current_project()
-    timeline = project.GetCurrentTimeline()
-    
-    if timeline == None:
-        raise DavinciError("no timeline is currently active")
+    @cached_property
+    def media_pool(self) -> object:
+        media_pool = self.project.GetMediaPool()
+
+        if media_pool == None:
+            raise DavinciError("the current project has no media pool")
+
+        return media_pool
+
+    @cached_property
+    def timeline(self) -> object:
+        timeline = self.project.GetCurrentTimeline()
         
-    return timeline
+        if timeline == None:
+            raise DavinciError("no timeline is currently active")
+            
+        return timeline
 
-def get_current_video_item() -> object:
-    timeline = get_current_timeline()
-    current_item = timeline.GetCurrentVideoItem()
-    
-    if current_item == None:
-        raise DavinciError("no video item is currently selected")
+    @cached_property
+    def video_item(self) -> object:
+        current_item = self.timeline.GetCurrentVideoItem()
         
-    return current_item 
+        if current_item == None:
+            raise DavinciError("no video item is currently selected")
+            
+        return current_item 
 
-def get_current_media_pool_item() -> object:
-    video_item = get_current_video_item()
-    media_pool_item = video_item.GetMediaPoolItem()
-    
-    if media_pool_item == None:
-        raise DavinciError("no video item is currently selected")
+    @cached_property
+    def media_pool_item(self) -> object:
+        media_pool_item = self.video_item.GetMediaPoolItem()
         
-    return media_pool_item
+        if media_pool_item == None:
+            raise DavinciError("no video item is currently selected")
+            
+        return media_pool_item
+
+_sessions = []
+
+def start_session() -> ResolveSession:
+    """Start the session that the current command looks up Resolve objects in."""
+    session = ResolveSession()
+    _sessions.append(session)
+    return session
+
+def end_session():
+    """End the session of the current command, returning to the one of an enclosing command, if any."""
+    _sessions.pop()
+
+def current_session() -> ResolveSession:
+    """Get the session of the current command, or a new one outside of commands."""
+    return _sessions[-1] if _sessions else ResolveSession()
+
+def get_current_project() -> object:
+    return current_session().project
+
+def get_media_pool() -> object:
+    return current_session().media_pool
+
+def iter_media_pool_clips(folder, path=""):
+    """Yield the folder path and clip of every clip in a media pool folder and its subfolders, depth first."""
+    path = f"{path}/{folder.GetName()}" if path else folder.GetName()
+    for clip in folder.GetClipList() or []:
+        yield path, clip
+    for subfolder in folder.GetSubFolderList() or []:
+        yield from iter_media_pool_clips(subfolder, path)
+
+def iter_media_pool_folders(folder, path=""):
+    """Yield the path and folder of a media pool folder and all its subfolders, depth first."""
+    path = f"{path}/{folder.GetName()}" if path else folder.GetName()
+    yield path, folder
+    for subfolder in folder.GetSubFolderList() or []:
+        yield from iter_media_pool_folders(subfolder, path)
+
+def get_current_timeline() -> object:
+    return current_session().timeline
+
+def iter_timelines(project):
+    """Yield every timeline of a project, in the order of the project."""
+    for index in range(1, (project.GetTimelineCount() or 0) + 1):
+        timeline = project.GetTimelineByIndex(index)
+        if timeline:
+            yield timeline
+
+def get_current_video_item() -> object:
+    return current_session().video_item
+
+def get_current_media_pool_item() -> object:
+    return current_session().media_pool_item
+
+def get_clip_properties(media_pool_item) -> dict:
+    """Get all clip properties of a media pool item with one call into Resolve."""
+    return media_pool_item.GetClipProperty() or {}
 
 def get_composition(clear) -> object:
     video_item = get_current_video_item()
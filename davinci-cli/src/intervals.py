@@ -0,0 +1,122 @@
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Intervals are half-open, [start, end), like the frames of timeline items,
+# whose end is the first frame after them.
+
+class IntervalTree:
+    """A static centered interval tree, answering which intervals contain a point or overlap a range.
+
+    Every node keeps the intervals that contain its center, sorted by start
+    and by end, with the intervals before and after the center in its
+    subtrees. A point query walks one path and stops scanning each node at
+    the first interval that does not contain the point, so it takes
+    O(log n + k) for k hits. A range query adds the intervals starting in the
+    range, which are a slice of all intervals sorted by start.
+
+    Args:
+        intervals: (start, end, value) tuples, empty intervals are left out
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[int, int, Any]]):
+        entries = sorted((interval for interval in intervals if interval[1] > interval[0]), key=lambda interval: interval[0])
+        self._starts = [start for start, _, _ in entries]
+        self._values = [value for _, _, value in entries]
+        self._root = self._build([(start, end, index) for index, (start, end, _) in enumerate(entries)])
+
+    def _build(self, entries: List[Tuple[int, int, int]]) -> Optional[list]:
+        """Build the node of entries sorted by start, as [center, by start, by end, left, right]."""
+        if not entries:
+            return None
+        # The middle start keeps both subtrees at most half the size, and the
+        # interval it belongs to always contains it
+        center = entries[len(entries) // 2][0]
+        before = [entry for entry in entries if entry[1] <= center]
+        after = [entry for entry in entries if entry[0] > center]
+        here = [entry for entry in entries if entry[0] <= center < entry[1]]
+        by_end = sorted(here, key=lambda entry: entry[1], reverse=True)
+        return [
+            center,
+            [(start, index) for start, _, index in here],
+            [(end, index) for _, end, index in by_end],
+            self._build(before),
+            self._build(after),
+        ]
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def _stab(self, point: int) -> List[int]:
+        indexes = []
+        node = self._root
+        while node is not None:
+            center, by_start, by_end, before, after = node
+            if point < center:
+                # Every interval here ends after the center, so it contains the point if it starts by it
+                for start, index in by_start:
+                    if start > point:
+                        break
+                    indexes.append(index)
+                node = before
+            else:
+                # Every interval here starts by the center, so it contains the point if it ends after it
+                for end, index in by_end:
+                    if end <= point:
+                        break
+                    indexes.append(index)
+                node = after
+        return indexes
+
+    def at(self, point: int) -> List[Any]:
+        """Get the values of the intervals containing a point, by start."""
+        return [self._values[index] for index in sorted(self._stab(point))]
+
+    def overlapping(self, start: int, end: int) -> List[Any]:
+        """Get the values of the intervals overlapping [start, end), by start."""
+        if end <= start:
+            return []
+        indexes = self._stab(start)
+        # The intervals that overlap the range without containing its start start within it
+        indexes.sort()
+        indexes.extend(range(bisect_right(self._starts, start), bisect_left(self._starts, end)))
+        return [self._values[index] for index in indexes]
+
+class TimelineIndex:
+    """Interval trees over the items of a timeline, one per track and one for all tracks.
+
+    The tree of a track is built when a query first asks for that track.
+
+    Args:
+        items: Item records, as in a TimelineSnapshot, with track_type, track, start and end
+    """
+
+    def __init__(self, items: Iterable[Dict[str, Any]]):
+        items = list(items)
+        self.merged = IntervalTree((item["start"], item["end"], item) for item in items)
+        self._track_items = {}
+        for item in items:
+            self._track_items.setdefault((item["track_type"], item["track"]), []).append(item)
+        self._tracks = {}
+
+    def track(self, track_type: str, track: int) -> IntervalTree:
+        """Get the tree of one track."""
+        key = (track_type, track)
+        if key not in self._tracks:
+            self._tracks[key] = IntervalTree((item["start"], item["end"], item) for item in self._track_items.get(key, []))
+        return self._tracks[key]
+
+    def _trees(self, track_type: Optional[str], track: Optional[int]) -> List[IntervalTree]:
+        if track_type is None and track is None:
+            return [self.merged]
+        return [
+            self.track(*key) for key in sorted(self._track_items)
+            if track_type in (None, key[0]) and track in (None, key[1])
+        ]
+
+    def at(self, frame: int, track_type: Optional[str] = None, track: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get the items at a frame, on all tracks or those of a type or number."""
+        return [item for tree in self._trees(track_type, track) for item in tree.at(frame)]
+
+    def overlapping(self, start: int, end: int, track_type: Optional[str] = None, track: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get the items overlapping the frames [start, end), on all tracks or those of a type or number."""
+        return [item for tree in self._trees(track_type, track) for item in tree.overlapping(start, end)]
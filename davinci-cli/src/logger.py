@@ -1,15 +1,25 @@
 import os
 import logging
-from pathlib import Path
+
+_configured = False
 
 def setup_logging():
-    """Set up logging to files in $XDG_DATA_HOME/davinci-cli/ for each log level."""
+    """Set up logging to files in $XDG_DATA_HOME/davinci-cli/ for each log level.
+
+    Only the first call in a process adds handlers, so that commands run by
+    `davinci serve` do not log every line more than once.
+    """
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
     # Get XDG_DATA_HOME, default to ~/.local/share if not set
-    xdg_data_home = os.environ.get('XDG_DATA_HOME', str(Path.home() / '.local' / 'share'))
-    log_dir = Path(xdg_data_home) / 'davinci-cli'
+    xdg_data_home = os.environ.get('XDG_DATA_HOME', os.path.join(os.path.expanduser('~'), '.local', 'share'))
+    log_dir = os.path.join(xdg_data_home, 'davinci-cli')
     
     # Create log directory if it doesn't exist
-    log_dir.mkdir(parents=True, exist_ok=True)
+    os.makedirs(log_dir, exist_ok=True)
     
     # Configure root logger
     root_logger = logging.getLogger()
@@ -28,7 +38,8 @@ def setup_logging():
     }
     
     for level_name, level in log_levels.items():
-        handler = logging.FileHandler(log_dir / f'{level_name}.log')
+        # Log files are only opened once something is logged at their level
+        handler = logging.FileHandler(os.path.join(log_dir, f'{level_name}.log'), delay=True)
         handler.setLevel(level)
         handler.setFormatter(formatter)
         root_logger.addHandler(handler)
@@ -1,5 +1,12 @@
+import logging
 import re
-from typing import Any, Dict, List, Union
+import sys
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from collections.abc import Mapping
+from itertools import chain, repeat
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 def _parse_value(value: str, key: str = None) -> Any:
     """Parse a Lua value into a Python value.
@@ -86,7 +93,7 @@ def _parse_value(value: str, key: str = None) -> Any:
     
     # Check for named table in string value
     if " {" in value and not value.startswith("{"):
-        return parse(value)
+        return _legacy_parse(value)
     
     return value
 
@@ -346,8 +353,12 @@ def _parse_table(content: str) -> Dict[str, Any]:
     
     return result
 
-def parse(macro: str) -> Any:
-    """Parse a Lua table string into a Python object."""
+def _legacy_parse(macro: str) -> Any:
+    """Parse a Lua table string into a Python object by repeated rescanning.
+
+    This is the original character-by-character parser. It is only used when
+    the tokenizing parser rejects the input.
+    """
     if not macro:
         return ""
     
@@ -433,78 +444,1306 @@ def parse(macro: str) -> Any:
     
     return macro
 
-def manifest(obj):
-    """Convert a Python object into a Lua table string."""
+class LuaTable:
+    """A Lua table with a name, an array part and an ordered hash part.
+
+    Like Lua's own tables, positional values are kept in a contiguous array
+    part and keyed values in a hash part, so arrays inside named tables and
+    implicit numeric keys need no string keys. Bracketed numeric keys such as
+    `[0]` keep their numeric type.
+
+    Both parts are stored as tuples and empty parts as None, except that an
+    all-numeric array part may be a typed array when parsed with
+    numbers="array" or numbers="numpy". The hash part is
+    split into a key index, which tables parsed together share when they have
+    the same keys, and a tuple of values. Updates replace the tuples and copy
+    the key index before adding keys, so shared indexes are never modified.
+    """
+    __slots__ = ("name", "array", "_keys", "_values")
+
+    def __init__(self, name: Optional[str] = None, array: Optional[List[Any]] = None, hash: Optional[Dict[Any, Any]] = None):
+        self.name = name
+        self.array = tuple(array) if array else None
+        if hash:
+            self._keys = {key: i for i, key in enumerate(hash)}
+            self._values = tuple(hash.values())
+        else:
+            self._keys = None
+            self._values = None
+
+    @property
+    def hash(self) -> Dict[Any, Any]:
+        """A copy of the hash part as a dictionary."""
+        if not self._keys:
+            return {}
+        return dict(zip(self._keys, self._values))
+
+    def __len__(self) -> int:
+        return len(self.array) if self.array is not None else 0
+
+    def __bool__(self) -> bool:
+        # len() only counts the array part, like Lua's # operator
+        return bool(len(self) or self._keys)
+
+    def __getitem__(self, key: Any) -> Any:
+        # Integer keys from 1 to the array length address the array part
+        if type(key) is int and 1 <= key <= len(self):
+            return self.array[key - 1]
+        if self._keys and key in self._keys:
+            return self._values[self._keys[key]]
+        raise KeyError(key)
+
+    def __setitem__(self, key: Any, value: Any):
+        if type(key) is int and 1 <= key <= len(self):
+            values = list(self.array)
+            values[key - 1] = value
+            self.array = tuple(values)
+        elif self._keys and key in self._keys:
+            index = self._keys[key]
+            self._values = self._values[:index] + (value,) + self._values[index + 1:]
+        elif type(key) is int and key == len(self) + 1:
+            self.append(value)
+        else:
+            keys = dict(self._keys) if self._keys else {}
+            keys[key] = len(keys)
+            self._keys = keys
+            self._values = (self._values or ()) + (value,)
+
+    def __contains__(self, key: Any) -> bool:
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, LuaTable):
+            return NotImplemented
+        return (self.name == other.name
+                and _as_tuple(self.array) == _as_tuple(other.array)
+                and self.hash == other.hash)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"LuaTable({self.name!r}, {list(_as_tuple(self.array))!r}, {self.hash!r})"
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def append(self, value: Any):
+        self.array = _as_tuple(self.array) + (value,)
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        """Yield the entries of the array part with one-based keys, then the hash part."""
+        if self.array is not None:
+            yield from enumerate(self.array, 1)
+        if self._keys:
+            yield from zip(self._keys, self._values)
+
+def _as_tuple(values: Any) -> tuple:
+    """Return an array part as a tuple, or an empty tuple for a missing one."""
+    if values is None:
+        return ()
+    if isinstance(values, tuple):
+        return values
+    return tuple(values)
+
+class _ParseError(ValueError):
+    """Raised when the tokenizing parser cannot handle its input."""
+    pass
+
+_NUMBER = r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+
+# Every token is matched in one pass over the input. Punctuation, quoted
+# strings and bare words (identifiers, numbers, names like ordered()) are the
+# main token kinds; anything else is reported as an error token. Tables that
+# only hold numbers are matched as a single token so that their numbers can be
+# converted in bulk.
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<numbers>\{\s*NUMBER(?:\s*,\s*NUMBER)*\s*,?\s*\})
+      | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+      | (?P<punct>[{}\[\]=,;])
+      | (?P<word>[^\s{}\[\]=,;'"]+)
+      | (?P<error>\S)
+    )""".replace("NUMBER", _NUMBER), re.VERBOSE | re.DOTALL)
+
+_NUMBER_RE = re.compile(_NUMBER)
+
+# Finds an integer among the comma-prefixed numbers of a numeric table
+_INTEGER_ITEM_RE = re.compile(r",\s*-?\d+\s*(?=,|$)")
+
+_EOF = ("eof", "")
+
+def _tokenize(text: str, start: int = 0, end: int = sys.maxsize) -> Iterator[Tuple[str, str]]:
+    """Split Lua table text, or the part from start to end, into (kind, text) tokens.
+
+    Punctuation tokens use the character itself as their kind.
+    """
+    for match in _TOKEN_RE.finditer(text, start, end):
+        kind = match.lastgroup
+        token = match.group(kind)
+        if kind == "punct":
+            yield token, token
+        else:
+            yield kind, token
+
+def _string_value(token: str) -> str:
+    """Strip the quotes from a string token and unescape its quote character."""
+    quote = token[0]
+    return token[1:-1].replace("\\" + quote, quote)
+
+def _word_value(word: str) -> Any:
+    """Convert a bare word into nil, a boolean, a number or a plain string."""
+    if word == "nil":
+        return None
+    if word == "true":
+        return True
+    if word == "false":
+        return False
+    if _NUMBER_RE.fullmatch(word):
+        return float(word) if _is_float(word) else int(word)
+    return word
+
+def _is_float(number: str) -> bool:
+    return "." in number or "e" in number or "E" in number
+
+def _number_strings(token: str) -> List[str]:
+    """Split a numbers token into the text of its numbers."""
+    numbers = token[1:-1].split(",")
+    if not numbers[-1] or numbers[-1].isspace():
+        # Trailing comma
+        numbers.pop()
+    return numbers
+
+def _number_list(token: str) -> List[Any]:
+    """Convert a numbers token into a list of ints and floats."""
+    return [float(number) if _is_float(number) else int(number) for number in _number_strings(token)]
+
+def _typed_numbers(token: str, new_array) -> Any:
+    """Convert a numbers token into a typed array if all its numbers have the same type.
+
+    Integers are stored with the typecode "q" and floats with "d". Tables that
+    mix integers and floats, or hold integers beyond 64 bits, become lists so
+    that every number keeps its type.
+    """
+    numbers = _number_strings(token)
+    content = token[1:-1]
+    # A number holds at most one dot, so one dot per number means all are floats
+    dots = content.count(".")
+    if dots == len(numbers):
+        return new_array("d", map(float, numbers))
+    if not dots and "e" not in content and "E" not in content:
+        try:
+            return new_array("q", map(int, numbers))
+        except OverflowError:
+            return _number_list(token)
+    if _INTEGER_ITEM_RE.search("," + content):
+        return _number_list(token)
+    return new_array("d", map(float, numbers))
+
+def _number_array(token: str) -> Any:
+    """Convert a numbers token into an array.array where possible."""
+    return _typed_numbers(token, array)
+
+def _number_ndarray(token: str) -> Any:
+    """Convert a numbers token into a NumPy array where possible."""
+    import numpy
+
+    def new_array(typecode, numbers):
+        return numpy.fromiter(numbers, dtype=numpy.int64 if typecode == "q" else numpy.float64)
+
+    return _typed_numbers(token, new_array)
+
+_NUMBERS = {
+    "list": _number_list,
+    "array": _number_array,
+    "numpy": _number_ndarray,
+}
+
+def _numbers_factory(numbers: str):
+    """Look up the function that converts numeric tables for a storage type."""
+    if numbers not in _NUMBERS:
+        raise ValueError(f"Unsupported numbers storage: {numbers}")
+    if numbers == "numpy":
+        try:
+            import numpy
+        except ImportError:
+            raise ValueError("numbers=\"numpy\" requires numpy to be installed")
+    return _NUMBERS[numbers]
+
+def _is_numeric_array(obj: Any) -> bool:
+    """Check whether an object is a typed array of numbers."""
+    if isinstance(obj, array):
+        return True
+    # An ndarray can only exist if numpy has been imported
+    numpy = sys.modules.get("numpy")
+    return numpy is not None and isinstance(obj, numpy.ndarray)
+
+def json_default(obj: Any) -> Any:
+    """Expand typed numeric arrays into lists, for use as json.dumps(default=...)."""
+    if _is_numeric_array(obj):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _empty_table(key: Any) -> Any:
+    """Pick the Python value for an empty `{}` based on the key it is stored under."""
+    if isinstance(key, str) and ("empty_table" in key or key.endswith("table")):
+        return {}
+    return []
+
+def _make_table(name: Optional[str], entries: List[Tuple[Any, Any]], key: Any, keyed: bool) -> Any:
+    """Turn the entries of a parsed table into a list or dictionary.
+
+    Args:
+        name: The table name for named tables like `Input { ... }`
+        entries: (key, value) pairs in source order, key is None for positional entries
+        key: The key the table is stored under, used for empty tables
+        keyed: Whether any of the entries has an explicit key
+    """
+    if not entries:
+        if name is not None:
+            return {"__name__": name}
+        return _empty_table(key)
+    if not keyed:
+        return _make_array(name, [value for _, value in entries], key)
+    result = {}
+    numeric_index = 1
+    for entry_key, value in entries:
+        if entry_key is None:
+            # Implicit numeric keys are one-based and numbers become floats
+            entry_key = str(numeric_index)
+            numeric_index += 1
+            if isinstance(value, int) and not isinstance(value, bool):
+                value = float(value)
+        elif not isinstance(entry_key, str):
+            # Bracketed numeric keys are stored as strings
+            entry_key = str(entry_key)
+        result[entry_key] = value
+    if name is not None:
+        result["__name__"] = name
+    return result
+
+def _make_array(name: Optional[str], values: Any, key: Any) -> Any:
+    """Turn the values of a table without keys into a list or dictionary.
+
+    Args:
+        name: The table name for named tables like `FuID { ... }`
+        values: The values as a list or typed numeric array
+        key: The key the table is stored under
+    """
+    if name is None:
+        return values
+    if not isinstance(values, list):
+        values = values.tolist()
+    # Named arrays are stored as dictionaries with zero-based string keys
+    result = {"__name__": name}
+    for i, value in enumerate(values):
+        result[str(i)] = value
+    return result
+
+def _lua_table_maker():
+    """Create a function that builds LuaTables from the entries of parsed tables.
+
+    Tables built by the same function share the key index of their hash part
+    when they have the same keys in the same order.
+    """
+    layouts = {}
+
+    def make_array(name: Optional[str], values: Any, key: Any) -> LuaTable:
+        table = LuaTable(name)
+        table.array = tuple(values) if isinstance(values, list) else values
+        return table
+
+    def make_table(name: Optional[str], entries: List[Tuple[Any, Any]], key: Any, keyed: bool) -> LuaTable:
+        if not keyed:
+            if entries:
+                return make_array(name, [value for _, value in entries], key)
+            return LuaTable(name)
+        array = []
+        hash = {}
+        for entry_key, value in entries:
+            if entry_key is None:
+                array.append(value)
+            else:
+                hash[entry_key] = value
+        layout = tuple(hash)
+        keys = layouts.get(layout)
+        if keys is None:
+            keys = layouts[layout] = {k: i for i, k in enumerate(layout)}
+        table = LuaTable(name)
+        table.array = tuple(array) if array else None
+        table._keys = keys
+        table._values = tuple(hash.values())
+        return table
+
+    return make_table, make_array
+
+_MODELS = {
+    "dict": lambda: (_make_table, _make_array),
+    "table": _lua_table_maker,
+}
+
+def _table_factory(model: str):
+    """Create the functions that build tables with and without keys for a data model."""
+    try:
+        return _MODELS[model]()
+    except KeyError:
+        raise ValueError(f"Unsupported model: {model}")
+
+def _bracket_key(next_token) -> Any:
+    """Read a `[key] =` key after its opening bracket has been consumed."""
+    kind, text = next_token()
+    if kind == "string":
+        key = _string_value(text)
+    elif kind == "word" and _NUMBER_RE.fullmatch(text):
+        key = _word_value(text)
+    else:
+        raise _ParseError(f"unsupported key {text!r}")
+    if next_token()[0] != "]" or next_token()[0] != "=":
+        raise _ParseError("malformed bracketed key")
+    return key
+
+class _Parser:
+    """Recursive descent parser over the token stream of a Lua table string."""
+
+    def __init__(self, tokens: Iterator[Tuple[str, str]], make_table=_make_table, make_array=_make_array, make_numbers=_number_list):
+        self._tokens = tokens
+        self._make_table = make_table
+        self._make_array = make_array
+        self._make_numbers = make_numbers
+        self._lookahead = None
+
+    def _next(self) -> Tuple[str, str]:
+        if self._lookahead is not None:
+            token, self._lookahead = self._lookahead, None
+            return token
+        return next(self._tokens, _EOF)
+
+    def _peek(self) -> Tuple[str, str]:
+        if self._lookahead is None:
+            self._lookahead = next(self._tokens, _EOF)
+        return self._lookahead
+
+    def parse(self) -> Any:
+        kind, text = self._next()
+        if kind == "{":
+            value = self._table(None, None)
+            if value == []:
+                value = {}
+        else:
+            value = self._value(kind, text)
+        if self._next() is not _EOF:
+            raise _ParseError("unexpected content after value")
+        return value
+
+    def value(self, key: Any = None) -> Any:
+        """Parse a single value stored under the given key."""
+        kind, text = self._next()
+        return self._value(kind, text, key)
+
+    def _value(self, kind: str, text: str, key: Optional[str] = None) -> Any:
+        if kind == "{":
+            return self._table(None, key)
+        if kind == "numbers":
+            return self._make_array(None, self._make_numbers(text), key)
+        if kind == "string":
+            return _string_value(text)
+        if kind == "word":
+            next_kind, next_text = self._peek()
+            if next_kind == "{":
+                self._next()
+                return self._table(text, key)
+            if next_kind == "numbers":
+                self._next()
+                return self._make_array(text, self._make_numbers(next_text), key)
+            return _word_value(text)
+        raise _ParseError(f"unexpected token {text!r}")
+
+    def _table(self, name: Optional[str], key: Optional[str]) -> Any:
+        entries = []
+        keyed = False
+        while True:
+            kind, text = self._next()
+            if kind == "}":
+                return self._make_table(name, entries, key, keyed)
+            if kind == "," or kind == ";":
+                continue
+            entry_key = None
+            if kind == "[":
+                entry_key = _bracket_key(self._next)
+                kind, text = self._next()
+            elif (kind == "word" or kind == "string") and self._peek()[0] == "=":
+                self._next()
+                entry_key = text if kind == "word" else _string_value(text)
+                kind, text = self._next()
+            if entry_key is not None:
+                keyed = True
+            entries.append((entry_key, self._value(kind, text, entry_key)))
+            if self._peek()[0] not in (",", ";", "}"):
+                raise _ParseError("expected separator")
+
+def parse(macro: str, model: str = "dict", numbers: str = "list", workers: Optional[int] = None) -> Any:
+    """Parse a Lua table string into a Python object.
+
+    The input is tokenized once and parsed by recursive descent. Input the
+    tokenizing parser does not understand is handed to the legacy parser.
+
+    Args:
+        macro: The Lua table string to parse
+        model: "dict" for dictionaries and lists, "table" for LuaTable objects
+        numbers: How tables holding only numbers are stored: "list", "array"
+            for array.array or "numpy" for NumPy arrays. Typed arrays are only
+            used when all numbers are integers or all are floats.
+        workers: Parse the entries of the top-level Tools table in this many
+            processes. Only supported by the dict model. The result is the
+            same as the one of a serial parse.
+
+    Raises:
+        ValueError: If the model or numbers storage is unknown, or the input is
+            malformed and the model has no legacy parser to fall back to
+    """
+    make_table, make_array = _table_factory(model)
+    make_numbers = _numbers_factory(numbers)
+    if workers is not None and model != "dict":
+        raise ValueError("workers are only supported by the dict model")
+    if not macro:
+        return ""
+    if workers:
+        try:
+            result = _parse_parallel(macro, numbers, workers)
+            if result is not None:
+                return result
+        except (_ParseError, RecursionError) as e:
+            logging.debug(f"Falling back to serial macro parser: {str(e)}")
+    try:
+        return _Parser(_tokenize(macro), make_table, make_array, make_numbers).parse()
+    except (_ParseError, RecursionError) as e:
+        if model != "dict":
+            raise ValueError(f"Failed to parse macro: {str(e)}")
+        logging.debug(f"Falling back to legacy macro parser: {str(e)}")
+        return _legacy_parse(macro)
+
+def _parse_batch(items: List[Tuple[Any, str]], numbers: str) -> List[Any]:
+    """Parse (key, text) pairs of table values in a worker process."""
+    make_numbers = _numbers_factory(numbers)
+    return [_Parser(_tokenize(text), make_numbers=make_numbers).value(key) for key, text in items]
+
+def _batches(items: List[Tuple[Any, str]], count: int) -> List[List[Tuple[Any, str]]]:
+    """Split (key, text) pairs into about `count` consecutive batches of similar text size."""
+    target = sum(len(text) for _, text in items) / count
+    batches = [[]]
+    size = 0
+    for item in items:
+        if size >= target:
+            batches.append([])
+            size = 0
+        batches[-1].append(item)
+        size += len(item[1])
+    return batches
+
+def _parse_parallel(macro: str, numbers: str, workers: int) -> Any:
+    """Parse the entries of the top-level Tools table in worker processes.
+
+    Returns None if the string has no top-level Tools table with keys.
+    """
+    root = parse_lazy(macro, numbers)
+    if not isinstance(root, LazyTable):
+        return None
+    root_entries = root._keyed_entries()
+    if root_entries is None or not isinstance(root.get("Tools"), LazyTable):
+        return None
+    tools = root["Tools"]
+    tool_entries = tools._keyed_entries()
+    if tool_entries is None:
+        return None
+
+    items = [(source_key, macro[value._start:value._close + 1])
+             for _, source_key, value in tool_entries if isinstance(value, LazyTable)]
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Several batches per worker even out tools of different sizes
+        batches = _batches(items, workers * 4) if items else []
+        parsed = chain.from_iterable(executor.map(_parse_batch, batches, repeat(numbers)))
+        tools_result = {}
+        for key, _, value in tool_entries:
+            tools_result[key] = next(parsed) if isinstance(value, LazyTable) else value
+    if tools.name is not None:
+        tools_result["__name__"] = tools.name
+
+    result = {}
+    for key, _, value in root_entries:
+        if key == "Tools":
+            result[key] = tools_result
+        else:
+            result[key] = value.materialize() if isinstance(value, LazyTable) else value
+    if root.name is not None:
+        result["__name__"] = root.name
+    return result
+
+def _tokenize_stream(fileobj, chunk_size: int) -> Iterator[Tuple[str, str]]:
+    """Tokenize text read from a file object in chunks.
+
+    A token touching the end of the buffered text may continue in the next
+    chunk, so it is held back until more text has been read.
+    """
+    buffer = ""
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            yield from _tokenize(buffer)
+            return
+        buffer += chunk
+        end = 0
+        for match in _TOKEN_RE.finditer(buffer):
+            kind = match.lastgroup
+            token = match.group(kind)
+            # An unterminated string shows up as an error token on its quote
+            if match.end() == len(buffer) or (kind == "error" and token in "'\""):
+                break
+            end = match.end()
+            if kind == "punct":
+                yield token, token
+            else:
+                yield kind, token
+        buffer = buffer[end:]
+
+def _iter_events(tokens: Iterator[Tuple[str, str]]) -> Iterator[Tuple[str, Any]]:
+    """Turn a token stream into parse events without building any tables."""
+    lookahead = []
+
+    def next_token() -> Tuple[str, str]:
+        if lookahead:
+            return lookahead.pop()
+        return next(tokens, _EOF)
+
+    def peek() -> Tuple[str, str]:
+        if not lookahead:
+            lookahead.append(next(tokens, _EOF))
+        return lookahead[0]
+
+    depth = 0
+    token = next_token()
+    while True:
+        kind, text = token
+        # Entries may directly follow an opening brace, otherwise a separator is needed
+        separated = True
+        if kind == "{":
+            depth += 1
+            yield "start_table", None
+        elif kind == "word" and peek()[0] == "{":
+            next_token()
+            depth += 1
+            yield "start_table", text
+        elif kind == "numbers" or (kind == "word" and peek()[0] == "numbers"):
+            separated = False
+            name = None
+            if kind == "word":
+                name = text
+                _, text = next_token()
+            yield "start_table", name
+            for number in _number_list(text):
+                yield "value", number
+            yield "end_table", None
+        elif kind == "string":
+            separated = False
+            yield "value", _string_value(text)
+        elif kind == "word":
+            separated = False
+            yield "value", _word_value(text)
+        else:
+            raise _ParseError(f"unexpected token {text!r}")
+
+        while True:
+            if depth == 0:
+                if next_token() is not _EOF:
+                    raise _ParseError("unexpected content after value")
+                return
+            kind, text = next_token()
+            if kind == "}":
+                depth -= 1
+                separated = False
+                yield "end_table", None
+                continue
+            if kind == "," or kind == ";":
+                separated = True
+                continue
+            if not separated:
+                raise _ParseError("expected separator")
+            if kind == "[":
+                yield "key", _bracket_key(next_token)
+                token = next_token()
+            elif (kind == "word" or kind == "string") and peek()[0] == "=":
+                next_token()
+                yield "key", text if kind == "word" else _string_value(text)
+                token = next_token()
+            else:
+                token = kind, text
+            break
+
+def _build(event: str, value: Any, events: Iterator[Tuple[str, Any]], key: Any = None, make_table=_make_table) -> Any:
+    """Build the Python value that starts with the given event."""
+    if event == "value":
+        return value
+    name = value
+    entries = []
+    keyed = False
+    entry_key = None
+    for event, value in events:
+        if event == "end_table":
+            return make_table(name, entries, key, keyed)
+        if event == "key":
+            entry_key = value
+            keyed = True
+            continue
+        entries.append((entry_key, _build(event, value, events, entry_key, make_table)))
+        entry_key = None
+    raise _ParseError("unexpected end of input")
+
+def _skip(event: str, events: Iterator[Tuple[str, Any]]):
+    """Consume the events of a value without building it."""
+    if event != "start_table":
+        return
+    depth = 1
+    for event, _ in events:
+        if event == "start_table":
+            depth += 1
+        elif event == "end_table":
+            depth -= 1
+            if depth == 0:
+                return
+
+def iterparse(fileobj, chunk_size: int = 65536) -> Iterator[Tuple[str, Any]]:
+    """Parse a Lua table from a text file object into a stream of events.
+
+    The file is read in chunks of `chunk_size` characters, so only the
+    current chunk and the events not consumed yet are held in memory.
+
+    Yields (event, value) tuples:
+        ("start_table", name): a table starts, name is None for unnamed tables
+        ("key", key): the next value is stored under this key
+        ("value", value): a nil, boolean, number or string value
+        ("end_table", None): the innermost open table ends
+
+    Raises:
+        ValueError: If the input is not a well-formed Lua table
+    """
+    return _iter_events(_tokenize_stream(fileobj, chunk_size))
+
+def iter_tools(fileobj, chunk_size: int = 65536, model: str = "dict") -> Iterator[Tuple[Optional[str], Any]]:
+    """Yield (name, tool) pairs from the Tools table of a .setting or .comp file.
+
+    Tools are parsed one at a time, everything outside the top-level Tools
+    table is skipped without being built.
+    """
+    make_table, _ = _table_factory(model)
+    events = iterparse(fileobj, chunk_size)
+    event, _ = next(events)
+    if event != "start_table":
+        return
+    key = None
+    for event, value in events:
+        if event == "end_table":
+            return
+        if event == "key":
+            key = value
+            continue
+        if key == "Tools" and event == "start_table":
+            name = None
+            for event, value in events:
+                if event == "end_table":
+                    break
+                if event == "key":
+                    name = value
+                    continue
+                yield name, _build(event, value, events, name, make_table)
+                name = None
+        else:
+            _skip(event, events)
+        key = None
+
+_BRACE_RE = re.compile(r"""'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|[{}]""", re.DOTALL)
+
+class _BraceIndex:
+    """Offsets of all matching braces of a Lua table string.
+
+    The index is built in one scan that skips over quoted strings. Opening
+    offsets are stored in ascending order, so the closing brace of a table is
+    found by binary search.
+    """
+    __slots__ = ("opens", "closes")
+
+    def __init__(self, text: str):
+        opens = array("q")
+        closes = array("q")
+        stack = []
+        for match in _BRACE_RE.finditer(text):
+            char = match.group()
+            if char == "{":
+                stack.append(len(opens))
+                opens.append(match.start())
+                closes.append(-1)
+            elif char == "}":
+                if not stack:
+                    raise _ParseError("unbalanced closing brace")
+                closes[stack.pop()] = match.start()
+        if stack:
+            raise _ParseError("unbalanced opening brace")
+        self.opens = opens
+        self.closes = closes
+
+    def close(self, open: int) -> int:
+        """Find the offset of the brace closing the brace at the given offset."""
+        return self.closes[bisect_left(self.opens, open)]
+
+class _Cursor:
+    """Reads tokens from part of a Lua table string and can jump over tables."""
+    __slots__ = ("text", "pos", "end")
+
+    def __init__(self, text: str, pos: int, end: int):
+        self.text = text
+        self.pos = pos
+        self.end = end
+
+    def next(self) -> Tuple[str, str, int]:
+        """Read the next token as (kind, text, offset)."""
+        match = _TOKEN_RE.match(self.text, self.pos, self.end)
+        if match is None:
+            return "eof", "", self.end
+        self.pos = match.end()
+        kind = match.lastgroup
+        token = match.group(kind)
+        return (token if kind == "punct" else kind), token, match.start(kind)
+
+    def peek(self) -> Tuple[str, str, int]:
+        pos = self.pos
+        token = self.next()
+        self.pos = pos
+        return token
+
+class LazyTable(Mapping):
+    """A table of a Lua table string that is only parsed when it is accessed.
+
+    The first access scans the direct entries of the table, jumping over
+    nested tables with the brace index. Nested tables are returned as
+    LazyTables themselves, so a lookup only parses the tables along its path.
+
+    Keys are the ones the dict model uses: entries of keyed tables under their
+    keys and "__name__" for the name of named tables, and positions as strings
+    for tables without keys. materialize() parses the whole table into the
+    value parse() would return for it.
+    """
+    __slots__ = ("name", "_text", "_index", "_start", "_open", "_close", "_key", "_root", "_make_numbers", "_entries", "_keys")
+
+    def __init__(self, text: str, index: _BraceIndex, name: Optional[str], start: int, open: int, close: int, key: Any = None, root: bool = False, make_numbers=_number_list):
+        self.name = name
+        self._text = text
+        self._index = index
+        self._start = start
+        self._open = open
+        self._close = close
+        self._key = key
+        self._root = root
+        self._make_numbers = make_numbers
+        self._entries = None
+        self._keys = None
+
+    def _scan(self):
+        """Read the direct entries of the table without parsing nested tables."""
+        cursor = _Cursor(self._text, self._open + 1, self._close)
+        entries = []
+        while True:
+            kind, token, offset = cursor.next()
+            if kind == "eof":
+                break
+            if kind == "," or kind == ";":
+                continue
+            key = None
+            if kind == "[":
+                key = _bracket_key(lambda: cursor.next()[:2])
+                kind, token, offset = cursor.next()
+            elif (kind == "word" or kind == "string") and cursor.peek()[0] == "=":
+                cursor.next()
+                key = token if kind == "word" else _string_value(token)
+                kind, token, offset = cursor.next()
+            entries.append([key, self._scan_value(cursor, kind, token, offset, key)])
+            if cursor.peek()[0] not in (",", ";", "eof"):
+                raise _ParseError("expected separator")
+
+        keys = {}
+        if any(key is not None for key, _ in entries):
+            numeric_index = 1
+            for i, entry in enumerate(entries):
+                key = entry[0]
+                if key is None:
+                    key = str(numeric_index)
+                    numeric_index += 1
+                    # Implicit numeric keys turn numbers into floats like in parse()
+                    value = entry[1]
+                    if isinstance(value, int) and not isinstance(value, bool):
+                        entry[1] = float(value)
+                keys[key if isinstance(key, str) else str(key)] = i
+        else:
+            for i in range(len(entries)):
+                keys[str(i)] = i
+        self._entries = entries
+        self._keys = keys
+
+    def _scan_value(self, cursor: _Cursor, kind: str, token: str, offset: int, key: Any) -> Any:
+        """Read a value, returning a LazyTable for nested tables."""
+        if kind == "{":
+            close = self._index.close(offset)
+            cursor.pos = close + 1
+            return LazyTable(self._text, self._index, None, offset, offset, close, key, make_numbers=self._make_numbers)
+        if kind == "numbers":
+            return self._make_numbers(token)
+        if kind == "string":
+            return _string_value(token)
+        if kind == "word":
+            next_kind, next_token, next_offset = cursor.peek()
+            if next_kind == "{":
+                close = self._index.close(next_offset)
+                cursor.pos = close + 1
+                return LazyTable(self._text, self._index, token, offset, next_offset, close, key, make_numbers=self._make_numbers)
+            if next_kind == "numbers":
+                cursor.next()
+                return _make_array(token, self._make_numbers(next_token), key)
+            return _word_value(token)
+        raise _ParseError(f"unexpected token {token!r}")
+
+    def _keyed_entries(self) -> Optional[List[Tuple[str, Any, Any]]]:
+        """List (key, source key, value) for the entries of a table with keys.
+
+        The key is the one of the dict model, the source key the one written in
+        the table. Returns None for tables without keys.
+        """
+        if self._keys is None:
+            self._scan()
+        if all(key is None for key, _ in self._entries):
+            return None
+        return [(key, *self._entries[i]) for key, i in self._keys.items()]
+
+    def __getitem__(self, key: Any) -> Any:
+        if self._keys is None:
+            self._scan()
+        if key == "__name__" and self.name is not None:
+            return self.name
+        if not isinstance(key, str):
+            key = str(key)
+        if key not in self._keys:
+            raise KeyError(key)
+        return self._entries[self._keys[key]][1]
+
+    def __iter__(self) -> Iterator[str]:
+        if self._keys is None:
+            self._scan()
+        yield from self._keys
+        if self.name is not None and "__name__" not in self._keys:
+            yield "__name__"
+
+    def __len__(self) -> int:
+        if self._keys is None:
+            self._scan()
+        return len(self._keys) + (self.name is not None and "__name__" not in self._keys)
+
+    def __repr__(self) -> str:
+        return f"LazyTable({self.name!r}, {self._start}:{self._close + 1})"
+
+    def materialize(self) -> Any:
+        """Parse the whole table into a list or dictionary."""
+        parser = _Parser(_tokenize(self._text, self._start, self._close + 1), make_numbers=self._make_numbers)
+        if self._root:
+            return parser.parse()
+        return parser.value(self._key)
+
+    def select(self, path: List[Any]) -> Any:
+        """Look up a value by a sequence of keys, returning a LazyTable for tables."""
+        value = self
+        for i, key in enumerate(path):
+            try:
+                if isinstance(value, LazyTable):
+                    value = value[key]
+                elif isinstance(value, (list, dict)):
+                    # Numeric tables are parsed eagerly into lists and named dictionaries
+                    value = value[int(key)] if isinstance(value, list) else value[key]
+                else:
+                    raise KeyError(key)
+            except (KeyError, IndexError, ValueError):
+                raise KeyError(".".join(str(k) for k in path[:i + 1]))
+        return value
+
+def parse_lazy(macro: str, numbers: str = "list") -> Any:
+    """Parse a Lua table string into a LazyTable that parses its entries on access.
+
+    A brace index of the whole string is built first. Values that are not
+    tables are parsed right away with parse(). Tables holding only numbers
+    are stored as described for parse().
+
+    Raises:
+        ValueError: If the braces of the input are unbalanced or the table is
+            malformed, which may only show when an entry is accessed
+    """
+    make_numbers = _numbers_factory(numbers)
+    index = _BraceIndex(macro)
+    cursor = _Cursor(macro, 0, len(macro))
+    kind, token, offset = cursor.next()
+    name = None
+    start = offset
+    if kind == "word" and cursor.peek()[0] == "{":
+        name = token
+        kind, token, offset = cursor.next()
+    if kind != "{":
+        return parse(macro, numbers=numbers)
+    close = index.close(offset)
+    cursor.pos = close + 1
+    if cursor.next()[0] != "eof":
+        raise _ParseError("unexpected content after value")
+    return LazyTable(macro, index, name, start, offset, close, root=True, make_numbers=make_numbers)
+
+def select(macro: str, path: str) -> Any:
+    """Parse only the value at a dot-separated path of keys, like Tools.Blur1.Inputs.
+
+    Raises:
+        KeyError: If there is no value at the path
+        ValueError: If the tables along the path are malformed
+    """
+    value = parse_lazy(macro)
+    if isinstance(value, LazyTable):
+        value = value.select(path.split("."))
+    elif path:
+        raise KeyError(path)
+    if isinstance(value, LazyTable):
+        return value.materialize()
+    return value
+
+def _manifest_string(obj: str) -> str:
+    """Quote a Python string as a Lua string."""
+    # Handle empty strings
+    if not obj:
+        return "''"
+    # If string contains both types of quotes, use double quotes and escape double quotes
+    if "'" in obj and '"' in obj:
+        escaped = obj.replace('"', '\\"')
+        return f'"{escaped}"'
+    # If string contains single quotes, use double quotes
+    if "'" in obj:
+        return f'"{obj}"'
+    # If string contains double quotes, use single quotes
+    if '"' in obj:
+        return f"'{obj}'"
+    # For simple strings without quotes, always quote them for consistency
+    return f"'{obj}'"
+
+def _named_table_key(k) -> str:
+    """Render the key of a named table entry including the equals sign."""
+    # Handle numeric keys (like array indices)
+    if isinstance(k, int) or (isinstance(k, str) and k.isdigit()):
+        return f"[{k}] = "
+    # Quote key only if it's not a valid identifier or contains special characters
+    key_str = k if isinstance(k, str) and k.isidentifier() and not any(c in k for c in " -'\"") else manifest(k)
+    return f"{key_str} = "
+
+def _table_key(k) -> str:
+    """Render the key of a regular table entry including the equals sign."""
+    # Handle numeric keys (like array indices)
+    if isinstance(k, int) or (isinstance(k, str) and k.isdigit()):
+        return f"[{k}] = "
+    # Use square bracket notation for keys with dots, regardless of quotes
+    if isinstance(k, str) and "." in k:
+        return f"[{manifest(k)}] = "
+    # Use square bracket notation for keys with special characters that make them invalid identifiers
+    if isinstance(k, str) and not all(c.isalnum() or c in "_- " for c in k):
+        # For keys with quotes but no dots, use simple quote notation
+        if '"' in k or "'" in k:
+            return f"{manifest(k)} = "
+        return f"[{manifest(k)}] = "
+    # For keys with spaces, hyphens, or quotes, use simple quote notation
+    key_str = k if isinstance(k, str) and k.isidentifier() else manifest(k)
+    return f"{key_str} = "
+
+def _iter_parts(obj, cache: Optional["ManifestCache"] = None, keys: Optional[Dict[int, Any]] = None) -> Iterator[str]:
+    """Yield the pieces of the Lua table string for a Python object in order.
+
+    Args:
+        obj: The Python object to convert
+        cache: Cache of rendered tables to look tables up in
+        keys: Structure keys of the tables in obj by their id, required with cache
+    """
     if obj is None:
-        return "nil"  # Return nil for None values
+        yield "nil"
     elif isinstance(obj, bool):
-        return str(obj).lower()
+        yield "true" if obj else "false"
     elif isinstance(obj, (int, float)):
-        return str(obj)
+        yield str(obj)
     elif isinstance(obj, str):
-        # Handle empty strings
-        if not obj:
-            return "''"
-        # If string contains both types of quotes, use double quotes and escape double quotes
-        if "'" in obj and '"' in obj:
-            escaped = obj.replace('"', '\\"')
-            return f'"{escaped}"'
-        # If string contains single quotes, use double quotes
-        if "'" in obj:
-            return f'"{obj}"'
-        # If string contains double quotes, use single quotes
-        if '"' in obj:
-            return f"'{obj}'"
-        # For simple strings without quotes, always quote them for consistency
-        return f"'{obj}'"
+        yield _manifest_string(obj)
+    elif cache is not None and id(obj) in keys:
+        key = keys[id(obj)]
+        text = cache.get(key)
+        if text is not None:
+            yield text
+            return
+        # Stream the table while collecting its text, unless it gets too long to be cached
+        parts = []
+        size = 0
+        for part in _iter_table_parts(obj, cache, keys):
+            if parts is not None:
+                parts.append(part)
+                size += len(part)
+                if size > cache.max_length:
+                    parts = None
+            yield part
+        if parts is not None:
+            cache.put(key, "".join(parts))
+    else:
+        yield from _iter_table_parts(obj, cache, keys)
+
+def _iter_table_parts(obj, cache: Optional["ManifestCache"], keys: Optional[Dict[int, Any]]) -> Iterator[str]:
+    """Yield the pieces of the Lua table string for a list, dictionary, LuaTable or typed array."""
+    if isinstance(obj, LuaTable):
+        yield from _iter_lua_table_parts(obj, cache, keys)
+    elif _is_numeric_array(obj):
+        if not len(obj):
+            yield "{}"
+            return
+        yield "{ " + _join_numbers(obj) + " }"
     elif isinstance(obj, list):
         if not obj:
-            return "{}"
+            yield "{}"
+            return
         # Add spaces around braces and after commas for arrays
-        return "{ " + ", ".join(manifest(x) for x in obj) + " }"
+        yield "{ "
+        for i, value in enumerate(obj):
+            if i:
+                yield ", "
+            yield from _iter_parts(value, cache, keys)
+        yield " }"
     elif isinstance(obj, dict):
         if not obj:
-            return "{}"
-        # Handle named tables
-        if "__name__" in obj:
+            yield "{}"
+            return
+        # Named tables keep their name under __name__, which is skipped instead of copying the dict
+        named = "__name__" in obj
+        if named:
             name = obj["__name__"]
-            obj_copy = obj.copy()
-            del obj_copy["__name__"]
-            if not obj_copy:
-                return f"{name} {{}}"
-            pairs = []
-            for k, v in obj_copy.items():
-                # Handle numeric keys (like array indices)
-                if isinstance(k, int) or (isinstance(k, str) and k.isdigit()):
-                    pairs.append(f"[{k}] = {manifest(v)}")
-                else:
-                    # Quote key only if it's not a valid identifier or contains special characters
-                    key_str = k if isinstance(k, str) and k.isidentifier() and not any(c in k for c in " -'\"") else manifest(k)
-                    pairs.append(f"{key_str} = {manifest(v)}")
-            # Add spaces around braces and after commas for named tables
-            return f"{name} {{ {', '.join(pairs)} }}"
-        # Handle regular tables
-        pairs = []
+            if len(obj) == 1:
+                yield f"{name} {{}}"
+                return
+            yield f"{name} {{ "
+        else:
+            yield "{ "
+        render_key = _named_table_key if named else _table_key
+        first = True
         for k, v in obj.items():
-            # Handle numeric keys (like array indices)
-            if isinstance(k, int) or (isinstance(k, str) and k.isdigit()):
-                pairs.append(f"[{k}] = {manifest(v)}")
-            else:
-                # Use square bracket notation for keys with dots, regardless of quotes
-                if isinstance(k, str) and "." in k:
-                    pairs.append(f"[{manifest(k)}] = {manifest(v)}")
-                # Use square bracket notation for keys with special characters that make them invalid identifiers
-                elif isinstance(k, str) and not all(c.isalnum() or c in "_- " for c in k):
-                    # For keys with quotes but no dots, use simple quote notation
-                    if ('"' in k or "'" in k) and "." not in k:
-                        pairs.append(f"{manifest(k)} = {manifest(v)}")
-                    else:
-                        pairs.append(f"[{manifest(k)}] = {manifest(v)}")
-                else:
-                    # For keys with spaces, hyphens, or quotes, use simple quote notation
-                    key_str = k if isinstance(k, str) and k.isidentifier() else manifest(k)
-                    pairs.append(f"{key_str} = {manifest(v)}")
-        # Add spaces around braces and after commas for regular tables
-        return "{ " + ", ".join(pairs) + " }"
+            if named and k == "__name__":
+                continue
+            if not first:
+                yield ", "
+            first = False
+            yield render_key(k)
+            yield from _iter_parts(v, cache, keys)
+        yield " }"
+    else:
+        raise ValueError(f"Unsupported type: {type(obj)}")
+
+# Reserved words of Lua, which cannot be written as bare keys
+_LUA_KEYWORDS = frozenset((
+    "and", "break", "do", "else", "elseif", "end", "false", "for", "function", "goto", "if", "in",
+    "local", "nil", "not", "or", "repeat", "return", "then", "true", "until", "while",
+))
+
+_LUA_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*\Z")
+
+def _lua_table_key(k) -> str:
+    """Render the key of a LuaTable hash entry including the equals sign."""
+    if isinstance(k, str):
+        if _LUA_IDENTIFIER.match(k) and k not in _LUA_KEYWORDS:
+            return f"{k} = "
+        return f"[{_manifest_string(k)}] = "
+    if isinstance(k, bool):
+        return f"[{'true' if k else 'false'}] = "
+    if isinstance(k, (int, float)):
+        return f"[{k}] = "
+    raise ValueError(f"Unsupported key type: {type(k)}")
+
+def _join_numbers(obj: Any) -> str:
+    """Render the numbers of a typed array separated by commas.
+
+    The numbers are converted with C-level tolist/map/join calls instead of
+    rendering each one through _iter_parts.
+    """
+    return ", ".join(map(repr, obj.tolist()))
+
+def _iter_lua_table_parts(obj: LuaTable, cache: Optional["ManifestCache"] = None, keys: Optional[Dict[int, Any]] = None) -> Iterator[str]:
+    """Yield the pieces of a LuaTable, its array part before its hash part."""
+    if obj.name is not None:
+        yield f"{obj.name} "
+    if obj.array is None and not obj._keys:
+        yield "{}"
+        return
+    yield "{ "
+    first = True
+    if obj.array is not None and _is_numeric_array(obj.array):
+        yield _join_numbers(obj.array)
+        first = False
+    elif obj.array is not None:
+        for value in obj.array:
+            if not first:
+                yield ", "
+            first = False
+            yield from _iter_parts(value, cache, keys)
+    if obj._keys:
+        for k, v in zip(obj._keys, obj._values):
+            if not first:
+                yield ", "
+            first = False
+            yield _lua_table_key(k)
+            yield from _iter_parts(v, cache, keys)
+    yield " }"
+
+class ManifestCache:
+    """A bounded LRU cache of rendered tables for manifest, keyed by table structure.
+
+    Tables with the same names, keys and values render to the same Lua text,
+    so a table that repeats within one object, or across calls using the same
+    cache, is only rendered once. The hits and misses counters tell how often
+    that happened.
+
+    Args:
+        maxsize: The number of rendered tables kept
+        max_length: Tables rendering to more characters than this are not kept
+    """
+
+    def __init__(self, maxsize: int = 4096, max_length: int = 65536):
+        self.maxsize = maxsize
+        self.max_length = max_length
+        self.hits = 0
+        self.misses = 0
+        self._texts = OrderedDict()
+        # Numbers of the table structures seen so far, see _structure_key
+        self._ids = {}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def get(self, key: Any) -> Optional[str]:
+        text = self._texts.get(key)
+        if text is None:
+            self.misses += 1
+            return None
+        self._texts.move_to_end(key)
+        self.hits += 1
+        return text
+
+    def put(self, key: Any, text: str):
+        self._texts[key] = text
+        self._texts.move_to_end(key)
+        if len(self._texts) > self.maxsize:
+            self._texts.popitem(last=False)
+
+    def structure_keys(self, obj) -> Dict[int, Any]:
+        """Compute the structure keys of the tables in obj by their id."""
+        if len(self._ids) > 64 * self.maxsize:
+            # Structure numbers are only reused together with the texts stored under them
+            self._ids.clear()
+            self._texts.clear()
+        keys = {}
+        _structure_key(obj, keys, self._ids)
+        return keys
+
+    def clear(self):
+        self._texts.clear()
+        self._ids.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._texts),
+            "maxsize": self.maxsize,
+        }
+
+def _structure_key(obj, keys: Dict[int, Any], ids: Dict[tuple, int]) -> Any:
+    """Compute a hashable key that is equal for values rendering to the same text.
+
+    Tables are keyed bottom-up: the entries of a table, with the keys of the
+    tables in it already computed, are interned in ids, and the table's key is
+    the number they were given. Every table is hashed once, over its own
+    entries, and looking its key up costs no more than looking up an integer.
+    Keys of all tables are also stored in keys by the id of the table. Numbers
+    and booleans are tagged with their type, because 1, 1.0 and True are equal
+    in Python but render differently.
+    """
+    if obj is None or type(obj) is str:
+        return obj
+    if isinstance(obj, float):
+        return (float, repr(obj))
+    if isinstance(obj, (bool, int)):
+        return (type(obj), obj)
+    if isinstance(obj, str):
+        return (str, str(obj))
+    if isinstance(obj, LuaTable):
+        array = None
+        if obj.array is not None:
+            array = _structure_key(obj.array, keys, ids) if _is_numeric_array(obj.array) else _entry_keys(obj.array, keys, ids)
+        hash = None
+        if obj._keys:
+            hash = (_entry_keys(obj._keys, keys, ids), _entry_keys(obj._values, keys, ids))
+        parts = ("T", obj.name, array, hash)
+    elif _is_numeric_array(obj):
+        typecode = obj.typecode if isinstance(obj, array) else obj.dtype.str
+        parts = ("A", typecode, obj.tobytes())
+    elif isinstance(obj, list):
+        parts = ("L", _entry_keys(obj, keys, ids))
+    elif isinstance(obj, dict):
+        parts = ("D", _entry_keys(obj, keys, ids), _entry_keys(obj.values(), keys, ids))
     else:
         raise ValueError(f"Unsupported type: {type(obj)}")
+    key = ids.get(parts)
+    if key is None:
+        key = ids[parts] = len(ids)
+    keys[id(obj)] = key
+    return key
+
+def _entry_keys(values: Iterable[Any], keys: Dict[int, Any], ids: Dict[tuple, int]) -> tuple:
+    """Compute the structure keys of the entries of a table, keeping strings, most keys and values, as they are."""
+    return tuple(value if type(value) is str else _structure_key(value, keys, ids) for value in values)
+
+def iter_manifest(obj, chunk_size: int = 65536, cache: Optional[ManifestCache] = None) -> Iterator[str]:
+    """Convert a Python object into a Lua table string, yielded in chunks.
+
+    Args:
+        obj: The Python object to convert
+        chunk_size: The number of characters collected before a chunk is yielded
+        cache: Reuse the text of tables rendered before with this cache
+    """
+    keys = None
+    if cache is not None:
+        keys = cache.structure_keys(obj)
+    parts = []
+    size = 0
+    for part in _iter_parts(obj, cache, keys):
+        parts.append(part)
+        size += len(part)
+        if size >= chunk_size:
+            yield "".join(parts)
+            parts = []
+            size = 0
+    if parts:
+        yield "".join(parts)
+
+def manifest_to(stream, obj, chunk_size: int = 65536, cache: Optional[ManifestCache] = None):
+    """Write a Python object as a Lua table string to a text file object."""
+    for chunk in iter_manifest(obj, chunk_size, cache):
+        stream.write(chunk)
+
+def manifest(obj, cache: Optional[ManifestCache] = None) -> str:
+    """Convert a Python object into a Lua table string."""
+    return "".join(iter_manifest(obj, cache=cache))
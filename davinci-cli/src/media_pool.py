@@ -0,0 +1,90 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+import src.davinci as davinci
+
+# Listing a media pool reads every clip's properties, which is slow for large
+# libraries. Listings are kept per folder with the IDs of the folder's clips,
+# so that a folder is only read again when clips were added or removed.
+
+def cache_dir() -> str:
+    """Get the directory of media pool listings in $XDG_CACHE_HOME/davinci-cli/."""
+    xdg_cache_home = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(xdg_cache_home, 'davinci-cli', 'media-pool')
+
+def folder_fingerprint(clip_ids: List[str]) -> str:
+    """Get a fingerprint of the number and the IDs of the clips of a folder."""
+    return hashlib.sha256(f"{len(clip_ids)}\0{chr(0).join(clip_ids)}".encode('utf-8')).hexdigest()
+
+def read_clip(folder_path: str, clip, clip_id: str) -> Dict[str, Any]:
+    """Read the name and all properties of a clip, with one call for the properties."""
+    return {
+        "folder": folder_path,
+        "unique_id": clip_id,
+        "name": clip.GetName(),
+        "properties": davinci.get_clip_properties(clip),
+    }
+
+class MediaPoolListing:
+    """The clips of the folders of a media pool, stored in a JSON file per project.
+
+    Args:
+        project: The name of the project
+        directory: The directory to keep listings in, cache_dir() by default
+    """
+
+    def __init__(self, project: str, directory: Optional[str] = None):
+        self.project = project
+        digest = hashlib.sha256(project.encode('utf-8')).hexdigest()
+        self.path = os.path.join(directory or cache_dir(), f"{digest}.json")
+        self.folders = {}
+        self.read = 0
+        self.changed = False
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("project") == project:
+            self.folders = data["folders"]
+
+    def list_folder(self, path: str, folder, full: bool = False) -> List[Dict[str, Any]]:
+        """Get the clips of a folder, reading their properties only if its clips changed.
+
+        Args:
+            path: The path of the folder in the media pool
+            folder: The Resolve folder
+            full: Read the properties even if the clips did not change
+        """
+        clips = folder.GetClipList() or []
+        clip_ids = [clip.GetUniqueId() for clip in clips]
+        fingerprint = folder_fingerprint(clip_ids)
+        previous = self.folders.get(path)
+        if not full and previous is not None and previous["fingerprint"] == fingerprint:
+            return previous["clips"]
+        records = [read_clip(path, clip, clip_id) for clip, clip_id in zip(clips, clip_ids)]
+        self.folders[path] = {"fingerprint": fingerprint, "clips": records}
+        self.read += 1
+        self.changed = True
+        return records
+
+    def keep(self, paths):
+        """Forget the folders that are not in paths, like folders that were deleted."""
+        folders = {path: listing for path, listing in self.folders.items() if path in paths}
+        if len(folders) != len(self.folders):
+            self.folders = folders
+            self.changed = True
+
+    def save(self):
+        """Write the listing to its file, if any folder changed."""
+        if not self.changed:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"project": self.project, "folders": self.folders}, f)
+        os.replace(temp_path, self.path)
+        logging.debug(f"Saved the listing of {len(self.folders)} media pool folders")
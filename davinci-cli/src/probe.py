@@ -0,0 +1,223 @@
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import time
+from typing import Any, Dict, Optional
+
+from src.containers import read_info
+
+DEFAULT_FFPROBE = '/opt/homebrew/bin/ffprobe'
+
+def ffprobe_path() -> str:
+    """Get the ffprobe executable, $DAVINCI_CLI_FFPROBE, ffprobe on PATH or the Homebrew one."""
+    path = os.environ.get('DAVINCI_CLI_FFPROBE')
+    if path:
+        return path
+    import shutil
+    return shutil.which('ffprobe') or DEFAULT_FFPROBE
+
+def cache_dir() -> str:
+    """Get the directory of the probe cache in $XDG_CACHE_HOME/davinci-cli/."""
+    xdg_cache_home = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(xdg_cache_home, 'davinci-cli', 'probe')
+
+class ProbeCache:
+    """A disk cache of ffprobe results, keyed by path, size and modification time.
+
+    Every probed path has one JSON file named after a hash of the path, so a
+    file that changed replaces its old entry. Entries are evicted when they
+    have not been used for max_age seconds, or, least recently used first,
+    when all entries together take more than max_size bytes.
+
+    Args:
+        directory: The directory to keep entries in, cache_dir() by default
+        max_size: The number of bytes all entries may take
+        max_age: The number of seconds an unused entry is kept
+        prune_interval: The number of seconds between evictions
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_size: int = 64 * 1024 * 1024,
+                 max_age: float = 30 * 24 * 3600, prune_interval: float = 3600):
+        self.directory = directory or cache_dir()
+        self.max_size = max_size
+        self.max_age = max_age
+        self.prune_interval = prune_interval
+
+    def _entry_path(self, path: str) -> str:
+        digest = hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def get(self, path: str, stat: os.stat_result) -> Optional[Dict[str, Any]]:
+        """Get the cached info of a file if it has not changed since it was probed."""
+        entry_path = self._entry_path(path)
+        try:
+            with open(entry_path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("path") != os.path.abspath(path) or entry.get("size") != stat.st_size or entry.get("mtime_ns") != stat.st_mtime_ns:
+            return None
+        # Entries are evicted least recently used first
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return entry["info"]
+
+    def put(self, path: str, stat: os.stat_result, info: Dict[str, Any]):
+        """Store the info of a file, as of the given stat."""
+        os.makedirs(self.directory, exist_ok=True)
+        entry_path = self._entry_path(path)
+        entry = {
+            "path": os.path.abspath(path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "info": info,
+        }
+        temp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(temp_path, entry_path)
+        self._maybe_prune()
+
+    def _maybe_prune(self):
+        marker = os.path.join(self.directory, '.pruned')
+        try:
+            if time.time() - os.stat(marker).st_mtime < self.prune_interval:
+                return
+        except FileNotFoundError:
+            pass
+        with open(marker, 'w'):
+            pass
+        self.prune()
+
+    def prune(self) -> int:
+        """Evict entries that are too old or do not fit into max_size and return how many were evicted."""
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for dir_entry in it:
+                    if dir_entry.name.endswith('.json'):
+                        stat = dir_entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, dir_entry.path))
+        except FileNotFoundError:
+            return 0
+
+        # Most recently used first, so that everything after the cutoff is evicted
+        entries.sort(reverse=True)
+        now = time.time()
+        total = 0
+        evicted = 0
+        for mtime, size, entry_path in entries:
+            total += size
+            if now - mtime > self.max_age or total > self.max_size:
+                try:
+                    os.unlink(entry_path)
+                    evicted += 1
+                except FileNotFoundError:
+                    pass
+        logging.debug(f"Evicted {evicted} of {len(entries)} probe cache entries")
+        return evicted
+
+def run_ffprobe(path: str) -> Optional[Dict[str, Any]]:
+    """Run ffprobe on a file and get its streams and format info, or None if that fails."""
+    command = [
+        ffprobe_path(),
+        '-v', 'error',
+        '-show_streams',
+        '-show_format',
+        '-of', 'json',
+        path
+    ]
+
+    try:
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    except OSError as e:
+        logging.error(f"Could not run {command[0]}: {str(e)}")
+        return None
+    if result.returncode != 0:
+        logging.error(f"Could not retrieve video information for {path}: {result.stderr}")
+        return None
+
+    try:
+        return json.loads(result.stdout)
+    except json.JSONDecodeError as e:
+        logging.error(f"Error parsing ffprobe output for {path}: {str(e)}")
+        return None
+
+def probe(path: str, cache: Optional[ProbeCache] = None, full: bool = False) -> Optional[Dict[str, Any]]:
+    """Get the ffprobe streams and format info of a file.
+
+    MP4, MOV and Matroska files are read by the header reader in
+    src.containers, which gives the video stream timing and resolution. Other
+    files, and all files if full is set, are probed with ffprobe, whose
+    results are cached until the file changes.
+
+    Args:
+        path: The media file to probe
+        cache: The cache to use, a ProbeCache in cache_dir() by default
+        full: Always get the complete ffprobe info
+    """
+    if not full:
+        info = read_info(path)
+        if info is not None:
+            logging.debug(f"Read probe info for {path} from its headers")
+            return info
+
+    try:
+        stat = os.stat(path)
+    except OSError as e:
+        logging.error(f"Could not probe {path}: {str(e)}")
+        return None
+
+    cache = cache or ProbeCache()
+    info = cache.get(path, stat)
+    if info is not None:
+        logging.debug(f"Using cached probe info for {path}")
+        return info
+
+    info = run_ffprobe(path)
+    if info is not None:
+        try:
+            cache.put(path, stat, info)
+        except OSError as e:
+            logging.warning(f"Could not cache probe info for {path}: {str(e)}")
+    return info
+
+def video_stream(info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Get the first video stream of ffprobe info."""
+    for stream in info.get("streams", []):
+        if stream.get("codec_type") == "video":
+            return stream
+    return None
+
+def parse_rate(rate: str) -> Optional[float]:
+    """Parse a frame rate like 24000/1001 or 25 into frames per second."""
+    try:
+        num, _, denom = rate.partition('/')
+        framerate = float(num) / float(denom or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return framerate if framerate > 0 else None
+
+def framerate(info: Dict[str, Any]) -> Optional[float]:
+    """Get the frame rate of the first video stream of ffprobe info."""
+    stream = video_stream(info)
+    if stream is None:
+        return None
+    return parse_rate(stream.get("r_frame_rate", ""))
+
+def summarize(info: Dict[str, Any]) -> Dict[str, Any]:
+    """Get the frame rate, resolution, duration and codec of the first video stream of ffprobe info."""
+    stream = video_stream(info) or {}
+    duration = info.get("format", {}).get("duration", stream.get("duration"))
+    return {
+        "framerate": framerate(info),
+        "width": stream.get("width"),
+        "height": stream.get("height"),
+        "duration": float(duration) if duration is not None else None,
+        "codec": stream.get("codec_name") or stream.get("codec_tag_string"),
+        "source": info.get("format", {}).get("probe", "ffprobe"),
+    }
@@ -0,0 +1,153 @@
+import hashlib
+import heapq
+import logging
+import os
+import subprocess
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+import src.davinci as davinci
+import src.probe as probe
+from src import timecode
+
+DEFAULT_FFMPEG = '/opt/homebrew/bin/ffmpeg'
+
+def ffmpeg_path() -> str:
+    """Get the ffmpeg executable, $DAVINCI_CLI_FFMPEG, ffmpeg on PATH or the Homebrew one."""
+    path = os.environ.get('DAVINCI_CLI_FFMPEG')
+    if path:
+        return path
+    import shutil
+    return shutil.which('ffmpeg') or DEFAULT_FFMPEG
+
+class ProxyJob(NamedTuple):
+    """A source file to make a proxy of, with the clips to link it to."""
+    file: str
+    proxy: str
+    clips: List[Tuple[str, Any]]
+    in_timeline: bool
+    width: Optional[int]
+    height: Optional[int]
+    framerate: Optional[float]
+
+    @property
+    def priority(self) -> int:
+        # Clips in the current timeline are the ones being played back now
+        return 0 if self.in_timeline else 1
+
+def has_valid_proxy(properties: Dict[str, Any]) -> bool:
+    """Check whether a clip is linked to a proxy file that exists."""
+    proxy = properties.get("Proxy Media Path")
+    return bool(proxy) and os.path.exists(proxy)
+
+def source_info(file: str, properties: Dict[str, Any]) -> Tuple[Optional[int], Optional[int], Optional[float]]:
+    """Get the width, height and frame rate of a source, from its clip properties or by probing it."""
+    width = height = None
+    try:
+        width, height = map(int, properties.get("Resolution", "").split('x'))
+    except ValueError:
+        pass
+    framerate = davinci.get_clip_framerate(properties)
+    if height is None or framerate is None:
+        info = probe.probe(file)
+        if info is not None:
+            summary = probe.summarize(info)
+            width = width or summary["width"]
+            height = height or summary["height"]
+            framerate = framerate or summary["framerate"]
+    return width, height, framerate
+
+def proxy_name(file: str) -> str:
+    """Get the file name of the proxy of a source, its name with a digest of its whole path.
+
+    Sources with the same name in different folders get different proxies,
+    also in one --out directory, so a proxy left by an earlier run is only
+    ever linked to its own source.
+    """
+    stem = os.path.splitext(os.path.basename(file))[0]
+    digest = hashlib.sha256(file.encode('utf-8')).hexdigest()[:8]
+    return f"{stem}-{digest}.mov"
+
+def plan(clips: Iterable[Tuple[str, Any]], timeline_files: Set[str], out_dir: Optional[str] = None) -> List[ProxyJob]:
+    """Find the source files of video clips without a valid proxy.
+
+    Args:
+        clips: The folder path and media pool item of every clip
+        timeline_files: The source files used in the current timeline
+        out_dir: The directory to write proxies to, a Proxy folder next to every source by default
+
+    Returns:
+        One job per source file, in the order of the clips
+    """
+    sources = {}
+    for folder, clip in clips:
+        properties = davinci.get_clip_properties(clip)
+        file = properties.get("File Path")
+        if not file or "Video" not in properties.get("Type", "Video") or has_valid_proxy(properties):
+            continue
+        # Clips of the same file share one proxy
+        if file in sources:
+            sources[file][1].append((f"{folder}/{clip.GetName()}", clip))
+        else:
+            sources[file] = (properties, [(f"{folder}/{clip.GetName()}", clip)])
+
+    jobs = []
+    for file, (properties, file_clips) in sources.items():
+        directory = out_dir or os.path.join(os.path.dirname(file), 'Proxy')
+        proxy = os.path.join(directory, proxy_name(file))
+        width, height, framerate = source_info(file, properties)
+        jobs.append(ProxyJob(file, proxy, file_clips, file in timeline_files, width, height, framerate))
+    return jobs
+
+def transcode_command(job: ProxyJob, height: int, output: str) -> List[str]:
+    """Get the ffmpeg command that makes a ProRes 422 Proxy of a source at most height pixels high."""
+    command = [ffmpeg_path(), '-hide_banner', '-loglevel', 'error', '-y', '-i', job.file, '-map', '0:v:0', '-map', '0:a?']
+    # Scaling down only, and to an even height as the codec needs
+    target = min(height, job.height or height) // 2 * 2
+    command += ['-vf', f'scale=-2:{target}']
+    if job.framerate:
+        # Resolve links proxies with the frame rate of their source, also for variable rate phone footage
+        rate = timecode.parse_rate(job.framerate)
+        command += ['-r', f"{rate.numerator}/{rate.denominator}"]
+    command += ['-c:v', 'prores_ks', '-profile:v', '0', '-c:a', 'pcm_s16le', '-f', 'mov', output]
+    return command
+
+def transcode(job: ProxyJob, height: int):
+    """Make the proxy of a job, writing it under a temporary name until ffmpeg succeeds."""
+    os.makedirs(os.path.dirname(job.proxy), exist_ok=True)
+    temp_path = os.path.join(os.path.dirname(job.proxy), f".{os.path.basename(job.proxy)}.{os.getpid()}.tmp")
+    command = transcode_command(job, height, temp_path)
+    logging.debug(f"Running {command}")
+    try:
+        result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed for {job.file}: {result.stderr.strip()[-1000:]}")
+        os.replace(temp_path, job.proxy)
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+def run_jobs(jobs: List[ProxyJob], height: int, workers: int) -> Iterator[Tuple[ProxyJob, Optional[Exception]]]:
+    """Transcode proxies with at most workers ffmpeg processes, yielding every job with its error as it finishes.
+
+    Jobs are started by priority, clips in the current timeline first, and in
+    their order otherwise.
+    """
+    queue = [(job.priority, index, job) for index, job in enumerate(jobs)]
+    heapq.heapify(queue)
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while queue or running:
+            while queue and len(running) < workers:
+                _, _, job = heapq.heappop(queue)
+                if os.path.exists(job.proxy):
+                    # Made for the same source by an earlier run that did not get to link it
+                    yield job, None
+                    continue
+                running[executor.submit(transcode, job, height)] = job
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = running.pop(future)
+                yield job, future.exception()
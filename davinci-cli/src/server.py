@@ -0,0 +1,198 @@
+import io
+import json
+import logging
+import os
+import socketserver
+import sys
+import traceback
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
+from typing import Dict, Iterator, List, Optional, TextIO
+
+from src.client import is_forwarded, is_running, send_message
+
+class _ClientStdin(io.TextIOBase):
+    """Stdin of a command run by the daemon, fetched from the client on first read."""
+
+    def __init__(self, rfile: TextIO, wfile: TextIO):
+        self._rfile = rfile
+        self._wfile = wfile
+        self._buffer = None
+
+    def _fetch(self) -> io.StringIO:
+        if self._buffer is None:
+            send_message(self._wfile, {"stdin": True})
+            message = json.loads(self._rfile.readline())
+            self._buffer = io.StringIO(message["stdin"])
+        return self._buffer
+
+    @property
+    def encoding(self) -> str:
+        return "utf-8"
+
+    def readable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        return False
+
+    def read(self, size: Optional[int] = -1) -> str:
+        # Stream wrappers probe with read(0), which must not ask the client for stdin
+        if size == 0:
+            return ""
+        return self._fetch().read(size)
+
+    def readline(self, size: Optional[int] = -1) -> str:
+        return self._fetch().readline(size)
+
+class _ClientOutput(io.TextIOBase):
+    """Stdout or stderr of a command run by the daemon, sent to the client as it is written."""
+
+    def __init__(self, wfile: TextIO, name: str):
+        self._wfile = wfile
+        self._name = name
+        self._connected = True
+
+    @property
+    def encoding(self) -> str:
+        return "utf-8"
+
+    def writable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        return False
+
+    def write(self, text: str) -> int:
+        # Click tells text streams from binary ones by whether they accept bytes
+        if not isinstance(text, str):
+            raise TypeError(f"write() argument must be str, not {type(text).__name__}")
+        if text and self._connected:
+            try:
+                send_message(self._wfile, {self._name: text})
+            except OSError:
+                # The client went away, e.g. its output was piped into head, but the command still finishes
+                logging.warning(f"Client closed the connection, dropping the rest of its {self._name}")
+                self._connected = False
+        return len(text)
+
+@contextmanager
+def _client_context(cwd: Optional[str], env: Optional[Dict[str, str]]) -> Iterator[None]:
+    """Run in the working directory and with the forwarded environment variables of a client."""
+    original_cwd = os.getcwd()
+    original_env = {name: value for name, value in os.environ.items() if is_forwarded(name)}
+    try:
+        if cwd is not None:
+            os.chdir(cwd)
+        if env is not None:
+            for name in original_env:
+                if name not in env:
+                    del os.environ[name]
+            os.environ.update(env)
+        yield
+    finally:
+        os.chdir(original_cwd)
+        if env is not None:
+            for name in [name for name in os.environ if is_forwarded(name)]:
+                del os.environ[name]
+            os.environ.update(original_env)
+
+def run_command(cli, args: List[str], stdin: TextIO, cwd: Optional[str] = None, env: Optional[Dict[str, str]] = None,
+                stdout: Optional[TextIO] = None, stderr: Optional[TextIO] = None) -> dict:
+    """Run a CLI command in this process and get its exit code and output.
+
+    Args:
+        cli: The click group to run the command with
+        args: The command line arguments, without the program name
+        stdin: The stream the command reads stdin from
+        cwd: The directory to run the command in, the current one by default
+        env: The forwarded environment variables of the client, see src.client.forwarded_environment
+        stdout: The stream to write stdout to as the command runs, captured into the result by default
+        stderr: The stream to write stderr to as the command runs, captured into the result by default
+
+    Returns:
+        The exit code, with the stdout and stderr that were captured
+    """
+    captured = {}
+    if stdout is None:
+        stdout = captured["stdout"] = io.StringIO()
+    if stderr is None:
+        stderr = captured["stderr"] = io.StringIO()
+    if args[:1] in (["serve"], ["batch"]):
+        stderr.write(f"davinci {args[0]} cannot be run from another command\n")
+        exit_code = 1
+    elif cwd is not None and not os.path.isdir(cwd):
+        # The client runs in a directory that was removed since
+        stderr.write(f"No such directory: {cwd}\n")
+        exit_code = 1
+    else:
+        exit_code = _run(cli, args, stdin, cwd, env, stdout, stderr)
+    return {"exit_code": exit_code, **{name: stream.getvalue() for name, stream in captured.items()}}
+
+def _run(cli, args: List[str], stdin: TextIO, cwd: Optional[str], env: Optional[Dict[str, str]], stdout: TextIO, stderr: TextIO) -> int:
+    original_stdin = sys.stdin
+    sys.stdin = stdin
+    try:
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                with _client_context(cwd, env):
+                    cli.main(args=args, prog_name="davinci")
+                return 0
+            except SystemExit as e:
+                return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except Exception as e:
+                logging.error(f"Command {args} failed: {str(e)}")
+                traceback.print_exc()
+                # The Resolve handle may have gone stale, e.g. because Resolve was restarted
+                import src.davinci as davinci
+                davinci.reset_resolve()
+                return 1
+    finally:
+        sys.stdin = original_stdin
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        rfile = io.TextIOWrapper(self.rfile, encoding="utf-8")
+        wfile = io.TextIOWrapper(self.wfile, encoding="utf-8", write_through=True)
+        for line in rfile:
+            request = json.loads(line)
+            logging.debug(f"Running command {request['args']}")
+            response = run_command(
+                self.server.cli, request["args"], _ClientStdin(rfile, wfile), request.get("cwd"), request.get("env"),
+                _ClientOutput(wfile, "stdout"), _ClientOutput(wfile, "stderr"))
+            try:
+                send_message(wfile, response)
+            except OSError:
+                logging.warning(f"Client closed the connection before {request['args']} finished")
+                return
+
+class Server(socketserver.UnixStreamServer):
+    """A Unix socket server running CLI commands one at a time.
+
+    Commands are not run concurrently, because they share the Resolve handle,
+    the clipboard and the redirected standard streams of this process.
+    """
+
+    def __init__(self, cli, path: str):
+        self.cli = cli
+        if os.path.exists(path):
+            if is_running(path):
+                raise OSError(f"davinci serve is already listening on {path}")
+            os.unlink(path)
+        super().__init__(path, _Handler)
+        os.chmod(path, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except FileNotFoundError:
+            pass
+
+def serve(cli, path: str):
+    """Serve CLI commands on a Unix socket until interrupted."""
+    with Server(cli, path) as server:
+        logging.info(f"Serving on {path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logging.info("Stopped serving")
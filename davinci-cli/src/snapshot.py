@@ -0,0 +1,137 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, Iterator, List, Optional
+
+# A snapshot is every item of a timeline, kept on disk between dumps. Every
+# dump still fingerprints every track, at four calls per clip and three per
+# subtitle, and only reads a track again, at five more calls per clip and one
+# more per subtitle, when its fingerprint changed.
+
+TRACK_TYPES = ("video", "audio", "subtitle")
+
+def snapshot_dir() -> str:
+    """Get the directory of timeline snapshots in $XDG_CACHE_HOME/davinci-cli/."""
+    xdg_cache_home = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(xdg_cache_home, 'davinci-cli', 'snapshots')
+
+def item_fingerprint(item, track_type: str) -> List[Any]:
+    """Get the unique ID, start and end of a timeline item, and the left offset of clips.
+
+    These change when an item is added, removed, moved, trimmed or slipped,
+    but not when it is renamed or relinked to other media.
+    """
+    fingerprint = [item.GetUniqueId(), item.GetStart(), item.GetEnd()]
+    if track_type != "subtitle":
+        fingerprint.append(item.GetLeftOffset())
+    return fingerprint
+
+def track_fingerprint(fingerprints: List[List[Any]]) -> str:
+    """Get a digest of the fingerprints of every item of a track."""
+    return hashlib.sha256(json.dumps(fingerprints).encode('utf-8')).hexdigest()
+
+def read_item(item, track_type: str, track: int, fingerprint: Optional[List[Any]] = None) -> Dict[str, Any]:
+    """Read everything a snapshot keeps of a timeline item, reusing the values of its fingerprint if given."""
+    if fingerprint is None:
+        fingerprint = item_fingerprint(item, track_type)
+    record = {
+        "track_type": track_type,
+        "track": track,
+        "unique_id": fingerprint[0],
+        "name": item.GetName(),
+        "start": fingerprint[1],
+        "end": fingerprint[2],
+    }
+    if track_type != "subtitle":
+        record["left_offset"] = fingerprint[3]
+        record["right_offset"] = item.GetRightOffset()
+        # Generators and titles have no media pool item
+        media_pool_item = item.GetMediaPoolItem()
+        record["media_pool_item"] = media_pool_item.GetUniqueId() if media_pool_item else None
+        record["file"] = (media_pool_item.GetClipProperty("File Path") or None) if media_pool_item else None
+    return record
+
+class TimelineSnapshot:
+    """The items of a timeline, by unique ID, stored in a JSON file per project and timeline.
+
+    Timelines are told apart by their unique ID, as timelines in different
+    bins may have the same name.
+
+    Args:
+        project: The name of the project of the timeline
+        timeline_id: The unique ID of the timeline
+        directory: The directory to keep snapshots in, snapshot_dir() by default
+    """
+
+    def __init__(self, project: str, timeline_id: str, directory: Optional[str] = None):
+        self.project = project
+        self.timeline_id = timeline_id
+        digest = hashlib.sha256(f"{project}\0{timeline_id}".encode('utf-8')).hexdigest()
+        self.path = os.path.join(directory or snapshot_dir(), f"{digest}.json")
+        self.tracks = {}
+        self.items = {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("project") == project and data.get("timeline_id") == timeline_id:
+            self.tracks = data["tracks"]
+            self.items = data["items"]
+
+    def refresh(self, timeline, full: bool = False) -> int:
+        """Read the tracks of a timeline that changed since the snapshot was taken.
+
+        Renaming items or relinking them to other media does not change the
+        fingerprint of their track, so such changes need a full refresh.
+
+        Args:
+            timeline: The Resolve timeline
+            full: Read every track again, even if it looks unchanged
+
+        Returns:
+            The number of tracks that were read
+        """
+        tracks = {}
+        read = 0
+        for track_type in TRACK_TYPES:
+            for track in range(1, (timeline.GetTrackCount(track_type) or 0) + 1):
+                key = f"{track_type}/{track}"
+                items = timeline.GetItemListInTrack(track_type, track) or []
+                fingerprints = [item_fingerprint(item, track_type) for item in items]
+                fingerprint = track_fingerprint(fingerprints)
+                previous = self.tracks.get(key)
+                if not full and previous is not None and previous["fingerprint"] == fingerprint:
+                    tracks[key] = previous
+                    continue
+                # The values of the fingerprints are not fetched again
+                records = [read_item(item, track_type, track, values) for item, values in zip(items, fingerprints)]
+                records.sort(key=lambda record: record["start"])
+                for record in records:
+                    self.items[record["unique_id"]] = record
+                tracks[key] = {"fingerprint": fingerprint, "items": [record["unique_id"] for record in records]}
+                read += 1
+
+        self.tracks = tracks
+        # Items of tracks that were read again or removed are dropped
+        kept = {unique_id for track in tracks.values() for unique_id in track["items"]}
+        self.items = {unique_id: record for unique_id, record in self.items.items() if unique_id in kept}
+        logging.debug(f"Read {read} of the {len(tracks)} tracks of timeline {self.timeline_id}")
+        return read
+
+    def iter_items(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over the items by track type, track and start."""
+        for track_type in TRACK_TYPES:
+            keys = sorted((key for key in self.tracks if key.startswith(f"{track_type}/")), key=lambda key: int(key.split("/")[1]))
+            for key in keys:
+                for unique_id in self.tracks[key]["items"]:
+                    yield self.items[unique_id]
+
+    def save(self):
+        """Write the snapshot to its file."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"project": self.project, "timeline_id": self.timeline_id, "tracks": self.tracks, "items": self.items}, f)
+        os.replace(temp_path, self.path)
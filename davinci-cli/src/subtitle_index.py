@@ -0,0 +1,208 @@
+import hashlib
+import logging
+import os
+import sqlite3
+from operator import attrgetter
+from typing import Any, Dict, List, Optional, Sequence
+
+from src import timecode
+from src.subtitles import Subtitle
+
+# Subtitle text of every indexed track is kept in an SQLite full text index.
+# Tracks are keyed by project, the unique ID of their timeline, as timelines
+# in different bins may have the same name, and track number. They are only
+# read again when the boundaries of their cues change, which costs two calls
+# per cue instead of the three of reading the cues.
+
+# Indexes of other schema versions are dropped and built again from Resolve
+_SCHEMA_VERSION = 2
+
+_DROP_SCHEMA = """
+DROP TABLE IF EXISTS cues_text;
+DROP TABLE IF EXISTS cues;
+DROP TABLE IF EXISTS tracks;
+"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    id INTEGER PRIMARY KEY,
+    project TEXT NOT NULL,
+    timeline_id TEXT NOT NULL,
+    timeline TEXT NOT NULL,
+    track INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    frame_rate TEXT NOT NULL,
+    drop_frame INTEGER NOT NULL,
+    UNIQUE (project, timeline_id, track)
+);
+CREATE TABLE IF NOT EXISTS cues (
+    id INTEGER PRIMARY KEY,
+    track_id INTEGER NOT NULL REFERENCES tracks (id),
+    start_frame INTEGER NOT NULL,
+    end_frame INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cues_track_id ON cues (track_id);
+-- Kept in step with cues a track at a time, which is much faster than triggers for every row
+CREATE VIRTUAL TABLE IF NOT EXISTS cues_text USING fts5 (text, content='cues', content_rowid='id');
+"""
+
+def index_path() -> str:
+    """Get the path of the subtitle index in $XDG_CACHE_HOME/davinci-cli/."""
+    xdg_cache_home = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(xdg_cache_home, 'davinci-cli', 'subtitles.sqlite3')
+
+def fingerprint(boundaries: Sequence[tuple]) -> str:
+    """Get a fingerprint of the number and the start and end frames of the cues of a track."""
+    digest = hashlib.sha256(f"{len(boundaries)}".encode('ascii'))
+    for start, end in boundaries:
+        digest.update(f",{start}-{end}".encode('ascii'))
+    return digest.hexdigest()
+
+class SubtitleIndex:
+    """A full text index of subtitle tracks on disk.
+
+    Args:
+        path: The SQLite database to keep the index in, index_path() by default
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or index_path()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(self.path, timeout=10)
+        # The index can be rebuilt from Resolve, so it does not need to survive power loss
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+            self.connection.executescript(_DROP_SCHEMA)
+        self.connection.executescript(_SCHEMA)
+        self.connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+    def __enter__(self) -> 'SubtitleIndex':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def refresh(self, project: str, timeline_id: str, timeline_name: str, timeline, tracks: Optional[Sequence[int]] = None) -> int:
+        """Bring the index of a timeline up to date, reading only the tracks whose cues moved.
+
+        Args:
+            project: The name of the project of the timeline
+            timeline_id: The unique ID of the timeline
+            timeline_name: The name of the timeline, shown in hits
+            timeline: The Resolve timeline
+            tracks: The subtitle tracks to refresh, all by default
+
+        Returns:
+            The number of tracks that were read again
+        """
+        track_count = timeline.GetTrackCount("subtitle") or 0
+        frame_rate = timeline.GetSetting("timelineFrameRate")
+        drop_frame = int(timeline.GetSetting("timelineDropFrameTimecode") == "1")
+        known = {
+            track: (track_id, track_fingerprint, track_frame_rate, track_drop_frame)
+            for track_id, track, track_fingerprint, track_frame_rate, track_drop_frame in self.connection.execute(
+                "SELECT id, track, fingerprint, frame_rate, drop_frame FROM tracks WHERE project = ? AND timeline_id = ?",
+                (project, timeline_id))
+        }
+
+        rebuilt = 0
+        with self.connection:
+            # The timeline may have been renamed
+            self.connection.execute(
+                "UPDATE tracks SET timeline = ? WHERE project = ? AND timeline_id = ? AND timeline != ?",
+                (timeline_name, project, timeline_id, timeline_name))
+            for track, (track_id, *_) in known.items():
+                if track > track_count:
+                    self._delete_track(track_id)
+            for track in tracks or range(1, track_count + 1):
+                if not 1 <= track <= track_count:
+                    continue
+                items = timeline.GetItemListInTrack("subtitle", track) or []
+                boundaries = [(item.GetStart(), item.GetEnd()) for item in items]
+                track_fingerprint = fingerprint(boundaries)
+                previous = known.get(track)
+                if previous is not None:
+                    if previous[1:] == (track_fingerprint, frame_rate, drop_frame):
+                        continue
+                    self._delete_track(previous[0])
+
+                subtitles = [Subtitle(item.GetName(), start, end) for item, (start, end) in zip(items, boundaries)]
+                subtitles.sort(key=attrgetter("start"))
+                track_id = self.connection.execute(
+                    "INSERT INTO tracks (project, timeline_id, timeline, track, fingerprint, frame_rate, drop_frame) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (project, timeline_id, timeline_name, track, track_fingerprint, frame_rate, drop_frame)).lastrowid
+                self.connection.executemany(
+                    "INSERT INTO cues (track_id, start_frame, end_frame, text) VALUES (?, ?, ?, ?)",
+                    ((track_id, subtitle.start, subtitle.end, subtitle.text) for subtitle in subtitles))
+                self.connection.execute("INSERT INTO cues_text (rowid, text) SELECT id, text FROM cues WHERE track_id = ?", (track_id,))
+                rebuilt += 1
+        logging.debug(f"Indexed {rebuilt} of the subtitle tracks of {timeline_name}")
+        return rebuilt
+
+    def prune(self, project: str, timeline_ids: Sequence[str]) -> int:
+        """Remove the timelines of a project whose unique IDs are not in timeline_ids and return how many tracks were removed."""
+        placeholders = ", ".join("?" * len(timeline_ids))
+        rows = self.connection.execute(
+            f"SELECT id FROM tracks WHERE project = ? AND timeline_id NOT IN ({placeholders})",
+            (project, *timeline_ids)).fetchall()
+        with self.connection:
+            for track_id, in rows:
+                self._delete_track(track_id)
+        return len(rows)
+
+    def _delete_track(self, track_id: int):
+        self.connection.execute(
+            "INSERT INTO cues_text (cues_text, rowid, text) SELECT 'delete', id, text FROM cues WHERE track_id = ?", (track_id,))
+        self.connection.execute("DELETE FROM cues WHERE track_id = ?", (track_id,))
+        self.connection.execute("DELETE FROM tracks WHERE id = ?", (track_id,))
+
+    def search(self, query: str, project: str, timeline_ids: Optional[Sequence[str]] = None,
+               tracks: Optional[Sequence[int]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Find the cues whose text contains a phrase.
+
+        Args:
+            query: The words to find, in this order
+            project: The name of the project to search
+            timeline_ids: The unique IDs of the timelines to search, all of the project by default
+            tracks: The track numbers to search, all by default
+            limit: The maximum number of hits
+
+        Returns:
+            The hits by timeline, track and start, with their frames and the timecode of their start
+        """
+        sql = """
+            SELECT tracks.timeline_id, tracks.timeline, tracks.track, tracks.frame_rate, tracks.drop_frame, cues.start_frame, cues.end_frame, cues.text
+            FROM cues_text JOIN cues ON cues.id = cues_text.rowid JOIN tracks ON tracks.id = cues.track_id
+            WHERE cues_text MATCH ? AND tracks.project = ?"""
+        # Words are searched as one phrase, so that quotes and operators in the query are plain text
+        parameters = ['"' + query.replace('"', '""') + '"', project]
+        if timeline_ids is not None:
+            sql += f" AND tracks.timeline_id IN ({', '.join('?' * len(timeline_ids))})"
+            parameters.extend(timeline_ids)
+        if tracks:
+            sql += f" AND tracks.track IN ({', '.join('?' * len(tracks))})"
+            parameters.extend(tracks)
+        sql += " ORDER BY tracks.timeline, tracks.timeline_id, cues.start_frame, tracks.track"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+
+        hits = []
+        for timeline_id, timeline_name, track, frame_rate, drop_frame, start, end, text in self.connection.execute(sql, parameters):
+            hits.append({
+                "timeline": timeline_name,
+                "timeline_id": timeline_id,
+                "track": track,
+                "start": start,
+                "end": end,
+                "timecode": timecode.timebase(frame_rate, bool(drop_frame)).timecode(start),
+                "text": text,
+            })
+        return hits
@@ -1,155 +1,308 @@
+import io
 import logging
 import json
-import xml.etree.ElementTree as ET
-import xml.dom.minidom as minidom
+import os
+import re
+from contextlib import ExitStack
+from heapq import merge
+from operator import attrgetter
+from typing import Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+from src import timecode
 from src.davinci import get_current_timeline
 
-def extract_subtitles(timeline, track_num):
-    """Extract subtitle items from a specific track into a list of objects with text, start, and end."""
-    subtitle_objects = []
-    
-    items = timeline.GetItemListInTrack("subtitle", track_num)
-    items = sorted(items, key=lambda item: item.GetStart())
+class Subtitle(NamedTuple):
+    """A subtitle cue, with the fields in the order of the JSON output."""
+    text: str
+    start: int
+    end: int
 
-    for item in items:
-        subtitle_objects.append({
-            "text": item.GetName(),
-            "start": item.GetStart(),
-            "end": item.GetEnd()
-        })
+def extract_subtitles(timeline, track_num) -> List[Subtitle]:
+    """Extract subtitle items from a specific track into a list of subtitles sorted by start."""
+    items = timeline.GetItemListInTrack("subtitle", track_num) or []
 
-    return subtitle_objects
+    # Every field is a call into Resolve, so each is fetched once
+    subtitles = [Subtitle(item.GetName(), item.GetStart(), item.GetEnd()) for item in items]
+    # Tracks are usually in order already, which makes this a single pass
+    subtitles.sort(key=attrgetter("start"))
 
-def export_subtitles(tracks):
+    return subtitles
+
+def iter_subtitles(timeline, tracks) -> Iterator[Subtitle]:
+    """Iterate over the subtitles of several tracks by start, merging the sorted tracks.
+
+    Subtitles with the same start keep the order of their tracks.
+    """
+    return merge(*(extract_subtitles(timeline, track_num) for track_num in tracks), key=attrgetter("start"))
+
+def export_subtitles(tracks) -> List[Subtitle]:
     """Export subtitles from specified tracks."""
     try:
         timeline = get_current_timeline()
-        
-        all_subtitles = []
-        for track_num in tracks:
-            track_subtitles = extract_subtitles(timeline, track_num)
-            all_subtitles.extend(track_subtitles)
-        
-        all_subtitles = sorted(all_subtitles, key=lambda subtitle: subtitle["start"])
-        
-        return all_subtitles
+        return list(iter_subtitles(timeline, tracks))
     except Exception as e:
         logging.error(f"Failed to export subtitles: {str(e)}")
         raise
 
-def format_subtitles(subtitles, format_type="text"):
-    """Format subtitles according to the specified format type."""
+FORMATS = ('text', 'json', 'srt', 'ttml', 'vtt')
+
+def timeline_frame_rate(timeline=None) -> float:
+    """Get the frame rate of a timeline, the current one by default."""
+    timeline = timeline or get_current_timeline()
+    return float(timeline.GetSetting("timelineFrameRate"))
+
+def timeline_start_frame(timeline=None) -> int:
+    """Get the first frame of a timeline, the current one by default, which subtitle times count from."""
+    timeline = timeline or get_current_timeline()
+    return int(timeline.GetStartFrame())
+
+def _timing(frame_rate: Optional[float], start_frame: Optional[int]) -> Tuple[float, int]:
+    """Fill in the frame rate and start frame that were not given from the current timeline."""
+    if frame_rate is None or start_frame is None:
+        timeline = get_current_timeline()
+        if frame_rate is None:
+            frame_rate = timeline_frame_rate(timeline)
+        if start_frame is None:
+            start_frame = timeline_start_frame(timeline)
+    return frame_rate, start_frame
+
+def write_subtitles(subtitles: Iterable[Subtitle], format_type: str, stream: TextIO,
+                    frame_rate: Optional[float] = None, start_frame: Optional[int] = None) -> int:
+    """Write subtitles to a text stream one at a time, in the specified format.
+
+    Args:
+        subtitles: The subtitles, sorted by start
+        format_type: One of FORMATS
+        stream: The text stream to write to
+        frame_rate: The frame rate of the subtitle frames, that of the current timeline by default
+        start_frame: The frame at time zero, the start frame of the current timeline by default
+
+    Returns:
+        The number of subtitles written
+    """
     if format_type == "json":
-        return json.dumps(subtitles, indent=2)
+        return write_json(subtitles, stream)
     elif format_type == "text":
-        return "\n".join([subtitle["text"] for subtitle in subtitles])
-    elif format_type == "srt":
-        return format_srt(subtitles)
+        return write_text(subtitles, stream)
+
+    if format_type not in FORMATS:
+        raise ValueError(f"Unsupported format: {format_type}")
+    frame_rate, start_frame = _timing(frame_rate, start_frame)
+    if format_type == "srt":
+        return write_srt(subtitles, stream, frame_rate, start_frame)
     elif format_type == "ttml":
-        return format_ttml(subtitles)
+        return write_ttml(subtitles, stream, frame_rate, start_frame)
     else:
-        raise ValueError(f"Unsupported format: {format_type}")
+        return write_vtt(subtitles, stream, frame_rate, start_frame)
+
+def write_outputs(subtitles: Iterable[Subtitle], outputs: List[Tuple[str, TextIO]],
+                  frame_rate: Optional[float] = None, start_frame: Optional[int] = None) -> int:
+    """Write the same subtitles in several formats, fetching them and the timeline settings once.
+
+    Args:
+        subtitles: The subtitles, sorted by start
+        outputs: Pairs of one of FORMATS and the text stream to write it to
+        frame_rate: The frame rate of the subtitle frames, that of the current timeline by default
+        start_frame: The frame at time zero, the start frame of the current timeline by default
+
+    Returns:
+        The number of subtitles written to each output
+    """
+    subtitles = list(subtitles)
+    if any(format_type not in ("text", "json") for format_type, _ in outputs):
+        frame_rate, start_frame = _timing(frame_rate, start_frame)
+    for format_type, stream in outputs:
+        write_subtitles(subtitles, format_type, stream, frame_rate, start_frame)
+    return len(subtitles)
+
+# The file extension of every format when exporting to a directory
+EXTENSIONS = {'text': 'txt', 'json': 'json', 'srt': 'srt', 'ttml': 'ttml', 'vtt': 'vtt'}
+
+class TimelineSubtitles(NamedTuple):
+    """The subtitles of a timeline with the settings that are needed to write them."""
+    name: str
+    subtitles: List[Subtitle]
+    frame_rate: float
+    start_frame: int
+
+def fetch_timeline_subtitles(timeline, tracks=None) -> TimelineSubtitles:
+    """Read the subtitles of a timeline, from all subtitle tracks by default."""
+    tracks = tracks or range(1, (timeline.GetTrackCount("subtitle") or 0) + 1)
+    return TimelineSubtitles(
+        timeline.GetName(),
+        list(iter_subtitles(timeline, tracks)),
+        timeline_frame_rate(timeline),
+        timeline_start_frame(timeline),
+    )
+
+def file_stem(name: str) -> str:
+    """Turn a timeline name into a file name without an extension."""
+    return re.sub(r'[\\/:*?"<>|\x00-\x1f]', '_', name).strip(' .') or '_'
+
+def write_paths(subtitles: Iterable[Subtitle], outputs: List[Tuple[str, str]],
+                frame_rate: Optional[float] = None, start_frame: Optional[int] = None) -> int:
+    """Write the same subtitles in several formats to files, in the same way as export writes them to stdout.
+
+    Every file is written under a temporary name first, so existing files are
+    only replaced once all formats were written, and are kept if anything fails.
+
+    Args:
+        subtitles: The subtitles, sorted by start
+        outputs: Pairs of one of FORMATS and the path of the file to write it to
+        frame_rate: The frame rate of the subtitle frames, that of the current timeline by default
+        start_frame: The frame at time zero, the start frame of the current timeline by default
+
+    Returns:
+        The number of subtitles written to each file
+    """
+    temp_paths = [f"{path}.{os.getpid()}.tmp" for _, path in outputs]
+    try:
+        with ExitStack() as stack:
+            streams = [
+                (format_type, stack.enter_context(open(temp_path, 'w', encoding='utf-8')))
+                for (format_type, _), temp_path in zip(outputs, temp_paths)
+            ]
+            count = write_outputs(subtitles, streams, frame_rate, start_frame)
+            for _, stream in streams:
+                stream.write("\n")
+        for (_, path), temp_path in zip(outputs, temp_paths):
+            os.replace(temp_path, path)
+    finally:
+        for temp_path in temp_paths:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+    return count
+
+def write_files(fetched: TimelineSubtitles, outputs: List[Tuple[str, str]]) -> int:
+    """Write the subtitles of a timeline to files, see write_paths.
+
+    Args:
+        fetched: The subtitles of the timeline
+        outputs: Pairs of one of FORMATS and the path of the file to write it to
+
+    Returns:
+        The number of subtitles written to each file
+    """
+    return write_paths(fetched.subtitles, outputs, fetched.frame_rate, fetched.start_frame)
+
+def format_subtitles(subtitles, format_type="text"):
+    """Format subtitles according to the specified format type."""
+    stream = io.StringIO()
+    write_subtitles(subtitles, format_type, stream)
+    return stream.getvalue()
+
+def write_text(subtitles: Iterable[Subtitle], stream: TextIO) -> int:
+    """Write the text of subtitles, one per line."""
+    count = 0
+    for subtitle in subtitles:
+        if count:
+            stream.write("\n")
+        stream.write(subtitle.text)
+        count += 1
+    return count
+
+def write_json(subtitles: Iterable[Subtitle], stream: TextIO) -> int:
+    """Write subtitles as a JSON array, formatted like json.dumps with an indent of 2."""
+    count = 0
+    for subtitle in subtitles:
+        stream.write(",\n  " if count else "[\n  ")
+        stream.write(json.dumps(subtitle._asdict(), indent=2).replace("\n", "\n  "))
+        count += 1
+    stream.write("\n]" if count else "[]")
+    return count
+
+def _since(frame: int, start_frame: int) -> int:
+    """Count a frame from start_frame, clamping frames before it to zero."""
+    # Cues may start before the timeline does, but subtitle files have no negative times
+    return max(frame - start_frame, 0)
+
+def write_srt(subtitles: Iterable[Subtitle], stream: TextIO, frame_rate: float, start_frame: int = 0) -> int:
+    """Write subtitles as SRT, with times counted from start_frame."""
+    clock = timecode.timebase(frame_rate).clock
+    count = 0
+    for i, subtitle in enumerate(subtitles, 1):
+        start_time = clock(_since(subtitle.start, start_frame), ",")
+        end_time = clock(_since(subtitle.end, start_frame), ",")
+        if i > 1:
+            stream.write("\n")
+        stream.write(f"{i}\n{start_time} --> {end_time}\n{subtitle.text}\n")
+        count = i
+    return count
 
 def format_srt(subtitles):
     """Format subtitles as SRT."""
-    timeline = get_current_timeline()
-    frame_rate = float(timeline.GetSetting("timelineFrameRate"))
-    
-    srt_lines = []
-    for i, subtitle in enumerate(subtitles, 1):
-        # Convert frame numbers to time using the actual frame rate
-        start_time = format_time_srt(subtitle["start"], frame_rate)
-        end_time = format_time_srt(subtitle["end"], frame_rate)
-        srt_lines.append(f"{i}\n{start_time} --> {end_time}\n{subtitle['text']}\n")
-    return "\n".join(srt_lines)
+    return format_subtitles(subtitles, "srt")
 
 def format_time_srt(frames, fps=24):
     """Convert frame number to SRT time format (HH:MM:SS,mmm)."""
-    seconds = frames / fps
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    seconds = seconds % 60
-    milliseconds = int((seconds % 1) * 1000)
-    seconds = int(seconds)
-    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
+    return timecode.timebase(fps).clock(frames, ",")
+
+def write_vtt(subtitles: Iterable[Subtitle], stream: TextIO, frame_rate: float, start_frame: int = 0) -> int:
+    """Write subtitles as WebVTT, with times counted from start_frame."""
+    clock = timecode.timebase(frame_rate).clock
+    stream.write("WEBVTT\n")
+    count = 0
+    for subtitle in subtitles:
+        start_time = clock(_since(subtitle.start, start_frame))
+        end_time = clock(_since(subtitle.end, start_frame))
+        # A blank line would end the cue early
+        lines = [_escape_vtt(line) for line in subtitle.text.splitlines() if line.strip()]
+        stream.write(f"\n{start_time} --> {end_time}\n")
+        stream.write("".join(f"{line}\n" for line in lines))
+        count += 1
+    return count
+
+def format_time_vtt(frames, fps=24):
+    """Convert frame number to WebVTT time format (HH:MM:SS.mmm)."""
+    return timecode.timebase(fps).clock(frames)
+
+def _escape_vtt(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+# The TTML document around the cues, as pretty printed by minidom in earlier versions
+_TTML_HEAD = """<?xml version="1.0" ?>
+<tt xmlns="http://www.w3.org/ns/ttml" xmlns:ttm="http://www.w3.org/ns/ttml#metadata" xmlns:tts="http://www.w3.org/ns/ttml#styling" xmlns:ttp="http://www.w3.org/ns/ttml#parameter" xmlns:ittp="http://www.w3.org/ns/ttml/profile/imsc1#parameter" xmlns:itts="http://www.w3.org/ns/ttml/profile/imsc1#styling" xml:lang="en" ttp:profile="http://www.w3.org/ns/ttml/profile/imsc1/text" ttp:frameRate="{frame_rate}" ttp:timeBase="media">
+  <head>
+    <styling>
+      <style xml:id="default_style" tts:color="#ffffff" tts:opacity="1" tts:fontSize="100%" tts:fontFamily="default" tts:fontWeight="bold" tts:textAlign="center"/>
+    </styling>
+    <layout>
+      <region xml:id="default_region" tts:origin="7.919% 83.140%" tts:extent="84.193% 16.898%" tts:displayAlign="center"/>
+    </layout>
+  </head>
+  <body>"""
+_TTML_DIV = '\n    <div xml:id="d0" region="default_region" style="default_style"'
+_TTML_TAIL = "\n  </body>\n</tt>"
+
+def write_ttml(subtitles: Iterable[Subtitle], stream: TextIO, frame_rate: float, start_frame: int = 0) -> int:
+    """Write subtitles as pretty printed TTML, with times counted from start_frame."""
+    clock = timecode.timebase(frame_rate).clock
+    stream.write(_TTML_HEAD.format(frame_rate=_escape_ttml(str(frame_rate))))
+    count = 0
+    for subtitle in subtitles:
+        if not count:
+            stream.write(_TTML_DIV + ">")
+        start_time = clock(_since(subtitle.start, start_frame))
+        end_time = clock(_since(subtitle.end, start_frame))
+        if subtitle.text:
+            # XML parsers read all line breaks as \n
+            text = _escape_ttml(subtitle.text.replace("\r\n", "\n").replace("\r", "\n"))
+            cue = f'      <p begin="{start_time}" end="{end_time}">{text}</p>'
+        else:
+            cue = f'      <p begin="{start_time}" end="{end_time}"/>'
+        # Lines of only whitespace are left out, also within the text
+        stream.write("".join(f"\n{line}" for line in cue.split("\n") if line.strip()))
+        count += 1
+    stream.write("\n    </div>" if count else _TTML_DIV + "/>")
+    stream.write(_TTML_TAIL)
+    return count
 
 def format_ttml(subtitles):
     """Format subtitles as TTML with pretty printing."""
-    timeline = get_current_timeline()
-    frame_rate = float(timeline.GetSetting("timelineFrameRate"))
-    
-    # Create the root element
-    root = ET.Element("tt", {
-        "xml:lang": "en",
-        "xmlns": "http://www.w3.org/ns/ttml",
-        "xmlns:ttm": "http://www.w3.org/ns/ttml#metadata",
-        "xmlns:tts": "http://www.w3.org/ns/ttml#styling",
-        "xmlns:ttp": "http://www.w3.org/ns/ttml#parameter",
-        "xmlns:ittp": "http://www.w3.org/ns/ttml/profile/imsc1#parameter",
-        "xmlns:itts": "http://www.w3.org/ns/ttml/profile/imsc1#styling",
-        "ttp:profile": "http://www.w3.org/ns/ttml/profile/imsc1/text",
-        "ttp:frameRate": str(frame_rate),
-        "ttp:timeBase": "media"
-    })
-    
-    # Create head element
-    head = ET.SubElement(root, "head")
-    
-    # Create styling element
-    styling = ET.SubElement(head, "styling")
-    style = ET.SubElement(styling, "style", {
-        "xml:id": "default_style",
-        "tts:color": "#ffffff",
-        "tts:opacity": "1",
-        "tts:fontSize": "100%",
-        "tts:fontFamily": "default",
-        "tts:fontWeight": "bold",
-        "tts:textAlign": "center"
-    })
-    
-    # Create layout element
-    layout = ET.SubElement(head, "layout")
-    region = ET.SubElement(layout, "region", {
-        "xml:id": "default_region",
-        "tts:origin": "7.919% 83.140%",
-        "tts:extent": "84.193% 16.898%",
-        "tts:displayAlign": "center"
-    })
-    
-    # Create body element
-    body = ET.SubElement(root, "body")
-    
-    # Create div element
-    div = ET.SubElement(body, "div", {
-        "xml:id": "d0",
-        "region": "default_region",
-        "style": "default_style"
-    })
-    
-    # Add subtitle paragraphs
-    for subtitle in subtitles:
-        start_time = format_time_ttml(subtitle["start"], frame_rate)
-        end_time = format_time_ttml(subtitle["end"], frame_rate)
-        p = ET.SubElement(div, "p", {
-            "begin": start_time,
-            "end": end_time
-        })
-        p.text = subtitle["text"]
-    
-    # Convert to string with proper XML declaration and pretty print
-    xml_str = ET.tostring(root, encoding='unicode', method='xml')
-    dom = minidom.parseString(xml_str)
-    pretty_xml = dom.toprettyxml(indent="  ")
-    
-    # Remove empty lines that minidom adds
-    pretty_xml = '\n'.join([line for line in pretty_xml.split('\n') if line.strip()])
-    
-    return pretty_xml
+    return format_subtitles(subtitles, "ttml")
+
+def _escape_ttml(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace('"', "&quot;").replace(">", "&gt;")
 
 def format_time_ttml(frames, fps=24):
     """Convert frame number to TTML time format (HH:MM:SS.mmm)."""
-    seconds = frames / fps
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    seconds = seconds % 60
-    return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}" 
+    return timecode.timebase(fps).clock(frames)
@@ -0,0 +1,122 @@
+from fractions import Fraction
+from functools import lru_cache
+from typing import Iterable, List, Union
+
+# Frames are converted with integer arithmetic on the exact frame rate, so
+# that NTSC rates like 24000/1001 do not drift the way float seconds do.
+# Everything that only depends on the rate is computed once per rate.
+
+Rate = Union[int, float, str, Fraction]
+
+# Above this many frames per cycle the millisecond table is not worth building
+_MAX_TABLE = 1_000_000
+
+def parse_rate(rate: Rate) -> Fraction:
+    """Parse a frame rate like 25, "23.976", 29.97 or "30000/1001" into an exact fraction.
+
+    Resolve reports NTSC rates rounded, like 23.976 or 29.97, so rates close to
+    n * 1000/1001 are mapped to exactly that.
+    """
+    if isinstance(rate, float):
+        fps = Fraction(rate).limit_denominator(1_000_000)
+    else:
+        fps = Fraction(rate)
+    if fps <= 0:
+        raise ValueError(f"Invalid frame rate: {rate}")
+    if fps.denominator not in (1, 1001):
+        nominal = round(fps * Fraction(1001, 1000))
+        ntsc = Fraction(nominal * 1000, 1001)
+        if abs(fps - ntsc) < Fraction(1, 100):
+            return ntsc
+    return fps
+
+class Timebase:
+    """Exact conversions of frame counts into clock times and SMPTE timecodes at one frame rate.
+
+    Args:
+        fps: The exact frame rate
+        drop_frame: Whether SMPTE timecodes skip frame numbers to follow the clock,
+            only possible at 30000/1001 and 60000/1001
+    """
+
+    def __init__(self, fps: Fraction, drop_frame: bool = False):
+        self.fps = fps
+        # Timecodes count frames per second at the rounded rate, 30 for 29.97
+        self.nominal = max(1, round(fps))
+        self.drop_frame = drop_frame
+        if drop_frame:
+            if fps.denominator != 1001 or self.nominal not in (30, 60):
+                raise ValueError(f"Drop frame timecode needs a rate of 29.97 or 59.94, not {float(fps):g}")
+            # 2 frame numbers (4 at 59.94) are skipped every minute except every tenth
+            self._dropped = self.nominal // 15
+            self._frames_per_minute = self.nominal * 60 - self._dropped
+            self._frames_per_10_minutes = self.nominal * 600 - self._dropped * 9
+
+        # Frame times repeat every numerator frames, which take denominator seconds
+        self._cycle_frames = fps.numerator
+        self._cycle_milliseconds = fps.denominator * 1000
+        self._table = None
+
+    def _milliseconds_table(self) -> List[int]:
+        if self._table is None:
+            numerator, scaled = self._cycle_frames, self._cycle_milliseconds
+            self._table = [i * scaled // numerator for i in range(numerator)]
+        return self._table
+
+    def milliseconds(self, frames: int) -> int:
+        """Get the start time of a frame in whole milliseconds, rounded down."""
+        if frames < 0:
+            raise ValueError(f"Negative frame count: {frames}")
+        if self._cycle_frames > _MAX_TABLE:
+            return frames * self._cycle_milliseconds // self._cycle_frames
+        cycles, frame = divmod(frames, self._cycle_frames)
+        return cycles * self._cycle_milliseconds + self._milliseconds_table()[frame]
+
+    def clock(self, frames: int, separator: str = ".") -> str:
+        """Format the start time of a frame as HH:MM:SS.mmm, with another separator before the milliseconds if given."""
+        hours, milliseconds = divmod(self.milliseconds(frames), 3_600_000)
+        minutes, milliseconds = divmod(milliseconds, 60_000)
+        seconds, milliseconds = divmod(milliseconds, 1000)
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{milliseconds:03d}"
+
+    def timecode(self, frames: int) -> str:
+        """Format a frame as an SMPTE timecode, HH:MM:SS:FF, or HH:MM:SS;FF with drop frame."""
+        if frames < 0:
+            raise ValueError(f"Negative frame count: {frames}")
+        if self.drop_frame:
+            tens, frame = divmod(frames, self._frames_per_10_minutes)
+            frames += self._dropped * 9 * tens
+            if frame > self._dropped:
+                frames += self._dropped * ((frame - self._dropped) // self._frames_per_minute)
+        seconds, frame = divmod(frames, self.nominal)
+        minutes, seconds = divmod(seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        separator = ";" if self.drop_frame else ":"
+        return f"{hours % 24:02d}:{minutes:02d}:{seconds:02d}{separator}{frame:02d}"
+
+@lru_cache(maxsize=64)
+def timebase(rate: Rate, drop_frame: bool = False) -> Timebase:
+    """Get the Timebase of a frame rate, shared by all conversions at that rate."""
+    return Timebase(parse_rate(rate), drop_frame)
+
+def frames_to_timecodes(frames: Iterable[int], rate: Rate, drop_frame: bool = False) -> List[str]:
+    """Convert frames, like the starts of a whole track, to SMPTE timecodes.
+
+    Args:
+        frames: The frame numbers, counted from timecode 00:00:00:00
+        rate: The frame rate, as accepted by parse_rate
+        drop_frame: Whether to use drop frame timecode
+    """
+    return list(map(timebase(rate, drop_frame).timecode, frames))
+
+def frames_to_clock_times(frames: Iterable[int], rate: Rate, start_frame: int = 0, separator: str = ".") -> List[str]:
+    """Convert frames, like the starts of a whole track, to HH:MM:SS.mmm clock times.
+
+    Args:
+        frames: The frame numbers
+        rate: The frame rate, as accepted by parse_rate
+        start_frame: The frame at clock time zero, like the start frame of a timeline
+        separator: The separator before the milliseconds, "," for SRT
+    """
+    clock = timebase(rate).clock
+    return [clock(frame - start_frame, separator) for frame in frames]
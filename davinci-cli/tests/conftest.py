@@ -0,0 +1,21 @@
+import sys
+
+import pytest
+
+import src.davinci as davinci
+from tests import fake_resolve
+
+@pytest.fixture
+def resolve(monkeypatch, tmp_path):
+    """Connect commands to a fake Resolve with an open project and timeline."""
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path))
+    monkeypatch.setitem(sys.modules, "DaVinciResolveScript", fake_resolve)
+    timeline = fake_resolve.FakeTimeline(subtitles={1: [
+        fake_resolve.FakeItem("World", 86448, 86472),
+        fake_resolve.FakeItem("Hello", 86400, 86424),
+    ]})
+    monkeypatch.setattr(fake_resolve, "resolve", fake_resolve.FakeResolve(fake_resolve.FakeProject("Demo", timeline)))
+    monkeypatch.setattr(fake_resolve, "scriptapp_calls", 0)
+    davinci.reset_resolve()
+    yield fake_resolve.resolve
+    davinci.reset_resolve()
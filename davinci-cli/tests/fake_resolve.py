@@ -0,0 +1,185 @@
+"""An in-process stand-in for the DaVinciResolveScript module.
+
+The resolve fixture in conftest.py installs it as DaVinciResolveScript,
+so that commands can be run without Resolve. Tests build the
+objects they need and assign them to `resolve`.
+"""
+
+import itertools
+
+_unique_ids = itertools.count(1)
+
+class FakeItem:
+    def __init__(self, name, start, end, unique_id=None):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.unique_id = unique_id or f"item-{next(_unique_ids)}"
+
+    def GetUniqueId(self):
+        return self.unique_id
+
+    def GetName(self):
+        return self.name
+
+    def GetStart(self):
+        return self.start
+
+    def GetEnd(self):
+        return self.end
+
+    def GetDuration(self):
+        return self.end - self.start
+
+class FakeMediaPoolItem:
+    def __init__(self, properties=None):
+        self.properties = properties or {}
+        self.unique_id = f"clip-{next(_unique_ids)}"
+
+    def GetUniqueId(self):
+        return self.unique_id
+
+    def GetClipProperty(self, name=None):
+        if name is None:
+            return dict(self.properties)
+        return self.properties.get(name, "")
+
+    def LinkProxyMedia(self, path):
+        self.properties["Proxy Media Path"] = path
+        return True
+
+class FakeVideoItem(FakeItem):
+    def __init__(self, name, start, end, media_pool_item=None, left_offset=0, right_offset=0):
+        super().__init__(name, start, end)
+        self.media_pool_item = media_pool_item
+        self.left_offset = left_offset
+        self.right_offset = right_offset
+
+    def GetLeftOffset(self):
+        return self.left_offset
+
+    def GetRightOffset(self):
+        return self.right_offset
+
+    def GetMediaPoolItem(self):
+        return self.media_pool_item
+
+class FakeClip(FakeMediaPoolItem):
+    def __init__(self, name, properties=None):
+        super().__init__(properties)
+        self.name = name
+
+    def GetName(self):
+        return self.name
+
+class FakeFolder:
+    def __init__(self, name, clips=None, subfolders=None):
+        self.name = name
+        self.clips = clips or []
+        self.subfolders = subfolders or []
+
+    def GetName(self):
+        return self.name
+
+    def GetClipList(self):
+        return list(self.clips)
+
+    def GetSubFolderList(self):
+        return list(self.subfolders)
+
+class FakeMediaPool:
+    def __init__(self, root=None):
+        self.root = root or FakeFolder("Master")
+
+    def GetRootFolder(self):
+        return self.root
+
+class FakeTimeline:
+    def __init__(self, name="Timeline 1", framerate="24", start_frame=86400, subtitles=None, video_item=None, drop_frame=False, video=None, audio=None):
+        self.name = name
+        self.framerate = framerate
+        self.drop_frame = drop_frame
+        self.start_frame = start_frame
+        self.subtitles = subtitles or {}
+        self.video = video or {}
+        self.audio = audio or {}
+        self.video_item = video_item
+        self.unique_id = f"timeline-{next(_unique_ids)}"
+
+    def _tracks(self, track_type):
+        return {"video": self.video, "audio": self.audio, "subtitle": self.subtitles}.get(track_type, {})
+
+    def GetName(self):
+        return self.name
+
+    def GetUniqueId(self):
+        return self.unique_id
+
+    def GetSetting(self, name):
+        return {"timelineFrameRate": self.framerate, "timelineDropFrameTimecode": "1" if self.drop_frame else "0"}.get(name, "")
+
+    def GetStartFrame(self):
+        return self.start_frame
+
+    def GetEndFrame(self):
+        return max((item.end for items in self.subtitles.values() for item in items), default=self.start_frame)
+
+    def GetTrackCount(self, track_type):
+        return len(self._tracks(track_type))
+
+    def GetItemListInTrack(self, track_type, index):
+        return list(self._tracks(track_type).get(index, []))
+
+    def GetCurrentVideoItem(self):
+        return self.video_item
+
+class FakeProject:
+    def __init__(self, name="Project 1", timeline=None, media_pool=None, timelines=None):
+        self.name = name
+        self.timeline = timeline
+        self.media_pool = media_pool or FakeMediaPool()
+        self.timelines = timelines
+
+    def _timelines(self):
+        # Without a list of timelines, the project has just the current one
+        if self.timelines is not None:
+            return self.timelines
+        return [self.timeline] if self.timeline else []
+
+    def GetTimelineCount(self):
+        return len(self._timelines())
+
+    def GetTimelineByIndex(self, index):
+        timelines = self._timelines()
+        return timelines[index - 1] if 1 <= index <= len(timelines) else None
+
+    def GetMediaPool(self):
+        return self.media_pool
+
+    def GetName(self):
+        return self.name
+
+    def GetCurrentTimeline(self):
+        return self.timeline
+
+class FakeProjectManager:
+    def __init__(self, project=None):
+        self.project = project
+
+    def GetCurrentProject(self):
+        return self.project
+
+class FakeResolve:
+    def __init__(self, project=None):
+        self.project_manager = FakeProjectManager(project)
+
+    def GetProjectManager(self):
+        return self.project_manager
+
+resolve = None
+scriptapp_calls = 0
+
+def scriptapp(name):
+    global scriptapp_calls
+    scriptapp_calls += 1
+    return resolve
@@ -0,0 +1,59 @@
+import json
+
+from click.testing import CliRunner
+
+from src.cli import cli
+from tests import fake_resolve
+
+def run_batch(lines, *options):
+    result = CliRunner().invoke(cli, ["batch", *options], input="\n".join(lines) + "\n")
+    return [json.loads(line) for line in result.output.splitlines()]
+
+def test_batch_runs_operations_in_order(resolve):
+    """Test that operations run in order with one Resolve connection and results keep their ids."""
+    results = run_batch([
+        json.dumps({"id": "a", "args": ["project", "get"]}),
+        "",
+        json.dumps({"id": "b", "args": ["comp", "convert"], "stdin": '{"Value": 1}'}),
+        json.dumps({"args": ["timeline", "subtitles", "export", "--track", "1"]}),
+    ])
+    assert [result.get("id") for result in results] == ["a", "b", None]
+    assert [result["line"] for result in results] == [1, 3, 4]
+    assert json.loads(results[0]["stdout"]) == {"name": "Demo"}
+    assert results[1]["stdout"] == "{ Value = 1 }\n"
+    assert results[2]["stdout"] == "Hello\nWorld\n"
+    assert all(result["exit_code"] == 0 for result in results)
+    assert fake_resolve.scriptapp_calls == 1
+
+def test_batch_reports_errors_and_continues(resolve):
+    """Test that invalid and failing operations are reported without stopping the batch."""
+    results = run_batch([
+        "not json",
+        json.dumps({"args": "project get"}),
+        json.dumps({"args": ["nope"]}),
+        json.dumps({"args": ["batch"]}),
+        json.dumps({"args": ["project", "get"]}),
+    ])
+    assert [result["exit_code"] for result in results] == [1, 1, 2, 1, 0]
+    assert "invalid JSON" in results[0]["stderr"]
+    assert "args must be a list of strings" in results[1]["stderr"]
+
+def test_batch_fail_fast(resolve):
+    """Test that --fail-fast stops after the first failed operation."""
+    results = run_batch([
+        json.dumps({"args": ["nope"]}),
+        json.dumps({"args": ["project", "get"]}),
+    ], "--fail-fast")
+    assert len(results) == 1
+
+def test_batch_reports_failing_commands(resolve):
+    """Test that commands failing to find Resolve objects fail their operation, the batch and --fail-fast."""
+    resolve.project_manager.project = None
+    lines = [json.dumps({"args": ["project", "get"]}), json.dumps({"args": ["timeline", "get"]})]
+    result = CliRunner().invoke(cli, ["batch"], input="\n".join(lines) + "\n")
+    results = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [result["exit_code"] for result in results] == [1, 1]
+    assert results[0]["stderr"] == "no project is currently open\n"
+    assert result.exit_code == 1
+
+    assert len(run_batch(lines, "--fail-fast")) == 1
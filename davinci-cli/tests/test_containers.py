@@ -0,0 +1,61 @@
+import pytest
+
+import src.probe as probe
+from benchmarks.media import make_mkv, make_mp4
+from src.containers import read_info
+
+@pytest.mark.parametrize("kwargs,rate,duration", [
+    ({}, "24000/1001", "10.010000"),
+    ({"timescale": 600, "delta": 25, "moov_at_end": True}, "24/1", "10.000000"),
+    ({"timescale": 25, "delta": 1, "frames": 50, "width": 3840, "height": 2160}, "25/1", "2.000000"),
+])
+def test_read_mp4(tmp_path, kwargs, rate, duration):
+    """Test reading frame rate, resolution and duration from MP4 headers."""
+    path = tmp_path / "video.mp4"
+    make_mp4(str(path), payload_size=1000, **kwargs)
+    info = read_info(str(path))
+    stream = info["streams"][0]
+    assert stream["codec_type"] == "video"
+    assert stream["r_frame_rate"] == rate
+    assert (stream["width"], stream["height"]) == (kwargs.get("width", 1920), kwargs.get("height", 1080))
+    assert info["format"]["duration"] == duration
+    assert probe.framerate(info) == probe.parse_rate(rate)
+
+@pytest.mark.parametrize("default_duration,rate", [
+    (41708333, "24000/1001"),
+    (40000000, "25/1"),
+    (16683333, "60000/1001"),
+])
+def test_read_matroska(tmp_path, default_duration, rate):
+    """Test reading the video track of a Matroska file after its audio track."""
+    path = tmp_path / "video.mkv"
+    make_mkv(str(path), width=1280, height=720, default_duration=default_duration, duration_ms=2500.0, payload_size=1000)
+    info = read_info(str(path))
+    stream = info["streams"][0]
+    assert stream["r_frame_rate"] == rate
+    assert (stream["width"], stream["height"]) == (1280, 720)
+    assert info["format"]["duration"] == "2.500000"
+
+def test_read_unsupported_or_broken_files(tmp_path):
+    """Test that files the header reader cannot handle give None."""
+    text = tmp_path / "notes.txt"
+    text.write_text("not a video file")
+    empty = tmp_path / "empty.mp4"
+    empty.write_bytes(b"")
+    truncated = tmp_path / "truncated.mkv"
+    make_mkv(str(truncated), payload_size=1000)
+    truncated.write_bytes(truncated.read_bytes()[:60])
+    for path in [text, empty, truncated, tmp_path / "missing.mov"]:
+        assert read_info(str(path)) is None
+
+def test_probe_falls_back_to_ffprobe(tmp_path, monkeypatch):
+    """Test that probe uses the header reader and ffprobe only for other files."""
+    monkeypatch.setenv("DAVINCI_CLI_FFPROBE", str(tmp_path / "no-ffprobe"))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    video = tmp_path / "video.mov"
+    make_mp4(str(video), payload_size=1000)
+    assert probe.probe(str(video))["format"]["probe"] == "header"
+    assert probe.probe(str(video), full=True) is None
+    other = tmp_path / "video.avi"
+    other.write_bytes(b"RIFF" + bytes(100))
+    assert probe.probe(str(other)) is None
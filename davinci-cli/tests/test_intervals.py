@@ -0,0 +1,93 @@
+import json
+import random
+
+from click.testing import CliRunner
+
+from src.cli import cli
+from src.intervals import IntervalTree, TimelineIndex
+from tests import fake_resolve
+
+def test_tree_matches_a_scan():
+    """Test point and range queries against scanning all intervals."""
+    random.seed(0)
+    intervals = []
+    for i in range(2000):
+        start = random.randint(0, 5000)
+        intervals.append((start, start + random.choice([0, 1, 5, 50, 500, 3000]), i))
+    tree = IntervalTree(intervals)
+    by_start = sorted((interval for interval in intervals if interval[1] > interval[0]), key=lambda interval: interval[0])
+    assert len(tree) == len(by_start)
+    for _ in range(300):
+        point = random.randint(-10, 9000)
+        assert tree.at(point) == [value for start, end, value in by_start if start <= point < end]
+        start = random.randint(-10, 9000)
+        end = start + random.randint(1, 300)
+        assert tree.overlapping(start, end) == [value for s, e, value in by_start if s < end and e > start]
+
+def test_intervals_are_half_open():
+    tree = IntervalTree([(10, 20, "a"), (20, 30, "b")])
+    assert tree.at(19) == ["a"]
+    assert tree.at(20) == ["b"]
+    assert tree.at(30) == []
+    assert tree.overlapping(0, 10) == []
+    assert tree.overlapping(19, 21) == ["a", "b"]
+    assert tree.overlapping(25, 25) == []
+    assert IntervalTree([]).at(0) == []
+
+def test_timeline_index_by_track():
+    items = [
+        {"track_type": "video", "track": 1, "start": 0, "end": 10},
+        {"track_type": "video", "track": 2, "start": 5, "end": 15},
+        {"track_type": "audio", "track": 1, "start": 0, "end": 20},
+    ]
+    index = TimelineIndex(items)
+    assert index.at(7) == [items[0], items[2], items[1]]
+    assert index.at(7, track_type="video") == [items[0], items[1]]
+    assert index.at(7, track=1) == [items[2], items[0]]
+    assert index.overlapping(12, 30, "video", 2) == [items[1]]
+
+def test_items_command(resolve, monkeypatch, tmp_path):
+    """Test that every query gets the items on all tracks, tagged with the query."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    resolve.project_manager.project.timeline = fake_resolve.FakeTimeline(
+        video={1: [fake_resolve.FakeVideoItem("a", 86400, 86448), fake_resolve.FakeVideoItem("b", 86448, 86472)]},
+        subtitles={1: [fake_resolve.FakeItem("Hello", 86440, 86460)]},
+    )
+    result = CliRunner().invoke(cli, ["timeline", "items", "--at", "86447", "--range", "86450:86500", "--at", "90000"])
+    assert result.exit_code == 0
+    hits = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [(hit["query"], hit["name"]) for hit in hits] == [
+        ("86447", "a"), ("86447", "Hello"), ("86450:86500", "Hello"), ("86450:86500", "b"),
+    ]
+
+    result = CliRunner().invoke(cli, ["timeline", "items", "--at", "86447", "--track-type", "subtitle"])
+    assert [json.loads(line)["name"] for line in result.stdout.splitlines()] == ["Hello"]
+
+def test_items_command_follows_moved_items(resolve, monkeypatch, tmp_path):
+    """Test that moving an item between the first and last one of a track is seen by the next query."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    timeline = fake_resolve.FakeTimeline(video={1: [
+        fake_resolve.FakeVideoItem("a", 86400, 86448),
+        fake_resolve.FakeVideoItem("b", 86448, 86472),
+        fake_resolve.FakeVideoItem("c", 86700, 86724),
+    ]})
+    resolve.project_manager.project.timeline = timeline
+
+    def names(*args):
+        result = CliRunner().invoke(cli, ["timeline", "items", *args])
+        assert result.exit_code == 0
+        return [(hit["query"], hit["name"]) for hit in map(json.loads, result.stdout.splitlines())]
+
+    assert names("--at", "86450", "--at", "86610") == [("86450", "b")]
+    middle = timeline.video[1][1]
+    middle.start, middle.end = 86600, 86624
+    assert names("--at", "86450", "--at", "86610") == [("86610", "b")]
+
+    # Renames keep the fingerprint of the track, so they need --full
+    middle.name = "renamed"
+    assert names("--at", "86610") == [("86610", "b")]
+    assert names("--at", "86610", "--full") == [("86610", "renamed")]
+
+def test_items_command_needs_a_query(resolve):
+    assert CliRunner().invoke(cli, ["timeline", "items"]).exit_code == 2
+    assert CliRunner().invoke(cli, ["timeline", "items", "--range", "12"]).exit_code == 2
@@ -1,5 +1,8 @@
+import io
+import json
+from array import array
 import pytest
-from src.macro import parse, manifest
+from src.macro import LuaTable, parse, manifest, manifest_to, iter_manifest, iterparse, iter_tools, json_default, LazyTable, parse_lazy, select, ManifestCache, _legacy_parse
 
 # Shared test cases for both parse and manifest functions
 # Format: (lua_str, python_obj, manifest_str)
@@ -243,4 +246,300 @@ def test_manifest(lua_str, python_obj, manifest_str):
     result = manifest(python_obj)
     # Use manifest_str if provided, otherwise use lua_str
     expected = manifest_str if manifest_str is not None else lua_str
-    assert result == expected 
\ No newline at end of file
+    assert result == expected
+
+@pytest.mark.parametrize("lua_str,_,__", TEST_CASES)
+def test_parse_matches_legacy_parser(lua_str, _, __):
+    """Test that the tokenizing parser agrees with the legacy parser."""
+    assert parse(lua_str) == _legacy_parse(lua_str)
+
+def test_parse_falls_back_to_legacy_parser():
+    """Test that input the tokenizing parser rejects is still parsed."""
+    assert parse("{ value = two words }") == {"value": "two words"}
+
+def test_iterparse_events():
+    """Test the events produced for a named table with nested values."""
+    events = list(iterparse(io.StringIO("Foo { a = 1, ['b.c'] = { 'x', nil } }")))
+    assert events == [
+        ("start_table", "Foo"),
+        ("key", "a"),
+        ("value", 1),
+        ("key", "b.c"),
+        ("start_table", None),
+        ("value", "x"),
+        ("value", None),
+        ("end_table", None),
+        ("end_table", None),
+    ]
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 65536])
+def test_iterparse_chunk_boundaries(chunk_size):
+    """Test that tokens split across chunks produce the same events."""
+    lua_str = "{ 'key with \\'quotes\\'' = ordered() { value = -42.5, name = \"long name\" } }"
+    expected = list(iterparse(io.StringIO(lua_str)))
+    assert list(iterparse(io.StringIO(lua_str), chunk_size)) == expected
+
+def test_iterparse_rejects_malformed_input():
+    """Test that malformed input raises a ValueError."""
+    with pytest.raises(ValueError):
+        list(iterparse(io.StringIO("{ a = 1 b }")))
+
+def test_iter_tools():
+    """Test that tools are yielded one at a time and other keys are skipped."""
+    lua_str = """Composition {
+        CurrentTime = 0,
+        RenderRange = { 0, 100 },
+        Tools = ordered() {
+            Blur1 = Blur { Inputs = { XBlurSize = Input { Value = 5 } } },
+            Merge1 = Merge { Inputs = {} },
+        },
+        Frames = { { FrameTypeID = "ChildFrame" } },
+    }"""
+    tools = list(iter_tools(io.StringIO(lua_str), 16))
+    assert tools == [
+        ("Blur1", {"__name__": "Blur", "Inputs": {"XBlurSize": {"__name__": "Input", "Value": 5}}}),
+        ("Merge1", {"__name__": "Merge", "Inputs": []}),
+    ]
+    assert dict(tools) == {k: v for k, v in parse(lua_str)["Tools"].items() if k != "__name__"}
+
+@pytest.mark.parametrize("lua_str,python_obj,manifest_str", TEST_CASES)
+def test_manifest_to(lua_str, python_obj, manifest_str):
+    """Test that streaming to a file object writes the same text as manifest."""
+    stream = io.StringIO()
+    manifest_to(stream, python_obj, chunk_size=4)
+    assert stream.getvalue() == manifest(python_obj)
+
+def test_iter_manifest_chunks():
+    """Test that chunks are at least chunk_size long except for the last one."""
+    obj = {"__name__": "Tools", "values": list(range(100))}
+    chunks = list(iter_manifest(obj, chunk_size=32))
+    assert len(chunks) > 1
+    assert all(len(chunk) >= 32 for chunk in chunks[:-1])
+    assert "".join(chunks) == manifest(obj)
+
+def test_manifest_does_not_modify_named_tables():
+    """Test that the name of a named table is left in place."""
+    obj = {"__name__": "Input", "Value": 1}
+    assert manifest(obj) == "Input { Value = 1 }"
+    assert obj == {"__name__": "Input", "Value": 1}
+
+@pytest.mark.parametrize("lua_str,_,__", TEST_CASES)
+def test_table_model_round_trip(lua_str, _, __):
+    """Test that LuaTables survive a manifest and parse round trip."""
+    table = parse(lua_str, model="table")
+    lua = manifest(table)
+    assert parse(lua, model="table") == table
+    assert manifest(parse(lua, model="table")) == lua
+
+def test_table_model_parts():
+    """Test that positional and keyed entries go to the array and hash parts."""
+    table = parse("FuID { 'SLog2', [0] = 1, 2, name = 'x' }", model="table")
+    assert table == LuaTable("FuID", ["SLog2", 2], {0: 1, "name": "x"})
+    assert table[1] == "SLog2"
+    assert table[0] == 1
+    assert isinstance(table[2], int)
+    assert list(table.items()) == [(1, "SLog2"), (2, 2), (0, 1), ("name", "x")]
+    assert manifest(table) == "FuID { 'SLog2', 2, [0] = 1, name = 'x' }"
+
+def test_table_model_empty_tables():
+    """Test that empty tables need no key heuristics in the table model."""
+    table = parse("{ empty_array = {}, other = Empty {} }", model="table")
+    assert table["empty_array"] == LuaTable()
+    assert table["other"] == LuaTable("Empty")
+    assert manifest(table) == "{ empty_array = {}, other = Empty {} }"
+
+def test_table_model_truth_value():
+    """Test that a table is true when either part has entries."""
+    assert not LuaTable("Empty")
+    assert LuaTable(array=[0])
+    assert LuaTable(hash={"Value": 0})
+    assert len(LuaTable(hash={"Value": 0})) == 0
+
+def test_table_model_keyword_keys():
+    """Test that keys that are Lua keywords are bracket-quoted."""
+    table = LuaTable(hash={"end": 1, "nil": 2, "Input": 3})
+    lua = manifest(table)
+    assert lua == "{ ['end'] = 1, ['nil'] = 2, Input = 3 }"
+    assert parse(lua, model="table") == table
+
+def test_table_model_setitem_keeps_shared_keys():
+    """Test that adding a key to one table does not change tables with the same keys."""
+    table = parse("{ Input { Value = 1 }, Input { Value = 2 } }", model="table")
+    first, second = table[1], table[2]
+    first["Source"] = "Output"
+    first["Value"] = 3
+    assert first == LuaTable("Input", hash={"Value": 3, "Source": "Output"})
+    assert second == LuaTable("Input", hash={"Value": 2})
+
+def test_table_model_rejects_malformed_input():
+    """Test that the table model does not fall back to the legacy parser."""
+    with pytest.raises(ValueError):
+        parse("{ value = two words }", model="table")
+
+@pytest.mark.parametrize("lua_str,expected", [
+    ("{ value = 1e-05 }", {"value": 1e-05}),
+    ("{ value = -2.5E+3 }", {"value": -2500.0}),
+    ("{ values = { 1e-05, 2 } }", {"values": [1e-05, 2]}),
+])
+def test_parse_exponents(lua_str, expected):
+    """Test that numbers in exponent form are parsed as floats."""
+    result = parse(lua_str)
+    assert result == expected
+    assert type(result[next(iter(result))]) == type(expected[next(iter(expected))])
+
+@pytest.mark.parametrize("lua_str,expected", [
+    ("{ 1, 2, 3, }", array("q", [1, 2, 3])),
+    ("{ -0.5, 1e-05, .25 }", array("d", [-0.5, 1e-05, 0.25])),
+    ("{ -605, -49.5 }", [-605, -49.5]),
+    ("{ 99999999999999999999, 1 }", [99999999999999999999, 1]),
+])
+def test_parse_numeric_arrays(lua_str, expected):
+    """Test that tables with numbers of one type become typed arrays."""
+    result = parse(lua_str, numbers="array")
+    assert type(result) == type(expected)
+    assert result == expected
+
+def test_numeric_arrays_json_and_manifest():
+    """Test that typed arrays expand to lists for JSON and render like lists."""
+    lua_str = "Polyline { Points = { 0, 1, 2 }, LUT = { 0.5, 1e-05 }, Pos = { -605, -49.5 } }"
+    result = parse(lua_str, numbers="array")
+    assert isinstance(result["Points"], array)
+    assert json.dumps(result, default=json_default) == json.dumps(parse(lua_str))
+    assert manifest(result) == manifest(parse(lua_str))
+
+def test_table_model_numeric_arrays():
+    """Test that the array part of a LuaTable can be a typed array."""
+    table = parse("FuID { 1.5, 2.5 }", model="table", numbers="array")
+    assert isinstance(table.array, array)
+    assert table == LuaTable("FuID", [1.5, 2.5])
+    assert manifest(table) == "FuID { 1.5, 2.5 }"
+    table[1] = "x"
+    assert table == LuaTable("FuID", ["x", 2.5])
+
+def test_iterparse_numeric_arrays():
+    """Test that numeric tables produce the same events in any chunk size."""
+    lua_str = "{ Pos = OperatorInfo { 1, 2.5 }, Values = { 1e-05, 3 } }"
+    expected = list(iterparse(io.StringIO(lua_str), 1))
+    assert list(iterparse(io.StringIO(lua_str))) == expected
+    assert expected[2:6] == [("start_table", "OperatorInfo"), ("value", 1), ("value", 2.5), ("end_table", None)]
+
+def test_parse_rejects_unknown_numbers_storage():
+    """Test that an unknown numbers storage raises a ValueError."""
+    with pytest.raises(ValueError):
+        parse("{ 1, 2 }", numbers="tuple")
+
+@pytest.mark.parametrize("lua_str,python_obj,_", TEST_CASES)
+def test_parse_lazy_materialize(lua_str, python_obj, _):
+    """Test that materializing a lazy table gives the same value as parse."""
+    result = parse_lazy(lua_str)
+    if isinstance(result, LazyTable):
+        result = result.materialize()
+    assert result == python_obj
+
+def test_parse_lazy_access():
+    """Test that lazy tables expose the keys and values of the dict model."""
+    table = parse_lazy("Parent { child = Child { value = 500 }, 1, array = { 'a', 'b' }, [2] = 'x' }")
+    assert isinstance(table["child"], LazyTable)
+    assert table["child"]["value"] == 500
+    assert table["1"] == 1.0
+    assert table["array"]["1"] == "b"
+    assert set(table) == {"child", "1", "array", "2", "__name__"}
+    assert table["__name__"] == "Parent"
+    assert dict(table["child"]) == {"value": 500, "__name__": "Child"}
+
+def test_select():
+    """Test selecting a subtree by a dot-separated path."""
+    lua_str = """{
+        Tools = ordered() {
+            Blur1 = Blur { Inputs = { XBlurSize = Input { Value = 5 } }, ViewInfo = OperatorInfo { Pos = { 110, 16.5 } } },
+            Merge1 = Merge { Inputs = { Background = Input { SourceOp = "Blur1", Source = "Output" } } },
+        },
+        ActiveTool = "Blur1",
+    }"""
+    assert select(lua_str, "Tools.Blur1.Inputs") == {"XBlurSize": {"__name__": "Input", "Value": 5}}
+    assert select(lua_str, "Tools.Merge1.Inputs.Background.SourceOp") == "Blur1"
+    assert select(lua_str, "Tools.Blur1.ViewInfo.Pos.1") == 16.5
+    assert select(lua_str, "ActiveTool") == "Blur1"
+    with pytest.raises(KeyError):
+        select(lua_str, "Tools.Transform1.Inputs")
+
+def test_select_skips_malformed_tables_outside_path():
+    """Test that only tables along the path need to be well-formed."""
+    lua_str = "{ Broken = { value = two words }, Tools = { Blur1 = Blur { } } }"
+    assert select(lua_str, "Tools.Blur1") == {"__name__": "Blur"}
+    with pytest.raises(ValueError):
+        select("{ Tools = { Blur1 = Blur { } }", "Tools")
+
+def test_parse_workers_matches_serial_parse():
+    """Test that parsing tools in worker processes gives the same result in the same order."""
+    lua_str = """Composition {
+        CurrentTime = 0,
+        RenderRange = { 0, 100 },
+        Tools = ordered() {
+            Blur1 = Blur { Inputs = { XBlurSize = Input { Value = 1e-05 } } },
+            Empty = {},
+            Merge1 = Merge { Inputs = { Background = Input { SourceOp = "Blur1", Source = "Output" } } },
+            Transform1 = Transform { Inputs = {}, ViewInfo = OperatorInfo { Pos = { 110, 16.5 } } },
+        },
+        Frames = { { FrameTypeID = "ChildFrame" } },
+    }"""
+    result = parse(lua_str, workers=2)
+    expected = parse(lua_str)
+    assert result == expected
+    assert json.dumps(result) == json.dumps(expected)
+
+def test_parse_workers_requires_dict_model():
+    """Test that workers are rejected for the table model."""
+    with pytest.raises(ValueError):
+        parse("{ Tools = ordered() {} }", model="table", workers=2)
+
+@pytest.mark.parametrize("lua_str,python_obj,manifest_str", TEST_CASES)
+def test_manifest_with_cache(lua_str, python_obj, manifest_str):
+    """Test that a manifest cache does not change the output."""
+    cache = ManifestCache()
+    assert manifest(python_obj, cache=cache) == manifest(python_obj)
+    assert manifest(python_obj, cache=cache) == manifest(python_obj)
+    table = parse(lua_str, model="table")
+    assert manifest(table, cache=cache) == manifest(table)
+
+def test_manifest_cache_hits_repeated_tables():
+    """Test that repeated tables are rendered once and counted as hits."""
+    pos = {"__name__": "OperatorInfo", "Pos": [110, 16.5]}
+    obj = {"__name__": "ordered()", "Blur1": {"ViewInfo": pos}, "Blur2": {"ViewInfo": dict(pos)}}
+    cache = ManifestCache()
+    assert manifest(obj, cache=cache) == manifest(obj)
+    # Blur2 and the OperatorInfo inside it are skipped as one hit
+    assert cache.hits == 1
+    manifest(obj, cache=cache)
+    assert cache.info()["hits"] == 2
+
+def test_manifest_cache_distinguishes_number_types():
+    """Test that 1, 1.0 and True, which are equal in Python, are not conflated."""
+    cache = ManifestCache()
+    assert manifest([[1], [1.0], [True]], cache=cache) == "{ { 1 }, { 1.0 }, { true } }"
+    assert cache.hits == 0
+
+def test_manifest_cache_keys_nested_tables_by_structure():
+    """Test that tables are keyed by their entries, whatever tables they are nested in."""
+    cache = ManifestCache()
+    obj = {"a": {"x": [1, {"y": "z"}]}, "b": [{"x": [1, {"y": "z"}]}], "c": {"x": [1, {"y": 0}]}}
+    keys = cache.structure_keys(obj)
+    assert keys[id(obj["a"])] == keys[id(obj["b"][0])]
+    assert keys[id(obj["a"]["x"][1])] == keys[id(obj["b"][0]["x"][1])]
+    assert keys[id(obj["a"])] != keys[id(obj["c"])]
+
+def test_manifest_cache_starts_over_after_many_structures():
+    """Test that the numbers of table structures are bounded together with the texts."""
+    cache = ManifestCache(maxsize=1)
+    for i in range(3):
+        obj = [[i, j] for j in range(100)]
+        assert manifest(obj, cache=cache) == manifest(obj)
+    assert len(cache._ids) <= 101
+
+def test_manifest_cache_is_bounded():
+    """Test that the least recently used tables are evicted."""
+    cache = ManifestCache(maxsize=2)
+    manifest([[1], [2], [3]], cache=cache)
+    assert len(cache) == 2
+    cache.clear()
+    assert cache.info() == {"hits": 0, "misses": 0, "size": 0, "maxsize": 2}
@@ -0,0 +1,66 @@
+import json
+
+from click.testing import CliRunner
+
+from src.cli import cli
+from tests import fake_resolve
+
+def make_media_pool():
+    return fake_resolve.FakeMediaPool(fake_resolve.FakeFolder("Master", [
+        fake_resolve.FakeClip("a.mov", {"File Path": "/media/a.mov", "FPS": "25"}),
+    ], [
+        fake_resolve.FakeFolder("Day 1", [fake_resolve.FakeClip("b.mov", {"File Path": "/media/b.mov"})]),
+        fake_resolve.FakeFolder("Day 2", [fake_resolve.FakeClip("c.mov", {"File Path": "/media/c.mov"})], [
+            fake_resolve.FakeFolder("Sound", []),
+        ]),
+    ]))
+
+def list_clips(*args):
+    result = CliRunner().invoke(cli, ["--count-calls", "media-pool", "list", *args])
+    assert result.exit_code == 0
+    return [json.loads(line) for line in result.stdout.splitlines()], json.loads(result.stderr.splitlines()[-1])["calls_by_method"]
+
+def test_list_streams_every_clip(resolve, monkeypatch, tmp_path):
+    """Test that clips are listed folder by folder with all their properties."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    media_pool = make_media_pool()
+    resolve.project_manager.project.media_pool = media_pool
+    clips, calls = list_clips()
+    assert [(clip["folder"], clip["name"]) for clip in clips] == [("Master", "a.mov"), ("Master/Day 1", "b.mov"), ("Master/Day 2", "c.mov")]
+    assert clips[0] == {
+        "folder": "Master", "unique_id": media_pool.root.clips[0].unique_id, "name": "a.mov",
+        "properties": {"File Path": "/media/a.mov", "FPS": "25"},
+    }
+    assert calls["GetClipProperty"] == 3
+
+def test_list_reads_only_changed_folders(resolve, monkeypatch, tmp_path):
+    """Test that repeat listings read no properties of unchanged folders."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    media_pool = make_media_pool()
+    resolve.project_manager.project.media_pool = media_pool
+    first, _ = list_clips()
+
+    second, calls = list_clips()
+    assert second == first
+    assert "GetClipProperty" not in calls
+    assert calls["GetUniqueId"] == 3
+
+    day_2 = media_pool.root.subfolders[1]
+    day_2.clips.append(fake_resolve.FakeClip("d.mov", {"File Path": "/media/d.mov"}))
+    third, calls = list_clips()
+    assert [clip["name"] for clip in third] == ["a.mov", "b.mov", "c.mov", "d.mov"]
+    assert calls["GetClipProperty"] == 2
+
+    _, calls = list_clips("--full")
+    assert calls["GetClipProperty"] == 4
+
+def test_list_forgets_deleted_folders(resolve, monkeypatch, tmp_path):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    media_pool = make_media_pool()
+    resolve.project_manager.project.media_pool = media_pool
+    list_clips()
+    del media_pool.root.subfolders[0]
+    clips, _ = list_clips()
+    assert [clip["name"] for clip in clips] == ["a.mov", "c.mov"]
+    listing = json.loads(next((tmp_path / "davinci-cli" / "media-pool").iterdir()).read_text())
+    assert sorted(listing["folders"]) == ["Master", "Master/Day 2", "Master/Day 2/Sound"]
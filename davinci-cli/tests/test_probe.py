@@ -0,0 +1,132 @@
+import json
+import os
+import sys
+import time
+
+import pytest
+from click.testing import CliRunner
+
+import src.davinci as davinci
+import src.probe as probe
+from src.cli import cli
+from tests import fake_resolve
+
+FFPROBE_INFO = {
+    "streams": [
+        {"index": 0, "codec_type": "audio", "r_frame_rate": "0/0"},
+        {"index": 1, "codec_type": "video", "r_frame_rate": "24000/1001", "width": 1920, "height": 1080},
+    ],
+    "format": {"duration": "10.0"},
+}
+
+@pytest.fixture
+def ffprobe(tmp_path, monkeypatch):
+    """Use a fake ffprobe that counts its calls, and a cache in tmp_path."""
+    calls = tmp_path / "calls"
+    script = tmp_path / "ffprobe"
+    script.write_text(f"""#!{sys.executable}
+import json, sys
+with open({str(calls)!r}, "a") as f:
+    f.write(sys.argv[-1] + "\\n")
+print(json.dumps({FFPROBE_INFO!r}))
+""")
+    script.chmod(0o755)
+    monkeypatch.setenv("DAVINCI_CLI_FFPROBE", str(script))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+    def count():
+        return len(calls.read_text().splitlines()) if calls.exists() else 0
+    return count
+
+def test_probe_is_cached_until_the_file_changes(ffprobe, tmp_path):
+    """Test that ffprobe only runs again for a file that changed."""
+    video = tmp_path / "video.mov"
+    video.write_bytes(b"1234")
+    assert probe.probe(str(video)) == FFPROBE_INFO
+    assert probe.probe(str(video)) == FFPROBE_INFO
+    assert ffprobe() == 1
+    assert os.listdir(probe.cache_dir())
+
+    video.write_bytes(b"12345")
+    assert davinci.get_framerate(str(video)) == pytest.approx(23.976, abs=1e-3)
+    assert ffprobe() == 2
+
+def test_probe_missing_file_or_ffprobe(ffprobe, tmp_path, monkeypatch):
+    """Test that failures give None instead of raising."""
+    assert probe.probe(str(tmp_path / "missing.mov")) is None
+    video = tmp_path / "video.mov"
+    video.write_bytes(b"1234")
+    monkeypatch.setenv("DAVINCI_CLI_FFPROBE", str(tmp_path / "no-ffprobe"))
+    assert probe.probe(str(video)) is None
+
+def test_prune_evicts_old_and_least_recently_used_entries(tmp_path):
+    """Test eviction by age and by total size."""
+    cache = probe.ProbeCache(str(tmp_path / "cache"), max_size=10_000, max_age=3600)
+    stats = {}
+    for name in ["a", "b", "c"]:
+        path = tmp_path / name
+        path.write_bytes(name.encode())
+        stats[name] = os.stat(path)
+        cache.put(str(path), stats[name], {"streams": [], "name": name * 1000})
+    entry_a = cache._entry_path(str(tmp_path / "a"))
+    old = time.time() - 7200
+    os.utime(entry_a, (old, old))
+    assert cache.prune() == 1
+    assert cache.get(str(tmp_path / "a"), stats["a"]) is None
+
+    # b was used last, so c is evicted first
+    os.utime(cache._entry_path(str(tmp_path / "c")), (old + 3000, old + 3000))
+    cache.max_size = 1500
+    assert cache.prune() == 1
+    assert cache.get(str(tmp_path / "b"), stats["b"]) is not None
+    assert cache.get(str(tmp_path / "c"), stats["c"]) is None
+
+@pytest.mark.parametrize("fps,expected", [
+    ("24", 24.0),
+    ("23.976", 24000 / 1001),
+    ("29.97", 30000 / 1001),
+    ("59.94", 60000 / 1001),
+    ("25.000", 25.0),
+    ("", None),
+    ("0", None),
+])
+def test_get_clip_framerate(fps, expected):
+    """Test reading the frame rate from clip properties, with exact NTSC rates."""
+    assert davinci.get_clip_framerate({"FPS": fps}) == expected
+
+def test_media_pool_item_get_skips_ffprobe(resolve, ffprobe):
+    """Test that the clip frame rate is used without running ffprobe."""
+    media_pool_item = fake_resolve.FakeMediaPoolItem({
+        "File Path": "/media/a.mov", "Proxy Media Path": "", "Start": "0", "End": "99",
+        "Resolution": "1920x1080", "FPS": "25",
+    })
+    resolve.project_manager.project.timeline.video_item = fake_resolve.FakeVideoItem("a.mov", 0, 100, media_pool_item)
+    result = CliRunner().invoke(cli, ["media-pool-item", "get"])
+    assert json.loads(result.output)["framerate"] == 25.0
+    assert ffprobe() == 0
+
+def test_media_pool_probe(resolve, ffprobe, tmp_path):
+    """Test that every file in the media pool is probed once, with clips sharing a file grouped."""
+    from benchmarks.media import make_mkv, make_mp4
+
+    make_mp4(str(tmp_path / "a.mp4"), payload_size=1000)
+    make_mkv(str(tmp_path / "b.mkv"), default_duration=40000000, payload_size=1000)
+    (tmp_path / "c.avi").write_bytes(b"RIFF" + bytes(100))
+
+    def clip(name, file):
+        return fake_resolve.FakeClip(name, {"File Path": str(tmp_path / file) if file else ""})
+
+    resolve.project_manager.project.media_pool = fake_resolve.FakeMediaPool(fake_resolve.FakeFolder("Master", [
+        clip("a.mp4", "a.mp4"),
+        clip("Timeline 1", None),
+    ], [
+        fake_resolve.FakeFolder("B-Roll", [clip("b.mkv", "b.mkv"), clip("a copy", "a.mp4"), clip("c.avi", "c.avi")]),
+    ]))
+    result = CliRunner().invoke(cli, ["media-pool", "probe", "--jobs", "2"])
+    results = sorted((json.loads(line) for line in result.output.splitlines()), key=lambda r: r["index"])
+    assert [r["clips"] for r in results] == [["Master/a.mp4", "Master/B-Roll/a copy"], ["Master/B-Roll/b.mkv"], ["Master/B-Roll/c.avi"]]
+    assert results[0]["framerate"] == pytest.approx(24000 / 1001)
+    assert (results[1]["framerate"], results[1]["width"], results[1]["source"]) == (25.0, 1920, "header")
+    # Only the AVI file needs ffprobe
+    assert results[2]["source"] == "ffprobe"
+    assert ffprobe() == 1
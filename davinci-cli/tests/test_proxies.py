@@ -0,0 +1,136 @@
+import json
+import sys
+
+import pytest
+from click.testing import CliRunner
+
+from src.cli import cli
+from src.proxies import proxy_name
+from tests import fake_resolve
+
+@pytest.fixture
+def ffmpeg(tmp_path, monkeypatch):
+    """Use a fake ffmpeg that logs its arguments and writes its output file, failing for sources named bad."""
+    calls = tmp_path / "calls"
+    script = tmp_path / "ffmpeg"
+    script.write_text(f"""#!{sys.executable}
+import json, sys
+with open({str(calls)!r}, "a") as f:
+    f.write(json.dumps(sys.argv[1:]) + "\\n")
+source = sys.argv[sys.argv.index("-i") + 1]
+if "bad" in source:
+    print("invalid data", file=sys.stderr)
+    sys.exit(1)
+with open(sys.argv[-1], "w") as f:
+    f.write("proxy of " + source)
+""")
+    script.chmod(0o755)
+    monkeypatch.setenv("DAVINCI_CLI_FFMPEG", str(script))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+    def read_calls():
+        return [json.loads(line) for line in calls.read_text().splitlines()] if calls.exists() else []
+    return read_calls
+
+def clip(name, tmp_path, **properties):
+    return fake_resolve.FakeClip(name, {
+        "File Path": str(tmp_path / "media" / name), "Type": "Video + Audio", "Resolution": "3840x2160", "FPS": "23.976", **properties,
+    })
+
+def setup_project(resolve, tmp_path):
+    (tmp_path / "media").mkdir()
+    (tmp_path / "existing.mov").write_text("")
+    clips = [
+        clip("a.mov", tmp_path),
+        clip("b.mov", tmp_path),
+        clip("audio.wav", tmp_path, Type="Audio"),
+        clip("linked.mov", tmp_path, **{"Proxy Media Path": str(tmp_path / "existing.mov")}),
+        clip("c.mov", tmp_path, Resolution="1280x720", FPS="25"),
+    ]
+    media_pool = fake_resolve.FakeMediaPool(fake_resolve.FakeFolder("Master", clips[:2], [fake_resolve.FakeFolder("More", clips[2:])]))
+    timeline = fake_resolve.FakeTimeline(video={1: [fake_resolve.FakeVideoItem("c.mov", 86400, 86448, clips[4])]})
+    resolve.project_manager.project.media_pool = media_pool
+    resolve.project_manager.project.timeline = timeline
+    return clips
+
+def test_proxies_are_made_timeline_first_and_linked(resolve, ffmpeg, tmp_path):
+    clips = setup_project(resolve, tmp_path)
+    result = CliRunner().invoke(cli, ["media-pool", "proxies", "--jobs", "1"])
+    assert result.exit_code == 0
+    results = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [(result["clips"], result["status"]) for result in results] == [
+        (["Master/More/c.mov"], "linked"), (["Master/a.mov"], "linked"), (["Master/b.mov"], "linked"),
+    ]
+    assert results[0]["in_timeline"] is True
+    proxy = tmp_path / "media" / "Proxy" / proxy_name(str(tmp_path / "media" / "a.mov"))
+    assert proxy.read_text() == f"proxy of {tmp_path / 'media' / 'a.mov'}"
+    assert clips[0].properties["Proxy Media Path"] == str(proxy)
+
+    calls = ffmpeg()
+    assert [call[call.index("-i") + 1] for call in calls] == [str(tmp_path / "media" / name) for name in ["c.mov", "a.mov", "b.mov"]]
+    # Sources are scaled down but never up, and keep their exact frame rate
+    assert calls[0][calls[0].index("-vf") + 1] == "scale=-2:720"
+    assert calls[0][calls[0].index("-r") + 1] == "25/1"
+    assert calls[1][calls[1].index("-vf") + 1] == "scale=-2:1080"
+    assert calls[1][calls[1].index("-r") + 1] == "24000/1001"
+
+    # Every clip has a valid proxy now
+    result = CliRunner().invoke(cli, ["media-pool", "proxies"])
+    assert result.stdout == ""
+    assert len(ffmpeg()) == 3
+
+def test_proxies_keep_the_timeline_snapshot(resolve, ffmpeg, tmp_path):
+    """Test that the tracks read to find the clips of the timeline are not read again by the next run."""
+    setup_project(resolve, tmp_path)
+    CliRunner().invoke(cli, ["media-pool", "proxies", "--dry-run"])
+    result = CliRunner().invoke(cli, ["--count-calls", "media-pool", "proxies", "--dry-run"])
+    assert result.exit_code == 0
+    assert "GetMediaPoolItem" not in json.loads(result.stderr.splitlines()[-1])["calls_by_method"]
+
+def test_clips_of_one_file_share_a_proxy(resolve, ffmpeg, tmp_path):
+    clips = setup_project(resolve, tmp_path)
+    resolve.project_manager.project.media_pool.root.clips.append(clip("a.mov", tmp_path))
+    result = CliRunner().invoke(cli, ["media-pool", "proxies", "--out", str(tmp_path / "proxies")])
+    results = {json.loads(line)["file"]: json.loads(line) for line in result.stdout.splitlines()}
+    proxy = str(tmp_path / "proxies" / proxy_name(str(tmp_path / "media" / "a.mov")))
+    assert results[str(tmp_path / "media" / "a.mov")]["clips"] == ["Master/a.mov", "Master/a.mov"]
+    assert results[str(tmp_path / "media" / "a.mov")]["proxy"] == proxy
+    assert len(ffmpeg()) == 3
+    assert clips[0].properties["Proxy Media Path"] == proxy
+
+def test_sources_with_the_same_name_get_their_own_proxy(resolve, ffmpeg, tmp_path):
+    clips = setup_project(resolve, tmp_path)
+    clips[0].properties["File Path"] = str(tmp_path / "media" / "x.mov")
+    clips[1].properties["File Path"] = str(tmp_path / "media" / "bad" / "x.mov")
+    out = tmp_path / "proxies"
+    result = CliRunner().invoke(cli, ["media-pool", "proxies", "--out", str(out)])
+    statuses = {json.loads(line)["file"]: json.loads(line)["status"] for line in result.stdout.splitlines()}
+    assert statuses[str(tmp_path / "media" / "x.mov")] == "linked"
+    assert statuses[str(tmp_path / "media" / "bad" / "x.mov")] == "failed"
+
+    # The proxy of the other x.mov is not taken for one left by the first run
+    result = CliRunner().invoke(cli, ["media-pool", "proxies", "--out", str(out)])
+    assert [json.loads(line)["status"] for line in result.stdout.splitlines()] == ["failed"]
+    assert "Proxy Media Path" not in clips[1].properties
+    assert len(ffmpeg()) == 4
+
+def test_failed_transcodes_are_reported(resolve, ffmpeg, tmp_path):
+    clips = setup_project(resolve, tmp_path)
+    clips[1].properties["File Path"] = str(tmp_path / "media" / "bad.mov")
+    result = CliRunner().invoke(cli, ["media-pool", "proxies"])
+    failed = [json.loads(line) for line in result.stdout.splitlines() if json.loads(line)["status"] == "failed"]
+    assert [result["file"] for result in failed] == [str(tmp_path / "media" / "bad.mov")]
+    assert "invalid data" in failed[0]["error"]
+    assert "Proxy Media Path" not in clips[1].properties
+    assert not (tmp_path / "media" / "Proxy" / proxy_name(str(tmp_path / "media" / "bad.mov"))).exists()
+    assert not any(path.name.endswith(".tmp") for path in (tmp_path / "media" / "Proxy").iterdir())
+
+def test_dry_run(resolve, ffmpeg, tmp_path):
+    setup_project(resolve, tmp_path)
+    result = CliRunner().invoke(cli, ["media-pool", "proxies", "--dry-run"])
+    results = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [(result["clips"], result["status"]) for result in results] == [
+        (["Master/More/c.mov"], "planned"), (["Master/a.mov"], "planned"), (["Master/b.mov"], "planned"),
+    ]
+    assert results[1]["width"] == 3840 and results[1]["framerate"] == pytest.approx(24000 / 1001)
+    assert ffmpeg() == []
@@ -0,0 +1,140 @@
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+import pytest
+
+import src.cli as cli_module
+import src.client as client
+import src.server as server
+from tests import fake_resolve
+
+@pytest.fixture
+def daemon(resolve):
+    """Run `davinci serve` in a thread and yield its socket path."""
+    # Unix socket paths are limited to about 100 characters, which rules out tmp_path
+    directory = tempfile.mkdtemp(prefix="davinci-")
+    path = os.path.join(directory, "davinci.sock")
+    with server.Server(cli_module.cli, path) as daemon:
+        thread = threading.Thread(target=daemon.serve_forever)
+        thread.start()
+        try:
+            yield path
+        finally:
+            daemon.shutdown()
+            thread.join()
+    shutil.rmtree(directory)
+
+def call(args, path, stdin=None):
+    """Run a command on the daemon and get its exit code, stdout and stderr."""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    exit_code = client.call(args, stdin=stdin, path=path, stdout=stdout, stderr=stderr)
+    return exit_code, stdout.getvalue(), stderr.getvalue()
+
+def test_call_without_daemon_returns_none():
+    """Test that the client falls back when no daemon is listening."""
+    assert client.call(["project", "get"], path="/nonexistent/davinci.sock") is None
+    assert not client.is_running("/nonexistent/davinci.sock")
+
+def test_call_with_unusable_socket_returns_none(tmp_path):
+    """Test that the client also falls back when the socket cannot be connected to for other reasons."""
+    stale = tmp_path / "davinci.sock"
+    stale.write_text("")
+    assert client.call(["project", "get"], path=str(stale)) is None
+    # Longer than a Unix socket path can be
+    assert client.call(["project", "get"], path=str(tmp_path / ("x" * 200))) is None
+
+def test_daemon_answers_commands_with_one_connection(daemon):
+    """Test that commands are answered by the daemon, connecting to Resolve once."""
+    assert client.is_running(daemon)
+    exit_code, stdout, _ = call(["project", "get"], path=daemon)
+    assert exit_code == 0
+    assert json.loads(stdout) == {"name": "Demo"}
+    exit_code, stdout, _ = call(["timeline", "get"], path=daemon)
+    assert json.loads(stdout)["name"] == "Timeline 1"
+    exit_code, stdout, _ = call(["timeline", "subtitles", "export", "--track", "1"], path=daemon)
+    assert stdout == "Hello\nWorld\n"
+    assert fake_resolve.scriptapp_calls == 1
+
+def test_daemon_fetches_stdin_when_read(daemon):
+    """Test that stdin is only sent for commands that read it."""
+    stdin = io.StringIO('{"Value": [1, 2]}')
+    exit_code, stdout, _ = call(["comp", "convert"], stdin=stdin, path=daemon)
+    assert exit_code == 0
+    assert stdout == "{ Value = { 1, 2 } }\n"
+
+    class Unreadable(io.StringIO):
+        def read(self, size=-1):
+            raise AssertionError("stdin was read")
+
+    exit_code, _, _ = call(["project", "get"], stdin=Unreadable(), path=daemon)
+    assert exit_code == 0
+
+def test_daemon_reports_errors_and_exit_codes(daemon, resolve):
+    """Test that usage errors and Resolve errors reach the client."""
+    exit_code, _, stderr = call(["timeline", "nope"], path=daemon)
+    assert exit_code == 2
+    assert "No such command" in stderr
+    resolve.project_manager.project = None
+    _, _, stderr = call(["project", "get"], path=daemon)
+    assert "no project is currently open" in stderr
+    exit_code, _, _ = call(["serve"], path=daemon)
+    assert exit_code == 1
+
+def test_daemon_streams_output_as_it_is_written(daemon, tmp_path):
+    """Test that output reaches the client a write at a time instead of when the command ends."""
+    (tmp_path / "a.comp").write_text("{ Tools = ordered() { Blur1 = Blur {}, Blur2 = Blur {} } }", encoding="utf-8")
+
+    class Writes(io.StringIO):
+        def __init__(self):
+            super().__init__()
+            self.writes = []
+
+        def write(self, text):
+            self.writes.append(text)
+            return super().write(text)
+
+    stdout = Writes()
+    exit_code = client.call(["comp", "parse", str(tmp_path / "a.comp")], path=daemon, stdout=stdout, stderr=io.StringIO())
+    assert exit_code == 0
+    assert [json.loads(text)["name"] for text in stdout.writes] == ["Blur1", "Blur2"]
+
+def test_daemon_runs_in_client_directory(daemon, tmp_path, monkeypatch):
+    """Test that relative paths are resolved in the directory of the client."""
+    (tmp_path / "a.comp").write_text("{ Tools = ordered() { Blur1 = Blur { Inputs = {} } } }", encoding="utf-8")
+    daemon_cwd = os.getcwd()
+    monkeypatch.chdir(tmp_path)
+    exit_code, stdout, stderr = call(["comp", "parse", "a.comp"], path=daemon)
+    assert exit_code == 0, stderr
+    assert json.loads(stdout)["name"] == "Blur1"
+    assert os.getcwd() == str(tmp_path)
+    # The daemon thread shares this process, so its own directory is back after the command
+    monkeypatch.chdir(daemon_cwd)
+    exit_code, _, stderr = call(["comp", "parse", "a.comp"], path=daemon)
+    assert exit_code == 2
+    assert "a.comp" in stderr
+
+def test_daemon_uses_client_environment(daemon, tmp_path, monkeypatch):
+    """Test that forwarded variables of the client are set while its command runs and restored after."""
+    cache = tmp_path / "client-cache"
+    environment = dict(client.forwarded_environment(), XDG_CACHE_HOME=str(cache))
+    monkeypatch.setattr(client, "forwarded_environment", lambda: environment)
+    monkeypatch.delenv("XDG_CACHE_HOME", raising=False)
+    exit_code, _, stderr = call(["timeline", "dump"], path=daemon)
+    assert exit_code == 0, stderr
+    assert os.listdir(cache / "davinci-cli" / "snapshots")
+    assert "XDG_CACHE_HOME" not in os.environ
+
+def test_main_forwards_to_daemon(daemon, monkeypatch, capsys):
+    """Test that the entry point transparently uses a running daemon."""
+    monkeypatch.setenv("DAVINCI_CLI_SOCKET", daemon)
+    monkeypatch.setattr(sys, "argv", ["davinci", "project", "get"])
+    monkeypatch.setattr(cli_module, "cli", None)
+    with pytest.raises(SystemExit) as exc:
+        client.main()
+    assert exc.value.code == 0
+    assert json.loads(capsys.readouterr().out) == {"name": "Demo"}
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+import src.davinci as davinci
+from src.cli import cli
+from tests import fake_resolve
+
+def run(*args):
+    result = CliRunner().invoke(cli, ["--count-calls", *args])
+    calls = result.stderr.splitlines()[-1]
+    return result.stdout, json.loads(calls)
+
+def test_project_get_calls(resolve):
+    """Test that project get makes one call per object on the way to the project."""
+    stdout, calls = run("project", "get")
+    assert json.loads(stdout) == {"name": "Demo"}
+    assert calls == {"calls": 3, "calls_by_method": {"GetProjectManager": 1, "GetCurrentProject": 1, "GetName": 1}}
+
+def test_media_pool_item_get_fetches_properties_once(resolve):
+    """Test that clip properties are fetched with one call."""
+    media_pool_item = fake_resolve.FakeMediaPoolItem({
+        "File Path": "/media/a.mov", "Proxy Media Path": "", "Start": "0", "End": "99",
+        "Resolution": "1920x1080", "FPS": "23.976",
+    })
+    resolve.project_manager.project.timeline.video_item = fake_resolve.FakeVideoItem("a.mov", 0, 100, media_pool_item)
+    stdout, calls = run("media-pool-item", "get")
+    assert json.loads(stdout)["framerate"] == 24000 / 1001
+    assert calls["calls"] == 6
+    assert calls["calls_by_method"]["GetClipProperty"] == 1
+
+def test_timeline_is_looked_up_once(resolve):
+    """Test that the timeline is looked up once although export and formatting both use it."""
+    _, calls = run("timeline", "subtitles", "export", "--track", "1", "--format", "srt")
+    assert calls["calls_by_method"]["GetCurrentTimeline"] == 1
+    assert calls["calls_by_method"]["GetProjectManager"] == 1
+
+def test_session_does_not_cache_errors(resolve):
+    """Test that a failed lookup is tried again, and sessions nest."""
+    outer = davinci.start_session()
+    try:
+        resolve.project_manager.project, project = None, resolve.project_manager.project
+        with pytest.raises(davinci.DavinciError):
+            davinci.get_current_project()
+        resolve.project_manager.project = project
+        assert davinci.get_current_project().GetName() == "Demo"
+
+        inner = davinci.start_session()
+        assert davinci.current_session() is inner
+        davinci.end_session()
+        assert davinci.current_session() is outer
+    finally:
+        davinci.end_session()
+    assert outer.calls_by_method["GetCurrentProject"] == 2
@@ -0,0 +1,115 @@
+import json
+
+from click.testing import CliRunner
+
+from src.cli import cli
+from tests import fake_resolve
+
+def make_timeline():
+    clip = fake_resolve.FakeMediaPoolItem({"File Path": "/media/a.mov"})
+    return fake_resolve.FakeTimeline(
+        video={
+            1: [fake_resolve.FakeVideoItem("a", 86400, 86448, clip, left_offset=12), fake_resolve.FakeVideoItem("Title", 86448, 86472)],
+            2: [fake_resolve.FakeVideoItem("b", 86424, 86436, clip)],
+        },
+        audio={1: [fake_resolve.FakeVideoItem("a", 86400, 86448, clip)]},
+        subtitles={1: [fake_resolve.FakeItem("Hello", 86400, 86424)]},
+    )
+
+def dump(*args):
+    result = CliRunner().invoke(cli, ["--count-calls", "timeline", "dump", *args])
+    assert result.exit_code == 0
+    return [json.loads(line) for line in result.stdout.splitlines()], json.loads(result.stderr.splitlines()[-1])
+
+def test_dump_lists_every_item(resolve, monkeypatch, tmp_path):
+    """Test that items are listed by track type, track and start, with their media."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    timeline = make_timeline()
+    resolve.project_manager.project.timeline = timeline
+    items, _ = dump()
+    assert [(item["track_type"], item["track"], item["name"]) for item in items] == [
+        ("video", 1, "a"), ("video", 1, "Title"), ("video", 2, "b"), ("audio", 1, "a"), ("subtitle", 1, "Hello"),
+    ]
+    assert items[0] == {
+        "track_type": "video", "track": 1, "unique_id": timeline.video[1][0].unique_id, "name": "a",
+        "start": 86400, "end": 86448, "left_offset": 12, "right_offset": 0,
+        "media_pool_item": timeline.video[1][0].media_pool_item.unique_id, "file": "/media/a.mov",
+    }
+    assert items[1]["file"] is None and items[1]["media_pool_item"] is None
+    assert "file" not in items[4]
+
+def test_dump_reads_only_changed_tracks(resolve, monkeypatch, tmp_path):
+    """Test that an unchanged timeline is dumped from the snapshot with the calls of the fingerprints."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    timeline = make_timeline()
+    resolve.project_manager.project.timeline = timeline
+    first, first_calls = dump()
+
+    second, calls = dump()
+    assert second == first
+    assert calls["calls"] < first_calls["calls"] * 2 / 3
+    assert "GetMediaPoolItem" not in calls["calls_by_method"]
+    assert "GetRightOffset" not in calls["calls_by_method"]
+    # Four calls per clip and three per subtitle
+    assert [calls["calls_by_method"][method] for method in ["GetStart", "GetEnd", "GetLeftOffset"]] == [5, 5, 4]
+
+    timeline.video[2].append(fake_resolve.FakeVideoItem("c", 86500, 86524))
+    third, calls = dump()
+    assert [item["name"] for item in third if item["track"] == 2] == ["b", "c"]
+    assert calls["calls_by_method"]["GetMediaPoolItem"] == 2
+
+    _, calls = dump("--full")
+    assert calls["calls_by_method"]["GetMediaPoolItem"] == 5
+
+def test_dump_sees_changes_in_the_middle_of_a_track(resolve, monkeypatch, tmp_path):
+    """Test that trimming or slipping an item between the first and last one is picked up."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    timeline = make_timeline()
+    clip = timeline.video[1][0].media_pool_item
+    timeline.video[1] = [
+        fake_resolve.FakeVideoItem("a", 86400, 86448, clip),
+        fake_resolve.FakeVideoItem("b", 86448, 86472, clip),
+        fake_resolve.FakeVideoItem("c", 86472, 86496, clip),
+    ]
+    resolve.project_manager.project.timeline = timeline
+    dump()
+
+    timeline.video[1][1].end = 86460
+    items, _ = dump()
+    assert [(item["name"], item["end"]) for item in items if item["track_type"] == "video" and item["track"] == 1] == [
+        ("a", 86448), ("b", 86460), ("c", 86496),
+    ]
+
+    timeline.video[1][1].left_offset = 5
+    items, calls = dump()
+    assert [item["left_offset"] for item in items if item["name"] == "b" and item["track"] == 1] == [5]
+    assert calls["calls_by_method"]["GetMediaPoolItem"] == 3
+
+def test_dump_keeps_timelines_with_the_same_name_apart(resolve, monkeypatch, tmp_path):
+    """Test that timelines of the same name have a snapshot each."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    project = resolve.project_manager.project
+    first, second = make_timeline(), make_timeline()
+    second.video[1][0].name = "other"
+    project.timeline = first
+    dump()
+    project.timeline = second
+    dump()
+
+    project.timeline = first
+    items, calls = dump()
+    assert items[0]["name"] == "a"
+    assert "GetMediaPoolItem" not in calls["calls_by_method"]
+    project.timeline = second
+    items, calls = dump()
+    assert items[0]["name"] == "other"
+    assert "GetMediaPoolItem" not in calls["calls_by_method"]
+
+def test_dump_drops_removed_tracks(resolve, monkeypatch, tmp_path):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    timeline = make_timeline()
+    resolve.project_manager.project.timeline = timeline
+    dump()
+    del timeline.video[2]
+    items, _ = dump()
+    assert [item["name"] for item in items if item["track_type"] == "video"] == ["a", "Title"]
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+from typing import Set
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The startup time budget itself is checked by benchmarks.bench_startup, as
+# wall clock time is too noisy for the test suite.
+
+def imported_modules(module: str) -> Set[str]:
+    """Import a module in a fresh interpreter and get every module that was imported with it."""
+    env = dict(os.environ, DAVINCI_CLI_NO_DAEMON="1")
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys; import {module}; print('\\n'.join(sys.modules))"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return set(result.stdout.split())
+
+def test_cli_defers_slow_imports():
+    """Test that modules only some commands need are not imported with the CLI."""
+    modules = imported_modules("src.cli")
+    deferred = {"DaVinciResolveScript", "pyperclip", "src.macro", "src.subtitles", "src.server",
+                "src.probe", "src.containers", "src.timecode", "src.subtitle_index", "src.snapshot",
+                "src.intervals", "src.media_pool", "src.proxies", "sqlite3",
+                "xml.dom.minidom", "concurrent.futures.process", "subprocess", "pathlib"}
+    assert modules & deferred == set()
+
+def test_client_does_not_import_click():
+    """Test that forwarding a command to the daemon does not need click."""
+    assert "click" not in imported_modules("src.client")
+
+def test_offline_command_does_not_import_resolve(tmp_path):
+    """Test that convert works where importing DaVinciResolveScript fails."""
+    (tmp_path / "DaVinciResolveScript.py").write_text("raise RuntimeError('DaVinciResolveScript was imported')\n")
+    env = dict(os.environ, PYTHONPATH=str(tmp_path), XDG_DATA_HOME=str(tmp_path), DAVINCI_CLI_NO_DAEMON="1")
+    result = subprocess.run([sys.executable, "-m", "src.cli", "comp", "convert"], cwd=ROOT, env=env,
+                            input='{"Value": 1}', capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == "{ Value = 1 }\n"
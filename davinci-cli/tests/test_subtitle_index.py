@@ -0,0 +1,131 @@
+import json
+import sqlite3
+
+from click.testing import CliRunner
+
+import src.davinci as davinci
+from src.cli import cli
+from src.subtitle_index import SubtitleIndex
+from tests import fake_resolve
+
+def make_timeline(name="Timeline 1"):
+    return fake_resolve.FakeTimeline(name=name, framerate="25", start_frame=90000, subtitles={
+        1: [fake_resolve.FakeItem("Where is the station", 90050, 90075), fake_resolve.FakeItem("Good morning", 90000, 90025)],
+        2: [fake_resolve.FakeItem("The station is closed", 90100, 90125)],
+    })
+
+def test_search_finds_phrases_with_timecodes(tmp_path):
+    """Test that hits are ordered by start and carry frames and timecodes."""
+    with SubtitleIndex(str(tmp_path / "index.sqlite3")) as index:
+        assert index.refresh("Demo", "timeline-1", "Timeline 1", make_timeline()) == 2
+        hits = index.search("station", "Demo")
+        assert hits == [
+            {"timeline": "Timeline 1", "timeline_id": "timeline-1", "track": 1, "start": 90050, "end": 90075, "timecode": "01:00:02:00", "text": "Where is the station"},
+            {"timeline": "Timeline 1", "timeline_id": "timeline-1", "track": 2, "start": 90100, "end": 90125, "timecode": "01:00:04:00", "text": "The station is closed"},
+        ]
+        assert [hit["text"] for hit in index.search("station is", "Demo")] == ["The station is closed"]
+        assert index.search("station", "Demo", tracks=[2], limit=1)[0]["track"] == 2
+        assert index.search("station", "Other") == []
+        assert index.search('AND "station', "Demo") == []
+
+def test_refresh_reads_only_changed_tracks(tmp_path):
+    """Test that unchanged tracks cost two calls per cue and no text is read."""
+    timeline = make_timeline()
+    with SubtitleIndex(str(tmp_path / "index.sqlite3")) as index:
+        index.refresh("Demo", "timeline-1", "Timeline 1", timeline)
+
+        session = davinci.ResolveSession()
+        assert index.refresh("Demo", "timeline-1", "Timeline 1", session.wrap(timeline)) == 0
+        assert "GetName" not in session.calls_by_method
+
+        timeline.subtitles[2].append(fake_resolve.FakeItem("Another station", 90200, 90225))
+        session = davinci.ResolveSession()
+        assert index.refresh("Demo", "timeline-1", "Timeline 1", session.wrap(timeline)) == 1
+        assert session.calls_by_method["GetName"] == 2
+        assert len(index.search("station", "Demo")) == 3
+
+        del timeline.subtitles[2]
+        assert index.refresh("Demo", "timeline-1", "Timeline 1", timeline) == 0
+        assert [hit["track"] for hit in index.search("station", "Demo")] == [1]
+
+def test_index_is_kept_between_commands(tmp_path):
+    """Test that a new index on the same file does not read the tracks again."""
+    path = str(tmp_path / "index.sqlite3")
+    with SubtitleIndex(path) as index:
+        index.refresh("Demo", "timeline-1", "Timeline 1", make_timeline())
+    with SubtitleIndex(path) as index:
+        assert index.refresh("Demo", "timeline-1", "Timeline 1", make_timeline()) == 0
+        assert len(index.search("morning", "Demo")) == 1
+
+def test_timelines_with_the_same_name_are_kept_apart(tmp_path):
+    """Test that timelines are keyed by unique ID, and renamed timelines are not read again."""
+    first, second = make_timeline("Ep"), make_timeline("Ep")
+    second.subtitles[1][1].name = "Good evening"
+    with SubtitleIndex(str(tmp_path / "index.sqlite3")) as index:
+        for timeline in (first, second):
+            assert index.refresh("Demo", timeline.unique_id, "Ep", timeline) == 2
+        assert index.refresh("Demo", first.unique_id, "Ep", first) == 0
+        assert index.refresh("Demo", second.unique_id, "Ep", second) == 0
+        assert [hit["timeline_id"] for hit in index.search("morning", "Demo")] == [first.unique_id]
+        assert [hit["timeline_id"] for hit in index.search("evening", "Demo")] == [second.unique_id]
+
+        assert index.refresh("Demo", second.unique_id, "Ep 2", second) == 0
+        assert [hit["timeline"] for hit in index.search("evening", "Demo")] == ["Ep 2"]
+
+def test_index_of_an_earlier_schema_is_rebuilt(tmp_path):
+    """Test that an index keyed by timeline name is dropped instead of failing."""
+    path = str(tmp_path / "index.sqlite3")
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE tracks (id INTEGER PRIMARY KEY, project TEXT, timeline TEXT, track INTEGER)")
+        connection.execute("INSERT INTO tracks (project, timeline, track) VALUES ('Demo', 'Timeline 1', 1)")
+    connection.close()
+    with SubtitleIndex(path) as index:
+        assert index.refresh("Demo", "timeline-1", "Timeline 1", make_timeline()) == 2
+        assert len(index.search("morning", "Demo")) == 1
+
+def test_drop_frame_timecodes(tmp_path):
+    """Test that hits use drop frame timecode when the timeline does."""
+    timeline = fake_resolve.FakeTimeline(framerate="29.97", drop_frame=True, start_frame=107892, subtitles={
+        1: [fake_resolve.FakeItem("Later", 107892 + 1800, 107892 + 1830)],
+    })
+    with SubtitleIndex(str(tmp_path / "index.sqlite3")) as index:
+        index.refresh("Demo", "timeline-1", "Timeline 1", timeline)
+        assert index.search("later", "Demo")[0]["timecode"] == "01:01:00;02"
+
+def test_search_command_all_timelines(resolve, monkeypatch, tmp_path):
+    """Test searching every timeline of the project, and that removed timelines are dropped."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    project = resolve.project_manager.project
+    project.timelines = [make_timeline("A"), make_timeline("B")]
+    project.timeline = project.timelines[0]
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ["timeline", "subtitles", "search", "station", "--all-timelines"])
+    assert result.exit_code == 0
+    hits = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [(hit["timeline"], hit["track"]) for hit in hits] == [("A", 1), ("A", 2), ("B", 1), ("B", 2)]
+
+    result = runner.invoke(cli, ["timeline", "subtitles", "search", "station"])
+    assert {json.loads(line)["timeline"] for line in result.stdout.splitlines()} == {"A"}
+
+    project.timelines = project.timelines[:1]
+    runner.invoke(cli, ["timeline", "subtitles", "search", "station", "--all-timelines"])
+    result = runner.invoke(cli, ["timeline", "subtitles", "search", "station", "--all-timelines", "--no-refresh"])
+    assert {json.loads(line)["timeline"] for line in result.stdout.splitlines()} == {"A"}
+
+def test_search_command_timelines_with_the_same_name(resolve, monkeypatch, tmp_path):
+    """Test that timelines with the same name in different bins are both searched."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    project = resolve.project_manager.project
+    project.timelines = [make_timeline("Ep"), make_timeline("Ep")]
+    project.timelines[1].subtitles[1][1].name = "Good evening"
+    project.timeline = project.timelines[0]
+    runner = CliRunner()
+
+    for phrase, timeline in [("morning", project.timelines[0]), ("evening", project.timelines[1])]:
+        result = runner.invoke(cli, ["timeline", "subtitles", "search", phrase, "--all-timelines"])
+        assert [json.loads(line)["timeline_id"] for line in result.stdout.splitlines()] == [timeline.unique_id]
+
+def test_search_command_rejects_empty_query(resolve):
+    result = CliRunner().invoke(cli, ["timeline", "subtitles", "search", " "])
+    assert result.exit_code == 2
@@ -0,0 +1,237 @@
+import io
+import json
+import os
+
+from click.testing import CliRunner
+
+import src.davinci as davinci
+import src.subtitles as subtitles
+from src.cli import cli
+from tests import fake_resolve
+
+def make_timeline():
+    return fake_resolve.FakeTimeline(framerate="25", start_frame=0, subtitles={
+        1: [fake_resolve.FakeItem("second", 50, 75), fake_resolve.FakeItem("first", 0, 25)],
+        2: [fake_resolve.FakeItem("zweite", 50, 75), fake_resolve.FakeItem("dritte", 100, 125)],
+    })
+
+def test_iter_subtitles_merges_tracks_by_start():
+    """Test that sorted tracks are merged by start, keeping the track order for equal starts."""
+    result = list(subtitles.iter_subtitles(make_timeline(), [1, 2]))
+    assert [subtitle.text for subtitle in result] == ["first", "second", "zweite", "dritte"]
+    result = list(subtitles.iter_subtitles(make_timeline(), [2, 1]))
+    assert [subtitle.text for subtitle in result] == ["first", "zweite", "second", "dritte"]
+
+def test_extract_subtitles_fetches_each_field_once():
+    """Test that every item costs exactly three calls into Resolve."""
+    session = davinci.ResolveSession()
+    timeline = session.wrap(make_timeline())
+    subtitles.extract_subtitles(timeline, 1)
+    assert session.calls_by_method == {"GetItemListInTrack": 1, "GetName": 2, "GetStart": 2, "GetEnd": 2}
+
+def test_format_subtitles(resolve):
+    """Test the text, JSON and SRT formats."""
+    resolve.project_manager.project.timeline = make_timeline()
+    result = subtitles.export_subtitles([1])
+    assert subtitles.format_subtitles(result, "text") == "first\nsecond"
+    assert json.loads(subtitles.format_subtitles(result, "json")) == [
+        {"text": "first", "start": 0, "end": 25},
+        {"text": "second", "start": 50, "end": 75},
+    ]
+    assert subtitles.format_subtitles(result, "srt") == (
+        "1\n00:00:00,000 --> 00:00:01,000\nfirst\n\n"
+        "2\n00:00:02,000 --> 00:00:03,000\nsecond\n"
+    )
+
+TTML_HEAD = """<?xml version="1.0" ?>
+<tt xmlns="http://www.w3.org/ns/ttml" xmlns:ttm="http://www.w3.org/ns/ttml#metadata" xmlns:tts="http://www.w3.org/ns/ttml#styling" xmlns:ttp="http://www.w3.org/ns/ttml#parameter" xmlns:ittp="http://www.w3.org/ns/ttml/profile/imsc1#parameter" xmlns:itts="http://www.w3.org/ns/ttml/profile/imsc1#styling" xml:lang="en" ttp:profile="http://www.w3.org/ns/ttml/profile/imsc1/text" ttp:frameRate="25.0" ttp:timeBase="media">
+  <head>
+    <styling>
+      <style xml:id="default_style" tts:color="#ffffff" tts:opacity="1" tts:fontSize="100%" tts:fontFamily="default" tts:fontWeight="bold" tts:textAlign="center"/>
+    </styling>
+    <layout>
+      <region xml:id="default_region" tts:origin="7.919% 83.140%" tts:extent="84.193% 16.898%" tts:displayAlign="center"/>
+    </layout>
+  </head>
+  <body>
+"""
+
+def test_write_ttml_matches_pretty_printed_document():
+    """Test TTML output, including the quirks of the earlier minidom pretty printing."""
+    stream = io.StringIO()
+    count = subtitles.write_ttml([
+        subtitles.Subtitle('a & <b> "q"', 0, 25),
+        subtitles.Subtitle("", 30, 40),
+        subtitles.Subtitle("line1\n\n  \nline2\r\nx", 50, 60),
+    ], stream, 25.0)
+    assert count == 3
+    assert stream.getvalue() == TTML_HEAD + """    <div xml:id="d0" region="default_region" style="default_style">
+      <p begin="00:00:00.000" end="00:00:01.000">a &amp; &lt;b&gt; &quot;q&quot;</p>
+      <p begin="00:00:01.200" end="00:00:01.600"/>
+      <p begin="00:00:02.000" end="00:00:02.400">line1
+line2
+x</p>
+    </div>
+  </body>
+</tt>"""
+
+    stream = io.StringIO()
+    subtitles.write_ttml([], stream, 25.0)
+    assert stream.getvalue() == TTML_HEAD + """    <div xml:id="d0" region="default_region" style="default_style"/>
+  </body>
+</tt>"""
+
+def test_write_vtt():
+    """Test WebVTT output with escaped text and no blank lines within cues."""
+    stream = io.StringIO()
+    subtitles.write_vtt([
+        subtitles.Subtitle("first & <i>", 0, 25),
+        subtitles.Subtitle("two\n\nlines", 3725, 3750),
+    ], stream, 25.0)
+    assert stream.getvalue() == (
+        "WEBVTT\n"
+        "\n00:00:00.000 --> 00:00:01.000\nfirst &amp; &lt;i&gt;\n"
+        "\n00:02:29.000 --> 00:02:30.000\ntwo\nlines\n"
+    )
+
+def test_export_to_file(resolve, tmp_path):
+    """Test that export writes the same output to a file as to stdout."""
+    resolve.project_manager.project.timeline = make_timeline()
+    runner = CliRunner()
+    path = tmp_path / "out.srt"
+    stdout = runner.invoke(cli, ["timeline", "subtitles", "export", "--track", "1", "--track", "2", "--format", "srt"]).stdout
+    runner.invoke(cli, ["timeline", "subtitles", "export", "--track", "1", "--track", "2", "--format", "srt", "--output", str(path)])
+    assert path.read_text(encoding="utf-8") == stdout
+    assert stdout.startswith("1\n00:00:00,000 --> 00:00:01,000\nfirst\n\n2\n")
+
+def test_export_several_formats_fetches_once(resolve, tmp_path):
+    """Test that exporting several formats reads the tracks and the frame rate once."""
+    resolve.project_manager.project.timeline = make_timeline()
+    runner = CliRunner()
+    expected = {
+        format_type: runner.invoke(cli, ["timeline", "subtitles", "export", "--track", "1", "--track", "2", "--format", format_type]).stdout
+        for format_type in ["text", "srt", "ttml"]
+    }
+
+    result = runner.invoke(cli, [
+        "--count-calls", "timeline", "subtitles", "export", "--track", "1", "--track", "2",
+        "--format", "text", "--output", str(tmp_path / "out.text"),
+        "--format", "srt", "--output", str(tmp_path / "out.srt"),
+        "--format", "ttml", "--output", str(tmp_path / "out.ttml"),
+    ])
+    assert result.exit_code == 0
+    for format_type, output in expected.items():
+        assert (tmp_path / f"out.{format_type}").read_text(encoding="utf-8") == output
+    calls = json.loads(result.stderr.splitlines()[-1])["calls_by_method"]
+    assert calls["GetItemListInTrack"] == 2
+    assert calls["GetSetting"] == 1
+
+def test_export_keeps_files_when_it_fails(resolve, tmp_path, monkeypatch):
+    """Test that existing output files are only replaced once every format was written."""
+    timeline = make_timeline()
+    resolve.project_manager.project.timeline = timeline
+    directory = tmp_path / "out"
+    directory.mkdir()
+    for name in ["out.srt", "out.ttml"]:
+        (directory / name).write_text("earlier export\n", encoding="utf-8")
+    args = ["timeline", "subtitles", "export", "--track", "1",
+            "--format", "srt", "--output", str(directory / "out.srt"), "--format", "ttml", "--output", str(directory / "out.ttml")]
+
+    def fail(*args):
+        raise RuntimeError("Resolve went away")
+
+    write_ttml = subtitles.write_ttml
+    monkeypatch.setattr(subtitles, "write_ttml", fail)
+    result = CliRunner().invoke(cli, args)
+    assert "Resolve went away" in result.stderr
+    monkeypatch.setattr(subtitles, "write_ttml", write_ttml)
+    monkeypatch.setattr(timeline, "GetItemListInTrack", fail)
+    result = CliRunner().invoke(cli, args)
+    assert "Resolve went away" in result.stderr
+    for name in ["out.srt", "out.ttml"]:
+        assert (directory / name).read_text(encoding="utf-8") == "earlier export\n"
+    assert sorted(os.listdir(directory)) == ["out.srt", "out.ttml"]
+
+def test_export_requires_an_output_per_format(resolve, tmp_path):
+    """Test that formats and outputs must pair up."""
+    runner = CliRunner()
+    result = runner.invoke(cli, ["timeline", "subtitles", "export", "--track", "1", "--format", "text", "--format", "srt"])
+    assert result.exit_code == 2
+    assert "--output for each --format" in result.stderr
+    result = runner.invoke(cli, ["timeline", "subtitles", "export", "--track", "1", "--format", "text", "--format", "srt", "--output", str(tmp_path / "out.txt")])
+    assert result.exit_code == 2
+
+def test_times_count_from_the_timeline_start(resolve):
+    """Test that subtitle times are exact at NTSC rates and start at the first frame of the timeline."""
+    resolve.project_manager.project.timeline = fake_resolve.FakeTimeline(framerate="23.976", start_frame=86400, subtitles={
+        1: [fake_resolve.FakeItem("late", 86400 + 86400, 86400 + 86424)],
+    })
+    result = subtitles.export_subtitles([1])
+    assert subtitles.format_subtitles(result, "srt") == "1\n01:00:03,600 --> 01:00:04,601\nlate\n"
+
+def test_cues_before_the_timeline_start_start_at_zero():
+    """Test that cues starting before the first frame of the timeline are written from time zero."""
+    cues = [subtitles.Subtitle("early", 86400 - 50, 86400 + 25), subtitles.Subtitle("before", 86400 - 50, 86400 - 25)]
+    for format_type, expected in [
+        ("srt", "00:00:00,000 --> 00:00:01,000"),
+        ("vtt", "00:00:00.000 --> 00:00:01.000"),
+        ("ttml", 'begin="00:00:00.000" end="00:00:01.000"'),
+    ]:
+        stream = io.StringIO()
+        assert subtitles.write_subtitles(cues, format_type, stream, 25, 86400) == 2
+        assert expected in stream.getvalue()
+
+def test_project_export_all_timelines(resolve, tmp_path):
+    """Test that every timeline is written to its own files, named after the timeline."""
+    project = resolve.project_manager.project
+    project.timelines = [
+        fake_resolve.FakeTimeline(name="Episode 1", framerate="25", start_frame=0, subtitles={1: [fake_resolve.FakeItem("one", 0, 25)]}),
+        fake_resolve.FakeTimeline(name="Episode 2/3", framerate="25", start_frame=0, subtitles={
+            1: [fake_resolve.FakeItem("two", 25, 50)], 2: [fake_resolve.FakeItem("three", 0, 25)]}),
+        fake_resolve.FakeTimeline(name="Episode 1", framerate="25", start_frame=0),
+    ]
+    out = tmp_path / "out"
+    result = CliRunner().invoke(cli, ["project", "subtitles", "export", "--all-timelines", "--out", str(out), "--format", "srt", "--format", "text", "--jobs", "1"])
+    assert result.exit_code == 0
+    results = sorted((json.loads(line) for line in result.stdout.splitlines()), key=lambda result: result["files"])
+    assert [(result["timeline"], result["subtitles"]) for result in results] == [("Episode 1", 0), ("Episode 1", 1), ("Episode 2/3", 2)]
+    assert sorted(path.name for path in out.iterdir()) == [
+        "Episode 1 (2).srt", "Episode 1 (2).txt", "Episode 1.srt", "Episode 1.txt", "Episode 2_3.srt", "Episode 2_3.txt",
+    ]
+    assert (out / "Episode 2_3.txt").read_text(encoding="utf-8") == "three\ntwo\n"
+    assert (out / "Episode 1 (2).srt").read_text(encoding="utf-8") == "\n"
+
+    # The files are the same as the output of exporting from the timeline
+    project.timeline = project.timelines[1]
+    stdout = CliRunner().invoke(cli, ["timeline", "subtitles", "export", "--track", "1", "--track", "2", "--format", "srt"]).stdout
+    assert (out / "Episode 2_3.srt").read_text(encoding="utf-8") == stdout
+
+def test_project_export_current_timeline(resolve, tmp_path):
+    """Test that only the current timeline is exported without --all-timelines."""
+    result = CliRunner().invoke(cli, ["project", "subtitles", "export", "--out", str(tmp_path)])
+    assert result.exit_code == 0
+    assert [path.name for path in tmp_path.iterdir() if path.suffix == ".srt"] == ["Timeline 1.srt"]
+    assert (tmp_path / "Timeline 1.srt").read_text(encoding="utf-8").startswith("1\n00:00:00,000 --> 00:00:01,000\nHello\n")
+
+def test_project_export_reports_failing_timelines(resolve, tmp_path, monkeypatch):
+    """Test that a timeline failing with any error is reported while the others are written."""
+    project = resolve.project_manager.project
+    project.timelines = [
+        fake_resolve.FakeTimeline(name="Good", framerate="25", start_frame=0, subtitles={1: [fake_resolve.FakeItem("one", 0, 25)]}),
+        fake_resolve.FakeTimeline(name="Bad", framerate="25", start_frame=0, subtitles={1: [fake_resolve.FakeItem("<bad>", 0, 25)]}),
+    ]
+    write_text = subtitles.write_text
+
+    def fail_on_bad(cues, stream):
+        if any(cue.text == "<bad>" for cue in cues):
+            raise ValueError("Cannot write <bad>")
+        return write_text(cues, stream)
+
+    monkeypatch.setattr(subtitles, "write_text", fail_on_bad)
+    out = tmp_path / "out"
+    result = CliRunner().invoke(cli, ["project", "subtitles", "export", "--all-timelines", "--out", str(out), "--format", "text"])
+    assert result.exit_code == 0
+    results = {json.loads(line)["timeline"]: json.loads(line) for line in result.stdout.splitlines()}
+    assert results["Good"]["subtitles"] == 1
+    assert results["Bad"]["error"] == "Cannot write <bad>"
+    assert sorted(path.name for path in out.iterdir()) == ["Good.txt"]
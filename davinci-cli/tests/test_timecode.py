@@ -0,0 +1,73 @@
+from fractions import Fraction
+
+import pytest
+
+from src import timecode
+
+@pytest.mark.parametrize("rate, expected", [
+    (24, Fraction(24)),
+    ("25", Fraction(25)),
+    (23.976, Fraction(24000, 1001)),
+    ("23.976", Fraction(24000, 1001)),
+    ("23.98", Fraction(24000, 1001)),
+    (29.97, Fraction(30000, 1001)),
+    ("59.94", Fraction(60000, 1001)),
+    ("30000/1001", Fraction(30000, 1001)),
+    (12.5, Fraction(25, 2)),
+])
+def test_parse_rate(rate, expected):
+    assert timecode.parse_rate(rate) == expected
+
+@pytest.mark.parametrize("rate", [0, "-25", "abc"])
+def test_parse_rate_rejects_invalid_rates(rate):
+    with pytest.raises(ValueError):
+        timecode.parse_rate(rate)
+
+@pytest.mark.parametrize("rate, frames, expected", [
+    (25, 0, "00:00:00.000"),
+    (25, 37, "00:00:01.480"),
+    (24, 86400, "01:00:00.000"),
+    ("23.976", 1, "00:00:00.041"),
+    ("23.976", 24, "00:00:01.001"),
+    ("23.976", 24000, "00:16:41.000"),
+    ("23.976", 86400, "01:00:03.600"),
+    ("29.97", 107892, "00:59:59.996"),
+    ("59.94", 60000 * 36, "10:00:36.000"),
+])
+def test_clock(rate, frames, expected):
+    assert timecode.timebase(rate).clock(frames) == expected
+
+@pytest.mark.parametrize("rate, drop_frame, frames, expected", [
+    (24, False, 86400, "01:00:00:00"),
+    (25, False, 90000 + 24, "01:00:00:24"),
+    ("23.976", False, 86400, "01:00:00:00"),
+    ("29.97", False, 1800, "00:01:00:00"),
+    ("29.97", True, 1799, "00:00:59;29"),
+    ("29.97", True, 1800, "00:01:00;02"),
+    ("29.97", True, 17982, "00:10:00;00"),
+    ("29.97", True, 107892, "01:00:00;00"),
+    ("59.94", True, 3599, "00:00:59;59"),
+    ("59.94", True, 3600, "00:01:00;04"),
+    ("59.94", True, 215784, "01:00:00;00"),
+])
+def test_timecode(rate, drop_frame, frames, expected):
+    assert timecode.timebase(rate, drop_frame).timecode(frames) == expected
+
+def test_drop_frame_needs_an_ntsc_rate():
+    with pytest.raises(ValueError):
+        timecode.timebase(25, True)
+
+def test_negative_frames_are_rejected():
+    with pytest.raises(ValueError):
+        timecode.timebase(25).clock(-1)
+
+def test_batch_conversions_match_single_ones():
+    frames = list(range(0, 500_000, 997))
+    base = timecode.timebase("29.97", True)
+    assert timecode.frames_to_timecodes(frames, "29.97", drop_frame=True) == [base.timecode(frame) for frame in frames]
+    # The table lookup gives the same as computing from the exact frame rate
+    assert timecode.frames_to_clock_times([86400 + frame for frame in frames], "29.97", 86400, ",") == [
+        "{:02d}:{:02d}:{:02d},{:03d}".format(
+            ms // 3_600_000, ms // 60_000 % 60, ms // 1000 % 60, ms % 1000
+        ) for ms in (frame * 1001 // 30 for frame in frames)
+    ]